@@ -0,0 +1 @@
+""" Benchmarks of mlpyqtgraph """
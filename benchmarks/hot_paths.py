@@ -0,0 +1,317 @@
+"""
+Microbenchmarks of the CPU-side data preparation hot paths of mlpyqtgraph
+
+The benchmarks run without a display, using Qt's offscreen platform. Results
+are written as JSON and compared against baseline.json, such that regressions
+cause a non-zero exit code. Timings only compare on the same machine, so the
+baseline isn't part of the repository: the first run records it, and
+--save-baseline records it again, e.g. after an intended change:
+
+    python -m benchmarks.hot_paths --output results.json
+    python -m benchmarks.hot_paths --save-baseline
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import pyqtgraph as pg
+
+from mlpyqtgraph.axes import Axis2D
+from mlpyqtgraph.axes3d import Axis3D, Axis3DItem, coord_bounds
+from mlpyqtgraph.envelope import EnvelopePyramid
+from mlpyqtgraph.grid_axes import GLGridAxisItem
+from mlpyqtgraph.utils.GLPointsItem import lod_order
+from mlpyqtgraph.utils.GLSurfacePlotItem import GLSurfacePlotItem, GridTopology
+from mlpyqtgraph.utils.glcolormap import ItemColormap
+from mlpyqtgraph.utils.ticklabels import coord_generator
+
+
+BASELINE = Path(__file__).with_name('baseline.json')
+DEFAULT_SIZES = (10**3, 10**4, 10**5, 10**6, 10**7)
+IMPORT_BENCHMARKS = ('import mlpyqtgraph', 'import pyqtgraph, pqthreads')
+MAX_IMPORT_RATIO = 1.5
+BENCHMARKS = {}
+
+
+def benchmark(name, sized=True):
+    """
+    Register a benchmark, defined by a setup function, which takes the number
+    of data elements and returns the function to be timed. Unsized benchmarks
+    don't depend on the data size and only run once.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, sized)
+        return setup
+    return register
+
+
+def grid_data(size):
+    """ Coordinates of a square surface grid with about size vertices """
+    side = max(2, math.isqrt(size))
+    x = np.linspace(-1.0, 1.0, side)
+    y = np.linspace(-2.0, 2.0, side)
+    z = np.sin(3*x)[:, np.newaxis]*np.cos(3*y)[np.newaxis, :]
+    return x, y, z
+
+
+def line_data(size):
+    """ Coordinates of a 3D line with size points """
+    t = np.linspace(0.0, 10.0, size)
+    return t, np.sin(t), np.cos(t)
+
+
+def surface(size, show_grid=False):
+    """ Surface plot item with about size vertices """
+    x, y, z = grid_data(size)
+    return GLSurfacePlotItem(x=x, y=y, z=z, showGrid=show_grid)
+
+
+@benchmark('GLSurfacePlotItem.setData')
+def surface_set_data(size):
+    x, y, z = grid_data(size)
+    return lambda: GLSurfacePlotItem(showGrid=True).setData(x=x, y=y, z=z)
+
+
+@benchmark('GLSurfacePlotItem.set_z')
+def surface_set_z(size):
+    item = surface(size, show_grid=True)
+    z = 0.5*item._z
+    return lambda: item.set_z(z)
+
+
+@benchmark('GLSurfacePlotItem.generateFaces')
+def surface_generate_faces(size):
+    return surface(size).generateFaces
+
+
+@benchmark('GLSurfacePlotItem._build_levels')
+def surface_build_levels(size):
+    return surface(size)._build_levels
+
+
+@benchmark('GLPointsItem.lod_order')
+def points_lod_order(size):
+    pos = np.column_stack(line_data(size)).astype(np.float32)
+    return lambda: lod_order(pos)
+
+
+@benchmark('GridTopology')
+def grid_topology_uncached(size):
+    side = max(2, math.isqrt(size))
+    return lambda: GridTopology(side, side)
+
+
+@benchmark('GLSurfacePlotItem._update_grid')
+def surface_update_grid(size):
+    return surface(size, show_grid=True)._update_grid
+
+
+@benchmark('axes3d.coord_bounds')
+def axes3d_coord_bounds(size):
+    coord_kwargs = dict(zip('xyz', line_data(size)))
+    return lambda: coord_bounds(coord_kwargs)
+
+
+@benchmark('Axis3D._aggregate_limits')
+def axis3d_aggregate_limits(size):
+    axis = Axis3D(0)
+    data = line_data(size)
+    axis._items = [
+        Axis3DItem(None, data, {}, bounds=coord_bounds(dict(zip('xyz', data))))
+    ]
+    return axis._aggregate_limits
+
+
+@benchmark('Axis3D._transform_coordinates')
+def axis3d_transform_coordinates(size):
+    axis = Axis3D(0)
+    coord_kwargs = dict(zip('xyz', line_data(size)))
+    out = np.empty((size, 3), dtype=np.float32)
+    return lambda: axis._transform_coordinates(dict(coord_kwargs), out=out)
+
+
+@benchmark('ItemColormap.limits')
+def item_colormap_limits(size):
+    item_colormap = ItemColormap()
+    item_colormap.setColormap('viridis')
+    _, _, z = grid_data(size)
+
+    def limits():
+        item_colormap.scalarsChanged()
+        return item_colormap.limits(z)
+    return limits
+
+
+@benchmark('EnvelopePyramid')
+def envelope_pyramid(size):
+    x, y, _ = line_data(size)
+    return lambda: EnvelopePyramid(x, y)
+
+
+@benchmark('EnvelopePyramid.select')
+def envelope_pyramid_select(size):
+    x, y, _ = line_data(size)
+    pyramid = EnvelopePyramid(x, y)
+    return lambda: pyramid.select(x[0], x[-1], pixels=1920)
+
+
+@benchmark('GLGridAxisItem.setData', sized=False)
+def grid_axis_set_data(_):
+    grid_axes = GLGridAxisItem()
+    coords = {key: [-1.0, -0.5, 0.0, 0.5, 1.0] for key in 'xyz'}
+    coords_labels = {key: [f'{x:.2g}' for x in coords[key]] for key in 'xyz'}
+    limits = {key: (-1.05, 1.05) for key in 'xyz'}
+    return lambda: grid_axes.setData(
+        coords=coords, coords_labels=coords_labels, limits=limits
+    )
+
+
+@benchmark('ticklabels.coord_generator')
+def ticklabels_coord_generator(size):
+    data = dict(zip('xyz', line_data(size)))
+    return lambda: dict(coord_generator(data))
+
+
+@benchmark('Axis2D.add')
+def axis2d_add(size):
+    axis = Axis2D(0)
+    x, y, _ = line_data(size)
+
+    def add():
+        axis.clear()
+        axis.add(x, y)
+    return add
+
+
+@benchmark('import pyqtgraph, pqthreads', sized=False)
+def import_dependencies(_):
+    return lambda: import_in_new_interpreter('import pyqtgraph, pqthreads')
+
+
+@benchmark('import mlpyqtgraph', sized=False)
+def import_mlpyqtgraph(_):
+    return lambda: import_in_new_interpreter('import mlpyqtgraph')
+
+
+def import_in_new_interpreter(statement):
+    """ Run an import statement in a new interpreter, for a cold start """
+    subprocess.run([sys.executable, '-c', statement], check=True)
+
+
+def measure(func, repeats=5, min_time=0.2):
+    """ Best and median time per call, in seconds """
+    timer = timeit.Timer(func)
+    number = 1
+    if min_time > 0:
+        number, duration = timer.autorange()
+        number = max(1, round(number*min_time/max(duration, 1e-9)))
+    totals = timer.repeat(repeat=repeats, number=number)
+    times = [total/number for total in totals]
+    return {'best': min(times), 'median': float(np.median(times))}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, repeats=5, min_time=0.2):
+    """ Run the selected benchmarks and return the timings per size """
+    pg.mkQApp()
+    results = {}
+    for name, (setup, sized) in BENCHMARKS.items():
+        if names and not any(selected in name for selected in names):
+            continue
+        results[name] = {}
+        for size in sizes if sized else (0,):
+            func = setup(size)
+            timing = measure(func, repeats, min_time)
+            results[name][str(size)] = timing
+            print(f'{name:<36}{size:>10}{timing["best"]:>12.3e}s')
+    return results
+
+
+def metadata():
+    """ Description of the environment the benchmarks ran in """
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pyqtgraph': pg.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Returns the regressions, i.e. timings that are more than tolerance slower
+    than their baseline, as (name, size, ratio) tuples
+    """
+    regressions = []
+    for name, timings in results.items():
+        for size, timing in timings.items():
+            reference = baseline.get(name, {}).get(size)
+            if reference is None:
+                continue
+            ratio = timing['best']/reference['best']
+            if ratio > 1 + tolerance:
+                regressions.append((name, size, ratio))
+    return regressions
+
+
+def import_ratio(results):
+    """
+    Ratio of the cold start of importing mlpyqtgraph and importing its
+    dependencies, which unlike the import time itself holds on any machine.
+    Returns None unless both imports were timed.
+    """
+    timings = [results.get(name, {}).get('0') for name in IMPORT_BENCHMARKS]
+    if None in timings:
+        return None
+    package, dependencies = timings
+    return package['best']/dependencies['best']
+
+
+def main(argv=None):
+    """ Command line interface of the benchmark suite """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=float, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--max-size', type=float, default=None)
+    parser.add_argument('--filter', nargs='+', default=None)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes]
+    if args.max_size is not None:
+        sizes = [size for size in sizes if size <= args.max_size]
+    results = run_benchmarks(sizes, args.filter, args.repeats)
+    ratio = import_ratio(results)
+    if ratio is not None and ratio > MAX_IMPORT_RATIO:
+        print(f'Regression: importing mlpyqtgraph takes {ratio:.2f}x as long '
+              f'as importing its dependencies')
+        return 1
+    report = {'metadata': metadata(), 'results': results}
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    if args.save_baseline or not args.baseline.exists():
+        args.baseline.write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f'Recorded the baseline of this machine at {args.baseline}')
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))['results']
+    regressions = compare(results, baseline, args.tolerance)
+    for name, size, ratio in regressions:
+        print(f'Regression: {name} ({size} elements) is {ratio:.2f}x slower')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
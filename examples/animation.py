@@ -0,0 +1,24 @@
+"""
+Example of an animated 2D line, which prints the achieved frame rate
+"""
+
+import numpy as np
+import mlpyqtgraph as mpg
+
+
+@mpg.plotter
+def main():
+    """ Animate a travelling wave """
+    x = np.linspace(0.0, 4*np.pi, 1_000)
+    mpg.figure(title='Travelling wave')
+    line = mpg.plot(x, np.sin(x))
+
+    def update(frame):
+        return [(line, (x, np.sin(x - 0.1*frame)))]
+
+    stats = mpg.animate(update, frames=500, interval=20)
+    print(f'{stats["fps"]:.1f} fps, {stats["dropped"]} dropped frames')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,13 +3,24 @@ __init__.py for mlpyqtgraph, only functions and classes which are meant to be
 used as interface
 """
 
+import os
+
 from pyqtgraph.Qt import QtCore
 from pqthreads import config as pqthreads_config
+from pqthreads import agents
+from pqthreads import controllers
+from pqthreads import refs
 from pqthreads.decorator import DecoratorCore, Decorator
 from mlpyqtgraph import windows
 from mlpyqtgraph import axes
+from mlpyqtgraph import lines
+from mlpyqtgraph import items
+from mlpyqtgraph import animation
 from mlpyqtgraph import workers
 from mlpyqtgraph import config
+from mlpyqtgraph.calls import ItemContainer
+from mlpyqtgraph import process
+from mlpyqtgraph.latency import call_stats
 
 from . import ml_functions
 from .ml_functions import *
@@ -18,10 +29,38 @@ from .ml_functions import *
 __version__ = '1.0.0'
 
 
-pqthreads_config.params.signal_slot_timeout = 10_000
+pqthreads_config.params.signal_slot_timeout = config.options.get_option(
+    'signal_slot_timeout'
+)
 pqthreads_config.params.set_application_attribute(QtCore.Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
 
 
+class GUIAgency(controllers.GUIAgency):
+    """
+    GUI agency, which closes all figures once finished in headless mode and
+    keeps the indices of items when other items are removed
+    """
+
+    def setup_agents(self):
+        """ Setup GUI agents, which look up their items by index """
+        for name, item_class in self.gui_agents_classes.items():
+            container = ItemContainer(item_class, parent=self)
+            self.gui_containers[name] = container
+            self.gui_agents[name] = agents.GUIAgent(
+                name, container, parent=self
+            )
+            refs.gui.add(name, container)
+
+    @QtCore.Slot()
+    def exit_windowless_application(self):
+        """ Exit the application if no windows are open or in headless mode """
+        if config.options.get_option('headless'):
+            self.application.closeAllWindows()
+            self.application.exit()
+            return
+        super().exit_windowless_application()
+
+
 class OptionsDecoratorCore(DecoratorCore):
     """ Decorator take also takes keyword arguments and sets them as config
     options """
@@ -30,8 +69,33 @@ class OptionsDecoratorCore(DecoratorCore):
         super().__init__(**options)
         if options:
             config.options.set_options(**options)
+            pqthreads_config.params.signal_slot_timeout = \
+                config.options.get_option('signal_slot_timeout')
+        self.gui_agency_class = GUIAgency
+
+    def wrapper(self, wrapped, args, kwargs):
+        """
+        Run the wrapped function with the configured backend. In headless mode,
+        Qt's offscreen platform is used, unless QT_QPA_PLATFORM is set.
+        """
+        if config.options.get_option('headless'):
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        try:
+            if config.options.get_option('backend') == 'process':
+                return process.run(
+                    wrapped, args, kwargs, self.gui_agents, self.worker_agents
+                )
+            return super().wrapper(wrapped, args, kwargs)
+        finally:
+            if filename := config.options.get_option('call_stats_file'):
+                call_stats.dump(filename)
 
 
 OptionsDecoratorCore.add_agent('figure', windows.FigureWindow, workers.FigureWorker)
 OptionsDecoratorCore.add_agent('axis',axes.Axis, workers.AxisWorker)
+OptionsDecoratorCore.add_agent('line', lines.Line2D, workers.LineWorker)
+OptionsDecoratorCore.add_agent('item3d', items.Item3D, workers.Item3DWorker)
+OptionsDecoratorCore.add_agent(
+    'animation', animation.Animation, workers.AnimationWorker
+)
 plotter = Decorator(OptionsDecoratorCore)
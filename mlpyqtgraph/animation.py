@@ -0,0 +1,170 @@
+"""
+Animations driven by a timer on the GUI thread
+
+The worker thread produces frames on schedule and sends the updates of each
+frame to the GUI thread, where a timer applies the most recent frame once per
+interval and repaints the figure. Frames are skipped if the producer falls
+behind schedule, or if a newer frame arrives before the previous one has been
+applied.
+"""
+
+import itertools
+import time
+
+from pyqtgraph.Qt import QtCore
+
+from mlpyqtgraph.calls import Call, CallTarget, apply_call, gui_item
+from mlpyqtgraph.latency import summary
+
+
+class Animation(QtCore.QObject, CallTarget):
+    """ Applies the frames of an animation to a figure's items """
+    cached_attributes = ('running',)
+
+    def __init__(self, index, figure_index, interval=40, parent=None):
+        super().__init__(parent=parent)
+        self.index = index
+        self.figure = gui_item('figure', figure_index)
+        self.running = True
+        self._pending = None
+        self._applied = 0
+        self._superseded = 0
+        self._idle_ticks = 0
+        self._paint_times = []
+        self._started = time.perf_counter()
+        self._elapsed = None
+        self._error = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self.tick)
+        self._timer.start(interval)
+
+    def push(self, updates):
+        """
+        Store the updates of a frame, as (agent name, index, method, args)
+        tuples, replacing a frame that hasn't been applied yet
+        """
+        if self._pending is not None:
+            self._superseded += 1
+        self._pending = updates
+
+    def tick(self):
+        """ Apply the most recent frame and repaint the figure """
+        if not self.figure.window.isVisible():
+            self.stop()
+            return
+        if self._pending is None:
+            self._idle_ticks += 1
+            return
+        try:
+            self.apply_frame()
+        except Exception as err:
+            # errors of the timer slot don't reach the worker thread, such
+            # that the animation ends and stop raises the error
+            self._error = err
+            self._finish()
+
+    def apply_frame(self):
+        """ Apply the pending frame and record the time to paint it """
+        updates, self._pending = self._pending, None
+        start = time.perf_counter()
+        for name, index, method, args in updates:
+            item = gui_item(name, index)
+            apply_call(item, Call('call', method, args))
+            if flush_update := getattr(item, 'flush_update', None):
+                flush_update()
+        self.figure.window.repaint()
+        self._paint_times.append(time.perf_counter() - start)
+        self._applied += 1
+
+    def stop(self) -> dict:
+        """
+        Stop the animation, after applying a pending frame, and return its
+        statistics. Raises the error of a frame that failed to be applied.
+        """
+        if self.running:
+            self._timer.stop()
+            try:
+                if self._pending is not None and self.figure.window.isVisible():
+                    self.apply_frame()
+            finally:
+                self._finish()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        return self.stats()
+
+    def _finish(self):
+        """ Stop the timer and publish that the animation isn't running """
+        self._timer.stop()
+        self._elapsed = time.perf_counter() - self._started
+        self.running = False
+        self.publish('running')
+
+    def stats(self) -> dict:
+        """
+        Number of applied frames, achieved frames per second, frames that
+        were superseded before being applied, timer ticks without a new frame
+        and statistics of the time to apply and paint a frame
+        """
+        elapsed = self._elapsed
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._started
+        paint_time = summary(self._paint_times) if self._paint_times else None
+        return {
+            'frames': self._applied,
+            'fps': self._applied/elapsed if elapsed > 0 else 0.0,
+            'superseded': self._superseded,
+            'idle_ticks': self._idle_ticks,
+            'paint_time': paint_time,
+        }
+
+
+def frame_updates(updates) -> list:
+    """
+    Converts the updates returned by an animation's update function to
+    (agent name, index, method, args) tuples. Each update is a tuple of a
+    handle and the arguments of its `set_data` method, or a tuple of a handle,
+    a method name and its arguments.
+    """
+    if updates is None:
+        return []
+    converted = []
+    for update in updates:
+        handle, *rest = update
+        method, args = ('set_data', *rest) if len(rest) == 1 else rest
+        converted.append((handle.agent.name, handle.index, method, tuple(args)))
+    return converted
+
+
+def animate(animation, update_fn, frames=None, interval=40):
+    """
+    Produce the frames of an animation on schedule and send them to the
+    animation's GUI counterpart. Frames that are due while the previous frame
+    is still being produced are skipped. Returns the animation statistics,
+    including the number of dropped frames.
+    """
+    if frames is None:
+        frames = itertools.count()
+    elif isinstance(frames, int):
+        frames = range(frames)
+    period = interval/1000
+    skipped = 0
+    start = time.perf_counter()
+    for number, frame in enumerate(frames):
+        if not animation.running:
+            break
+        due = start + number*period
+        now = time.perf_counter()
+        if now > due + period:
+            skipped += 1
+            continue
+        if now < due:
+            time.sleep(due - now)
+        updates = frame_updates(update_fn(frame))
+        with animation.nonblocking():
+            animation.push(updates)
+    stats = animation.stop()
+    stats['skipped'] = skipped
+    stats['dropped'] = skipped + stats['superseded']
+    return stats
@@ -1,20 +1,18 @@
-""" mlpyqtgraph axes module, with 2D and 3D Axis classes """
+"""
+mlpyqtgraph axes module, with the 2D Axis class
 
+The 3D Axis class lives in the axes3d module, which is only imported once the
+first 3D axis is created, such that 2D plots don't load the OpenGL stack.
+"""
 
-from dataclasses import dataclass
-from typing import List
-from pyqtgraph import PlotItem, ColorMap, colormap, QtCore, Point, mkBrush, mkPen
-from pyqtgraph.opengl import GLLinePlotItem, GLViewWidget
-from pyqtgraph.opengl.GLGraphicsItem import GLGraphicsItem
+
+from pyqtgraph import PlotItem, QtCore, Point, mkBrush, mkPen
 import pyqtgraph.functions as fn
 import numpy as np
 
 from mlpyqtgraph.config import options
 from mlpyqtgraph import colors
-from mlpyqtgraph.grid_axes import GLGridAxisItem
-from mlpyqtgraph.utils.ticklabels import coord_generator, limit_generator, coord_transformers
-from mlpyqtgraph.utils.GLSurfacePlotItem import GLSurfacePlotItem
-from mlpyqtgraph.utils.GLPointsItem import GLPointsItem
+from mlpyqtgraph.calls import CallTarget
 
 
 class RootException(Exception):
@@ -25,12 +23,14 @@ class InvalidAxis(RootException):
     """ Exception raised for invalid axes """
 
 
-class Axis2D(PlotItem):  # noqa: PLR0904
+class Axis2D(PlotItem, CallTarget):  # noqa: PLR0904
     """ Axis for plots in a given figure layout """
     pen_styles = {'-': QtCore.Qt.SolidLine,
                   '--': QtCore.Qt.DashLine,
                   ':': QtCore.Qt.DotLine,
                   '.-': QtCore.Qt.DashDotLine}
+    cached_attributes = ('grid', 'xlim', 'ylim', 'xlabel', 'xunits', 'ylabel',
+                         'yunits', 'xticks', 'yticks')
 
     def __init__(self, index, **kwargs):
         parent = kwargs.pop('parent', None)
@@ -53,6 +53,27 @@ class Axis2D(PlotItem):  # noqa: PLR0904
         self.getViewBox().rbScaleBox.setBrush(fn.mkBrush(*self.scale_box_fill_color))
         for axis_key in self.axes:
             self.getAxis(axis_key).setZValue(-1) # force axis and corresponding ticks to background
+        self.getViewBox().sigXRangeChanged.connect(self.publish_x_range)
+        self.getViewBox().sigYRangeChanged.connect(self.publish_y_range)
+        self.getViewBox().sigResized.connect(self.publish_ticks)
+        self.ctrl.xGridCheck.toggled.connect(self.publish_grid)
+        self.ctrl.yGridCheck.toggled.connect(self.publish_grid)
+
+    def publish_x_range(self):
+        """ Publish x limits and ticks to the attribute cache """
+        self.publish('xlim', 'xticks')
+
+    def publish_y_range(self):
+        """ Publish y limits and ticks to the attribute cache """
+        self.publish('ylim', 'yticks')
+
+    def publish_ticks(self):
+        """ Publish ticks to the attribute cache """
+        self.publish('xticks', 'yticks')
+
+    def publish_grid(self):
+        """ Publish grid activation state to the attribute cache """
+        self.publish('grid')
 
     @property
     def x_axis(self):
@@ -122,6 +143,10 @@ class Axis2D(PlotItem):  # noqa: PLR0904
                 symbol color
 
         """
+        self.plot_line(x_coord, y_coord, **kwargs)
+
+    def plot_line(self, x_coord, y_coord, **kwargs):
+        """ Adds a line with the options of `add` and returns its item """
         color = kwargs.get('color', self.default_line_color())
         width = kwargs.get('width', 2.0)
         if options.get_option('no_segmented_line_mode'):
@@ -141,9 +166,9 @@ class Axis2D(PlotItem):  # noqa: PLR0904
         if symbol is not None:
             symbol_pen = mkPen(symbol_color, width=0)
 
-        self.plot(x_coord, y_coord,
-                  pen=line_pen, symbol=symbol, symbolSize=symbol_size,
-                  symbolPen=symbol_pen, symbolBrush=symbol_color)
+        return self.plot(x_coord, y_coord,
+                         pen=line_pen, symbol=symbol, symbolSize=symbol_size,
+                         symbolPen=symbol_pen, symbolBrush=symbol_color)
 
     @property
     def grid(self):
@@ -180,12 +205,13 @@ class Axis2D(PlotItem):  # noqa: PLR0904
     @property
     def xlabel(self):
         """ Obtain xlabel """
-        return self.x_axis.label.toPlainText()
+        return self.x_axis.labelText
 
     @xlabel.setter
     def xlabel(self, label):
         """ Change x label """
         self.x_axis.setLabel(label, units=self.x_axis.labelUnits)
+        self.publish('xlabel')
 
     @property
     def xunits(self):
@@ -196,16 +222,18 @@ class Axis2D(PlotItem):  # noqa: PLR0904
     def xunits(self, units):
         """ Change x-axis units """
         self.x_axis.setLabel(self.x_axis.labelText, units=units)
+        self.publish('xunits')
 
     @property
     def ylabel(self):
         """ Obtain ylabel """
-        return self.y_axis.label.toPlainText()
+        return self.y_axis.labelText
 
     @ylabel.setter
     def ylabel(self, label):
         """ Change y label """
         self.y_axis.setLabel(label, units=self.y_axis.labelUnits)
+        self.publish('ylabel')
 
     @property
     def yunits(self):
@@ -216,6 +244,7 @@ class Axis2D(PlotItem):  # noqa: PLR0904
     def yunits(self, units):
         """ Change y-axis units """
         self.y_axis.setLabel(self.y_axis.labelText, units=units)
+        self.publish('yunits')
 
     @property
     def xticks(self):
@@ -240,10 +269,12 @@ class Axis2D(PlotItem):  # noqa: PLR0904
     def set_xticks(self, major, minor=None):
         """ Sets the major and minor ticks on the x-axis """
         self.set_ticks(self.x_axis, major, minor)
+        self.publish('xticks')
 
     def set_yticks(self, major, minor=None):
         """ Sets the major and minor ticks on the y-axis """
         self.set_ticks(self.y_axis, major, minor)
+        self.publish('yticks')
 
     @staticmethod
     def set_ticks(axis, major, minor=None):
@@ -302,341 +333,16 @@ class Axis2D(PlotItem):  # noqa: PLR0904
     def delete(self):
         """ Closes the axis """
 
-@dataclass
-class Axis3DItem:
-    instance: GLSurfacePlotItem | GLLinePlotItem | GLPointsItem
-    data: tuple
-    options: dict
-
-
-class ViewNotDefinedError(Exception):
-    """ Raised if view is not defined yet """
-
-
-class InvalidTicks(Exception):
-    """ Raised for invalid no. of ticks entries """
-
-
-class Axis3D(GLGraphicsItem):
-    """ 3D axis """
-
-    aspect_ratios = {
-        'auto': (1.0, 1.0, 0.8),
-        'flat': (1.0, 1.0, 0.6),
-        'cube': (1.0, 1.0, 1.0),
-    }
-
-    def __init__(self, index, parentItem=None, **kwargs):
-        super().__init__(parentItem=parentItem)
-        antialiasing = options.get_option('antialiasing')
-        self.index = index
-        self.grid_axes = GLGridAxisItem(parentItem=self, line_antialias=antialiasing)
-        self.default_surface_options = {
-            'color': (0, 0, 0, 1),
-            'showGrid': True,
-            'lineAntialias': antialiasing,
-            'colormap': options.get_option('colormap'),
-        }
-        self.default_line_options = {
-            'color': (0, 0, 0, 1),
-            'antialias': antialiasing,
-            'width': 1,
-        }
-        self.default_points_options = {
-            'color': (0, 0, 0, 1),
-            'size': 5.0,
-        }
-        self._items: List[Axis3DItem] = []
-        self._aspect_ratio = 'auto'
-        self._projection_method = options.get_option('projection')
-        self._label_fmt = '.2g'
-        self._lim = { c: [] for c in 'xyz' }
-        self._max_no_ticks = { c: 6 for c in 'xyz' }
-        self._camera_params = {}
-
-    def surf(self, *args, **kwargs):
-        """ Adds a 3D surface plot item to the view widget  """
-        kwargs = dict(self.default_surface_options, **kwargs)
-        surface = GLSurfacePlotItem(**kwargs)
-        self._add_item(surface, *args, **kwargs)
-        self.update()
-
-    def line(self, *args, **kwargs):
-        """ Plots a single grid line for given coordinates """
-        kwargs = dict(self.default_line_options, **kwargs)
-        line = GLLinePlotItem(**kwargs)
-        self._add_item(line, *args, **kwargs)
-        self.update()
-
-    def points(self, *args, **kwargs):
-        """ Plots a set of points for given coordinates """
-        kwargs = dict(self.default_points_options, **kwargs)
-        points = GLPointsItem(**kwargs)
-        self._add_item(points, *args, **kwargs)
-        self.update()
-
-    def update(self):
-        if not self._items:
-            super().update()
-            return
-        aggregated_limits = self._aggregate_limits()
-        shared_limits = self._resolve_limits(aggregated_limits)
-        coords = coords_labels = limits = None
-        for item in self._items:
-            plot_item = item.instance
-            coord_kwargs = dict(zip('xyz', item.data))
-            coords, coords_labels, limits = self._transform_coordinates(
-                coord_kwargs, limits=shared_limits
-            )
-            if isinstance(plot_item, GLSurfacePlotItem):
-                plot_item.setData(**coord_kwargs)
-                if colormap := item.options.get('colormap'):
-                    self._set_colormap(plot_item, colormap_type=colormap)
-            elif isinstance(plot_item, GLLinePlotItem):
-                points = np.column_stack(list(coord_kwargs.values()))
-                plot_item.setData(pos=points)
-            elif isinstance(plot_item, GLPointsItem):
-                points = np.column_stack(list(coord_kwargs.values()))
-                plot_item.setData(pos=points)
-        if coords is not None:
-            # Set FOV based on projection method, distance will be set by best_camera()
-            field_of_view = 60 if self._projection_method == 'perspective' else 1
-            self._get_view().setCameraParams(fov=field_of_view)
-            self.grid_axes.setData(coords=coords, coords_labels=coords_labels, limits=limits)
-            self._get_view().setCameraPosition(
-                **self.grid_axes.best_camera(method=self._projection_method)
-            )
-        self._get_view().setCameraParams(**self._camera_params)
-        super().update()
-
-    def _aggregate_limits(self) -> dict | None:
-        """Aggregate min/max limits for each axis across all items."""
-        if not self._items:
-            return None
-        mins: dict[str, float | None] = {key: None for key in 'xyz'}
-        maxs: dict[str, float | None] = {key: None for key in 'xyz'}
-        for item in self._items:
-            coord_kwargs = dict(zip('xyz', item.data))
-            for key, values in coord_kwargs.items():
-                values = np.asarray(values)
-                if values.size == 0:
-                    continue
-                min_val = float(values.min())
-                max_val = float(values.max())
-                mins[key] = min_val if mins[key] is None else min(mins[key], min_val)
-                maxs[key] = max_val if maxs[key] is None else max(maxs[key], max_val)
-        return {key: [mins[key], maxs[key]] for key in 'xyz'}
-
-    def _resolve_limits(self, aggregated_limits: dict | None) -> dict:
-        """Resolve final limits from custom limits and aggregated data bounds."""
-        if aggregated_limits is None:
-            return self._lim
-        resolved = {}
-        for key in 'xyz':
-            user_limits = self._lim.get(key, [])
-            agg_min, agg_max = aggregated_limits[key]
-            min_limit = user_limits[0] if len(user_limits) > 0 else None
-            max_limit = user_limits[1] if len(user_limits) > 1 else None
-            if min_limit is None:
-                min_limit = agg_min
-            if max_limit is None:
-                max_limit = agg_max
-            resolved[key] = [min_limit, max_limit]
-        return resolved
-
-    def _get_view(self) -> GLViewWidget:
-        if view := self.view():
-            return view
-        raise ViewNotDefinedError('Axis3D doesn\'t have a view!')
-
-    def _add_item(self, item: GLSurfacePlotItem | GLLinePlotItem | GLPointsItem, *data, **options):
-        self._items.append(Axis3DItem(item, data, options))
-        self._get_view().addItem(item)
-
-    def _aspect_coords(self):
-        """ Returns the aspect ratio coordinates """
-        if self._aspect_ratio == 'equal':
-            return False
-        elif isinstance(self._aspect_ratio, str):
-            ratios = self.aspect_ratios.get(self._aspect_ratio, (1.0, 1.0, 0.8))
-        elif isinstance(self._aspect_ratio, tuple | list):
-            ratios = self.aspect_ratio
-        else:
-            raise ValueError()
-        return {label: (0.0, ratio) for label, ratio in zip('xyz', ratios)}
-
-    def _transform_coordinates(self, coord_kwargs, limits=None):
-        """ Transforms the given coordinates according to fixed coords """
-        coords_labels = dict(coord_generator(
-            coord_kwargs,
-            max_no_ticks=self._max_no_ticks,
-            limits=limits if limits is not None else self._lim
-        ))
-        if aspect_coords := self._aspect_coords():
-            coords = {}
-            for key, transformer in coord_transformers(coords_labels, aspect_coords):
-                coord_kwargs[key] = transformer(coord_kwargs[key])
-                coords[key] = transformer(coords_labels[key])
-        else:
-            coords = coords_labels
-        limits = dict(limit_generator(limit_ratio=0.05, **coords))
-        coords_str_labels = dict(self._gen_str_labels(coords_labels))
-        return coords, coords_str_labels, limits
-
-    def _gen_str_labels(self, coords):
-        for key, value in coords.items():
-            yield key, [f'{x:{self._label_fmt}}' for x in value]
-
-    @staticmethod
-    def _set_colormap(surface, colormap_type='CET-L10'):
-        """ Assign colormap to surface using surface height """
-        heights = surface._z
-        normalized_heights = (heights - heights.min())/np.ptp(heights)
-        if current_colormap := colormap.get(colormap_type):
-            colors = current_colormap.map(normalized_heights, mode=ColorMap.FLOAT)
-            surface._meshdata.setFaceColors(colors)
-
-    @property
-    def azimuth(self):
-        """ Azimuth view angle """
-        return self._get_view().cameraParams()['azimuth']
-
-    @azimuth.setter
-    def azimuth(self, value):
-        self._camera_params['azimuth'] = value
-
-    @property
-    def elevation(self):
-        """ Elevation view angle """
-        return self._get_view().cameraParams()['elevation']
-
-    @elevation.setter
-    def elevation(self, value):
-        self._camera_params['elevation'] = value
-
-    @property
-    def distance(self):
-        """ View distance """
-        return self._get_view().cameraParams()['distance']
-
-    @distance.setter
-    def distance(self, value):
-        self._camera_params['distance'] = value
-
-    @property
-    def aspect_ratio(self):
-        """ Axes and data scaling aspect ratio
-        
-        Either a string or a tuple/list.
-
-        - `'auto'`: `(1.0, 1.0, 0.8)`
-        - `'flat'`: `(1.0, 1.0, 0.6)`
-        - `'cube'`: `(1.0, 1.0, 1.0)`
-        - `'equal'`: No scaling, respect data aspect ratio
-        - `tuple` with three floats
-        """
-        return self._aspect_ratio
-    
-    @aspect_ratio.setter
-    def aspect_ratio(self, ratio='auto'):
-        """ Set aspect ratio of the 3D axis """
-        self._aspect_ratio = ratio
-
-    @property
-    def projection(self):
-        """ Projection method, can be either 'perspective' or 'orthographic' """
-        return self._projection_method
-    
-    @projection.setter
-    def projection(self, projection_method='perspective'):
-        self._projection_method = projection_method
-
-    @property
-    def label_fmt(self):
-        """ Number format of the labels, default: '.1f' """
-        return self._label_fmt
-    
-    @label_fmt.setter
-    def label_fmt(self, fmt: str):
-        self._label_fmt = fmt
 
-    @property
-    def xlim(self):
-        """Custom x-axis limits"""
-        return self._lim['x']
-    
-    @xlim.setter
-    def xlim(self, xlim: list):
-        self._lim['x'] = xlim
+AXES3D_NAMES = ('Axis3D', 'Axis3DItem', 'ViewNotDefinedError', 'InvalidTicks')
 
-    @property
-    def ylim(self):
-        """Custom y-axis limits"""
-        return self._lim['y']
-    
-    @ylim.setter
-    def ylim(self, ylim: list):
-        self._lim['y'] = ylim
-
-    @property
-    def zlim(self):
-        """Custom z-axis limits"""
-        return self._lim['z']
-    
-    @zlim.setter
-    def zlim(self, zlim: list):
-        self._lim['z'] = zlim
 
-    @staticmethod
-    def _check_ticks(no_ticks):
-        if no_ticks > 1:
-            return no_ticks
-        raise InvalidTicks(
-            f'No. of ticks should be larger than 1, received: {no_ticks}'
-        )
-
-    @property
-    def xticks(self):
-        """ Approximate number of x-axis ticks
-
-        Should be 2 or larger.
-        """
-        return self._max_no_ticks['x']
-
-    @xticks.setter
-    def xticks(self, no_ticks: int):
-        self._max_no_ticks['x'] = self._check_ticks(no_ticks)
-
-    @property
-    def yticks(self):
-        """ Approximate number of y-axis ticks
-
-        Should be 2 or larger.
-        """
-        return self._max_no_ticks['y']
-
-    @yticks.setter
-    def yticks(self, no_ticks: int):
-        self._max_no_ticks['y'] = self._check_ticks(no_ticks)
-
-    @property
-    def zticks(self):
-        """ Approximate number of z-axis ticks
-
-        Should be 2 or larger.
-        """
-        return self._max_no_ticks['z']
-
-    @zticks.setter
-    def zticks(self, no_ticks: int):
-        self._max_no_ticks['z'] = self._check_ticks(no_ticks)
-
-    def export(self, filename):
-        """ Exports the current view to an image file """
-        self._get_view().grabFramebuffer().save(filename)
-
-    def delete(self):
-        """ Closes the axis """
+def __getattr__(name):
+    """ Lazily provide the 3D axis classes of the axes3d module """
+    if name in AXES3D_NAMES:
+        from mlpyqtgraph import axes3d
+        return getattr(axes3d, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 class Axis:
@@ -646,5 +352,6 @@ class Axis:
         if axis_type == '2D':
             return Axis2D(*args, **kwargs)
         if axis_type == '3D':
+            from mlpyqtgraph.axes3d import Axis3D
             return Axis3D(*args, **kwargs)
         raise InvalidAxis(f'Invalid Axis Type: {axis_type}. Should be either 2D or 3D')
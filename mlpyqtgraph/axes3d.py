@@ -0,0 +1,780 @@
+""" mlpyqtgraph 3D axis module, imported once the first 3D axis is created """
+
+
+import contextlib
+from dataclasses import dataclass, field
+from pyqtgraph import QtCore, QtGui
+from pyqtgraph.opengl import GLLinePlotItem, GLViewWidget
+from pyqtgraph.opengl.GLGraphicsItem import GLGraphicsItem
+import numpy as np
+
+from mlpyqtgraph.config import options
+from mlpyqtgraph.calls import CallTarget
+from mlpyqtgraph.buffers import ReusableBuffer, copy_counter
+from mlpyqtgraph.grid_axes import GLGridAxisItem
+from mlpyqtgraph.utils.ticklabels import (
+    coord_generator, coord_transformers, limit_generator
+)
+from mlpyqtgraph.utils.GLSurfacePlotItem import GLSurfacePlotItem
+from mlpyqtgraph.utils.GLPointsItem import GLPointsItem
+from mlpyqtgraph.utils.GLLineStripItem import GLLineStripItem
+
+
+def coord_bounds(coord_kwargs: dict) -> dict:
+    """
+    Minimum and maximum of each coordinate, ignoring NaN values, or None for
+    coordinates without any finite values
+    """
+    bounds = {}
+    for key, values in coord_kwargs.items():
+        values = np.asarray(values).reshape(-1)
+        if values.size == 0:
+            bounds[key] = None
+            continue
+        # fmin/fmax skip NaN without the copy and warnings of nanmin/nanmax
+        low, high = np.fmin.reduce(values), np.fmax.reduce(values)
+        bounds[key] = None if np.isnan(low) else np.array([low, high])
+    return bounds
+
+
+def check_point_count(count, **attributes):
+    """
+    Raises a ValueError unless each of the attributes per point, which are
+    skipped if None or a single value, has a value for each of count points
+    """
+    for name, values in attributes.items():
+        if np.ndim(values) > 0 and len(values) != count:
+            raise ValueError(
+                f'{name} has {len(values)} values for {count} points'
+            )
+
+
+@dataclass
+class Axis3DItem:
+    instance: (
+        GLSurfacePlotItem | GLLinePlotItem | GLPointsItem | GLLineStripItem
+    )
+    data: tuple
+    options: dict
+    buffer: ReusableBuffer = field(default_factory=ReusableBuffer)
+    anchor: np.ndarray | None = None
+    bounds: dict | None = None
+    dirty: bool = True
+
+
+class ViewNotDefinedError(Exception):
+    """ Raised if view is not defined yet """
+
+
+class InvalidTicks(Exception):
+    """ Raised for invalid no. of ticks entries """
+
+
+class Axis3DItems:
+    """
+    Axis3D mixin, which adds the plot items of the axis, and updates and
+    removes them through their Axis3DItem
+    """
+
+    def surf(self, *args, **kwargs):
+        """ Adds a 3D surface plot item to the view widget  """
+        self.add_surface(*args, **kwargs)
+
+    def add_surface(self, *args, **kwargs) -> Axis3DItem:
+        """ Adds a 3D surface plot item and returns its item """
+        kwargs = dict(self.default_surface_options, **kwargs)
+        surface = GLSurfacePlotItem(**kwargs)
+        self._add_item(surface, *args, **kwargs)
+        self.update()
+        return self._items[-1]
+
+    def set_surface_z(self, item: Axis3DItem, z):
+        """
+        Replaces the heights of a surface item. If the axis ticks don't change,
+        only the z coordinates and colors of the surface are updated, otherwise
+        the whole axis is updated. Raises a ValueError, before changing the
+        item, if the shape of z differs from the current heights.
+        """
+        z = np.asarray(z)
+        x, y, current_z = item.data
+        if z.shape != np.shape(current_z):
+            raise ValueError(
+                f'z shape {z.shape} must match the current shape '
+                f'{np.shape(current_z)}'
+            )
+        item.data = (x, y, z)
+        item.bounds = dict(item.bounds, **coord_bounds({'z': z}))
+        layout = self._current_layout()
+        if self._update_scheduled or not self._same_layout(layout):
+            item.dirty = True
+            self.update()
+            return
+        ticks, aspect_coords = layout
+        if aspect_coords:
+            transformer = dict(coord_transformers(ticks, aspect_coords))['z']
+            z = transformer(z)
+        # the colormap is applied on the GPU, the color limits are unchanged
+        item.instance.set_z(z)
+
+    def line(self, *args, **kwargs):
+        """ Plots a single grid line for given coordinates """
+        self.add_line(*args, **kwargs)
+
+    def add_line(self, x, y, z, tail=None, **kwargs) -> Axis3DItem:
+        """
+        Plots a line to which vertices can be appended and returns its item.
+        If tail is given, only the last tail vertices are kept. Lines with
+        options of GLLinePlotItem only, such as colors per vertex or mode
+        'lines', are drawn by a GLLinePlotItem, which can't be appended to.
+        """
+        kwargs = dict(self.default_line_options, **kwargs)
+        if not GLLineStripItem.supports(kwargs):
+            if tail is not None or 'colormap' in kwargs or 'clim' in kwargs:
+                raise ValueError(
+                    'tail and colormap need a line strip with a single color'
+                )
+            line = GLLinePlotItem(**kwargs)
+            self._add_item(line, x, y, z, **kwargs)
+            self.update()
+            return self._items[-1]
+        kwargs.pop('mode', None)
+        line = GLLineStripItem(tail=tail, **kwargs)
+        self._add_item(line, **kwargs)
+        item = self._items[-1]
+        self.append_vertices(item, x, y, z)
+        return item
+
+    def set_vertices(self, item: Axis3DItem, x, y, z):
+        """ Replaces all vertices of a line item """
+        item.instance.setData(pos=np.empty((0, 3)))
+        item.anchor = item.bounds = None
+        self.append_vertices(item, x, y, z)
+
+    def append_vertices(self, item: Axis3DItem, x, y, z):
+        """
+        Appends vertices to a line item. The vertices are stored relative to
+        the line's first vertex, such that only the new vertices are uploaded,
+        while changing axis limits only changes the item's transform.
+        """
+        if not isinstance(item.instance, GLLineStripItem):
+            raise TypeError('Only lines with a single color and mode '
+                            "'line_strip' can be appended to")
+        points = np.column_stack(np.broadcast_arrays(
+            np.atleast_1d(x), np.atleast_1d(y), np.atleast_1d(z)
+        )).astype(np.float64)
+        if len(points) == 0:
+            return
+        if item.anchor is None:
+            item.anchor = points[0].copy()
+        item.instance.append(points - item.anchor)
+        if item.instance.tail is not None:
+            vertices = item.instance.pos
+            mins = np.fmin.reduce(vertices, axis=0) + item.anchor
+            maxs = np.fmax.reduce(vertices, axis=0) + item.anchor
+        else:
+            mins = np.fmin.reduce(points, axis=0)
+            maxs = np.fmax.reduce(points, axis=0)
+            if item.bounds is not None:
+                mins = np.fmin(mins, [item.bounds[k][0] for k in 'xyz'])
+                maxs = np.fmax(maxs, [item.bounds[k][1] for k in 'xyz'])
+        item.bounds = {
+            key: np.array([low, high])
+            for key, low, high in zip('xyz', mins, maxs)
+        }
+        item.dirty = True
+        self.update()
+
+    def points(self, *args, **kwargs):
+        """ Plots a set of points for given coordinates """
+        self.add_points(*args, **kwargs)
+
+    def add_points(self, *args, c=None, s=None, **kwargs) -> Axis3DItem:
+        """
+        Plots a set of points and returns its item. The points are colored by
+        the values c, with the viridis colormap unless colormap is given, and
+        have the sizes s in pixels.
+        """
+        kwargs = dict(self.default_points_options, **kwargs)
+        color = kwargs['color']
+        check_point_count(
+            np.size(args[-1]) if args else 0, c=c, s=s,
+            color=color if np.ndim(color) == 2 else None,
+        )
+        if c is not None:
+            kwargs['scalars'] = c
+            kwargs.setdefault('colormap', 'viridis')
+        if s is not None and np.ndim(s) == 0:
+            kwargs['size'] = s
+        elif s is not None:
+            kwargs['sizes'] = s
+        points = GLPointsItem(**kwargs)
+        self._add_item(points, *args, **kwargs)
+        self.update()
+        return self._items[-1]
+
+    def set_item_data(self, item: Axis3DItem, *data, c=None, s=None):
+        """
+        Replaces the coordinates of an item, and the values c and sizes s of
+        points. Unless the axis ticks change, only this item is transformed
+        and uploaded again.
+        """
+        if isinstance(item.instance, GLLineStripItem):
+            self.set_vertices(item, *data)
+            return
+        if isinstance(item.instance, GLPointsItem):
+            self._set_point_attributes(item, np.size(data[-1]), c, s)
+        item.data = data
+        item.bounds = coord_bounds(dict(zip('xyz', data)))
+        item.dirty = True
+        self.update()
+
+    def _set_point_attributes(self, item: Axis3DItem, count, c, s):
+        """
+        Replaces the values and sizes of count points, which must be given
+        for each point that has individual values or sizes
+        """
+        points = item.instance
+        check_point_count(count, c=c, s=s)
+        if isinstance(points.color, np.ndarray) and len(points.color) != count:
+            raise ValueError(
+                f'Points with individual colors need {len(points.color)} '
+                f'points'
+            )
+        for name, key, values in (('c', 'scalars', c), ('s', 'sizes', s)):
+            if values is None:
+                current = getattr(points, key)
+                if current is not None and len(current) != count:
+                    raise ValueError(
+                        f'Points with individual {key} need {name} for '
+                        f'{count} points'
+                    )
+            elif np.ndim(values) == 0 and key == 'sizes':
+                points.setData(size=values, sizes=None)
+            else:
+                item.options[key] = values
+                points.setData(**{key: values})
+
+    def set_item_colormap(self, item: Axis3DItem, colormap, clim=None):
+        """
+        Changes the colormap and color limits of an item, which are applied on
+        the GPU, such that the item's vertices are left untouched
+        """
+        item.options.update(colormap=colormap, clim=clim)
+        if colormap is not None:
+            shared_limits = self._resolve_limits(self._aggregate_limits())
+            clim = self._item_clim(item, shared_limits)
+        item.instance.setData(colormap=colormap, clim=clim)
+
+    def remove_item(self, item: Axis3DItem):
+        """ Removes an item from the axis """
+        self._items.remove(item)
+        self._get_view().removeItem(item.instance)
+        self.update()
+
+    def _add_item(self, item: GLSurfacePlotItem | GLLinePlotItem
+                  | GLPointsItem | GLLineStripItem, *data, **options):
+        bounds = coord_bounds(dict(zip('xyz', data))) if data else None
+        self._items.append(Axis3DItem(item, data, options, bounds=bounds))
+        self._get_view().addItem(item)
+
+
+class Axis3D(GLGraphicsItem, Axis3DItems, CallTarget):
+    """ 3D axis """
+    cached_attributes = ('azimuth', 'elevation', 'distance', 'aspect_ratio',
+                         'projection', 'label_fmt', 'xlim', 'ylim', 'zlim',
+                         'xticks', 'yticks', 'zticks')
+
+    aspect_ratios = {
+        'auto': (1.0, 1.0, 0.8),
+        'flat': (1.0, 1.0, 0.6),
+        'cube': (1.0, 1.0, 1.0),
+    }
+
+    def __init__(self, index, parentItem=None, **kwargs):
+        super().__init__(parentItem=parentItem)
+        antialiasing = options.get_option('antialiasing')
+        self.index = index
+        self.grid_axes = GLGridAxisItem(
+            parentItem=self, line_antialias=antialiasing
+        )
+        self.default_surface_options = {
+            'color': (0, 0, 0, 1),
+            'showGrid': True,
+            'lineAntialias': antialiasing,
+            'colormap': options.get_option('colormap'),
+        }
+        self.default_line_options = {
+            'color': (0, 0, 0, 1),
+            'antialias': antialiasing,
+            'width': 1,
+        }
+        self.default_points_options = {
+            'color': (0, 0, 0, 1),
+            'size': 5.0,
+        }
+        self._items: list[Axis3DItem] = []
+        self._aspect_ratio = 'auto'
+        self._projection_method = options.get_option('projection')
+        self._label_fmt = '.2g'
+        self._lim = { c: [] for c in 'xyz' }
+        self._max_no_ticks = { c: 6 for c in 'xyz' }
+        self._camera_params = {}
+        self._update_scheduled = False
+        self._update_error = None
+        self._layout = None
+        self._grid_label_fmt = None
+
+    def update(self, immediate=False):
+        """
+        Schedules an update of the limits, item coordinates, grid and camera,
+        which is performed once for all updates requested before the next
+        frame. With immediate, the update is performed right away.
+
+        Raises the error of a scheduled update, which failed since the last
+        call, after scheduling the update.
+        """
+        error = self._take_update_error()
+        if immediate:
+            self._update_scheduled = False
+            self._update_now()
+        elif not self._update_scheduled:
+            self._schedule_update()
+        if error is not None:
+            raise error
+
+    def flush_update(self):
+        """
+        Performs a scheduled update right away, and raises the error of a
+        scheduled update, which failed since the last call
+        """
+        error = self._take_update_error()
+        if self._update_scheduled:
+            self._update_scheduled = False
+            self._update_now()
+        if error is not None:
+            raise error
+
+    def _schedule_update(self):
+        self._update_scheduled = True
+        QtCore.QTimer.singleShot(0, self._scheduled_update)
+
+    def _scheduled_update(self):
+        """
+        Timer slot performing a scheduled update, whose error is kept for the
+        next call to update or flush_update, as it can't reach the caller here
+        """
+        if not self._update_scheduled:
+            return
+        self._update_scheduled = False
+        try:
+            self._update_now()
+        except Exception as err:
+            self._update_error = err
+
+    def _take_update_error(self):
+        """
+        Returns and clears the error of a failed scheduled update, in which
+        case the half-updated items and grid are scheduled to be updated from
+        scratch
+        """
+        error, self._update_error = self._update_error, None
+        if error is not None:
+            self._layout = None
+            self._grid_label_fmt = None
+            for item in self._items:
+                item.dirty = True
+            self._schedule_update()
+        return error
+
+    def _update_now(self):
+        if not self._items:
+            super().update()
+            return
+        shared_limits = self._resolve_limits(self._aggregate_limits())
+        if any(limit is None for key in 'xyz' for limit in shared_limits[key]):
+            super().update()
+            return
+        layout = self._current_layout(shared_limits)
+        # items only need to be transformed again if the ticks or aspect
+        # ratio changed, or if their data changed
+        relayout = not self._same_layout(layout)
+        for item in self._items:
+            if relayout or item.dirty:
+                self._update_item(item, shared_limits)
+        self._layout = layout
+        if relayout or self._grid_label_fmt != self._label_fmt:
+            coords, coords_labels, limits = self._grid_data(*layout)
+            self.grid_axes.setData(
+                coords=coords, coords_labels=coords_labels, limits=limits
+            )
+            self._grid_label_fmt = self._label_fmt
+        # Set FOV based on projection method, distance is set by best_camera()
+        field_of_view = 60 if self._projection_method == 'perspective' else 1
+        self._get_view().setCameraParams(fov=field_of_view)
+        self._get_view().setCameraPosition(
+            **self.grid_axes.best_camera(method=self._projection_method)
+        )
+        self._get_view().setCameraParams(**self._camera_params)
+        self.publish_camera()
+        super().update()
+
+    def _update_item(self, item: Axis3DItem, shared_limits):
+        """ Transforms the coordinates of an item and hands them over """
+        item.dirty = False
+        plot_item = item.instance
+        coord_kwargs = dict(zip('xyz', item.data))
+        colormap_kwargs = {}
+        if item.options.get('colormap'):
+            colormap_kwargs['clim'] = self._item_clim(item, shared_limits)
+        if isinstance(plot_item, GLLineStripItem):
+            if item.bounds is not None:
+                plot_item.setTransform(
+                    self._anchored_transform(item, shared_limits)
+                )
+                plot_item.setData(**colormap_kwargs)
+        elif isinstance(plot_item, GLSurfacePlotItem):
+            self._transform_coordinates(coord_kwargs, limits=shared_limits)
+            plot_item.setData(**coord_kwargs, **colormap_kwargs)
+        elif isinstance(plot_item, GLLinePlotItem | GLPointsItem):
+            # transform straight into the item's reusable float32 buffer
+            points = item.buffer.get((len(item.data[0]), 3))
+            self._transform_coordinates(
+                coord_kwargs, limits=shared_limits, out=points
+            )
+            copy_counter.record(type(plot_item).__name__, points.nbytes)
+            plot_item.setData(pos=points, **colormap_kwargs)
+
+    def _item_clim(self, item: Axis3DItem, shared_limits):
+        """
+        The color limits of a colormapped item in the coordinates of its
+        vertices, or None for the range of its z coordinates
+        """
+        clim = item.options.get('clim')
+        if isinstance(item.instance, GLLineStripItem):
+            # the cached bounds avoid a pass over all vertices per append
+            if item.bounds is None:
+                return None
+            if clim is None:
+                clim = item.bounds['z']
+            if np.isnan(clim).any():
+                return None
+            return np.asarray(clim, dtype=float) - item.anchor[2]
+        if clim is None or item.options.get('scalars') is not None:
+            # the limits of values are independent of the axis limits
+            return clim
+        if aspect_coords := self._aspect_coords():
+            ticks = self._shared_ticks(shared_limits)
+            transformer = dict(coord_transformers(ticks, aspect_coords))['z']
+            return transformer(np.asarray(clim, dtype=float))
+        return clim
+
+    def _current_layout(self, shared_limits=None):
+        """
+        The ticks and aspect ratio coordinates, which determine the grid and
+        the transformation of the coordinates of all items
+        """
+        if shared_limits is None:
+            shared_limits = self._resolve_limits(self._aggregate_limits())
+        return self._shared_ticks(shared_limits), self._aspect_coords()
+
+    def _same_layout(self, layout) -> bool:
+        """ Whether layout equals the layout of the last update """
+        if self._layout is None:
+            return False
+        (ticks, aspect_coords), (old_ticks, old_aspect) = layout, self._layout
+        return aspect_coords == old_aspect and all(
+            np.array_equal(ticks[key], old_ticks[key]) for key in 'xyz'
+        )
+
+    def _grid_data(self, ticks, aspect_coords):
+        """ Grid coordinates, string labels and limits for the ticks """
+        if aspect_coords:
+            transformers = coord_transformers(ticks, aspect_coords)
+            coords = {key: func(ticks[key]) for key, func in transformers}
+        else:
+            coords = ticks
+        limits = dict(limit_generator(limit_ratio=0.05, **coords))
+        coords_str_labels = dict(self._gen_str_labels(ticks))
+        return coords, coords_str_labels, limits
+
+    def paint(self):
+        super().paint()
+        self.publish_camera()
+
+    def publish_camera(self):
+        """ Publish the camera parameters to the attribute cache """
+        if self.view():
+            self.publish('azimuth', 'elevation', 'distance')
+
+    def _aggregate_limits(self) -> dict | None:
+        """Aggregate the cached min/max bounds of all items per axis."""
+        if not self._items:
+            return None
+        mins: dict[str, float | None] = {key: None for key in 'xyz'}
+        maxs: dict[str, float | None] = {key: None for key in 'xyz'}
+        for item in self._items:
+            for key, bounds in (item.bounds or {}).items():
+                if bounds is None or np.isnan(bounds[0]):
+                    continue
+                low, high = float(bounds[0]), float(bounds[1])
+                mins[key] = low if mins[key] is None else min(mins[key], low)
+                maxs[key] = high if maxs[key] is None else max(maxs[key], high)
+        return {key: [mins[key], maxs[key]] for key in 'xyz'}
+
+    def _resolve_limits(self, aggregated_limits: dict | None) -> dict:
+        """Resolve final limits from custom limits and aggregated bounds."""
+        if aggregated_limits is None:
+            return self._lim
+        resolved = {}
+        for key in 'xyz':
+            user_limits = self._lim.get(key, [])
+            agg_min, agg_max = aggregated_limits[key]
+            min_limit = user_limits[0] if len(user_limits) > 0 else None
+            max_limit = user_limits[1] if len(user_limits) > 1 else None
+            if min_limit is None:
+                min_limit = agg_min
+            if max_limit is None:
+                max_limit = agg_max
+            if min_limit is not None and min_limit == max_limit:
+                # a single value has no span to place ticks in
+                padding = abs(min_limit)/2 or 0.5
+                min_limit, max_limit = min_limit - padding, max_limit + padding
+            resolved[key] = [min_limit, max_limit]
+        return resolved
+
+    def _get_view(self) -> GLViewWidget:
+        if view := self.view():
+            return view
+        raise ViewNotDefinedError('Axis3D doesn\'t have a view!')
+
+    def _aspect_coords(self):
+        """ Returns the aspect ratio coordinates """
+        if self._aspect_ratio == 'equal':
+            return False
+        elif isinstance(self._aspect_ratio, str):
+            ratios = self.aspect_ratios.get(self._aspect_ratio, (1.0, 1.0, 0.8))
+        elif isinstance(self._aspect_ratio, tuple | list):
+            ratios = self.aspect_ratio
+        else:
+            raise ValueError()
+        return {label: (0.0, ratio) for label, ratio in zip('xyz', ratios)}
+
+    def _tick_coords(self, coord_kwargs, limits=None):
+        """ Returns the tick coordinates for the given coordinates """
+        return dict(coord_generator(
+            coord_kwargs,
+            max_no_ticks=self._max_no_ticks,
+            limits=limits if limits is not None else self._lim
+        ))
+
+    def _shared_ticks(self, shared_limits):
+        """
+        Tick coordinates of the resolved limits, which determine the grid and
+        the transformation of the coordinates of all items
+        """
+        return self._tick_coords(shared_limits, shared_limits)
+
+    def _anchored_transform(self, item: Axis3DItem, limits=None):
+        """
+        Returns the transform of an item whose vertices are stored relative to
+        its anchor, equivalent to transforming the absolute coordinates
+        """
+        transform = QtGui.QMatrix4x4()
+        if aspect_coords := self._aspect_coords():
+            coords_labels = self._tick_coords(dict(item.bounds), limits)
+            transformers = dict(
+                coord_transformers(coords_labels, aspect_coords)
+            )
+            transform.translate(*(
+                float(transformers[key](anchor))
+                for key, anchor in zip('xyz', item.anchor)
+            ))
+            transform.scale(*(transformers[key].scale for key in 'xyz'))
+        else:
+            transform.translate(*(float(anchor) for anchor in item.anchor))
+        return transform
+
+    def _transform_coordinates(self, coord_kwargs, limits=None, out=None):
+        """ Transforms the given coordinates according to fixed coords
+
+        If out is given, the transformed coordinates are written into the
+        columns of out instead of replacing the values in coord_kwargs.
+        """
+        coords_labels = self._tick_coords(coord_kwargs, limits)
+        if aspect_coords := self._aspect_coords():
+            transformers = coord_transformers(coords_labels, aspect_coords)
+            for column, (key, transformer) in enumerate(transformers):
+                if out is None:
+                    coord_kwargs[key] = transformer(coord_kwargs[key])
+                else:
+                    transformer(coord_kwargs[key], out=out[:, column])
+        elif out is not None:
+            for column, values in enumerate(coord_kwargs.values()):
+                out[:, column] = values
+        return self._grid_data(coords_labels, aspect_coords)
+
+    def _gen_str_labels(self, coords):
+        for key, value in coords.items():
+            yield key, [f'{x:{self._label_fmt}}' for x in value]
+
+    @property
+    def azimuth(self):
+        """ Azimuth view angle """
+        return self._get_view().cameraParams()['azimuth']
+
+    @azimuth.setter
+    def azimuth(self, value):
+        self._camera_params['azimuth'] = value
+
+    @property
+    def elevation(self):
+        """ Elevation view angle """
+        return self._get_view().cameraParams()['elevation']
+
+    @elevation.setter
+    def elevation(self, value):
+        self._camera_params['elevation'] = value
+
+    @property
+    def distance(self):
+        """ View distance """
+        return self._get_view().cameraParams()['distance']
+
+    @distance.setter
+    def distance(self, value):
+        self._camera_params['distance'] = value
+
+    @property
+    def aspect_ratio(self):
+        """ Axes and data scaling aspect ratio
+        
+        Either a string or a tuple/list.
+
+        - `'auto'`: `(1.0, 1.0, 0.8)`
+        - `'flat'`: `(1.0, 1.0, 0.6)`
+        - `'cube'`: `(1.0, 1.0, 1.0)`
+        - `'equal'`: No scaling, respect data aspect ratio
+        - `tuple` with three floats
+        """
+        return self._aspect_ratio
+    
+    @aspect_ratio.setter
+    def aspect_ratio(self, ratio='auto'):
+        """ Set aspect ratio of the 3D axis """
+        self._aspect_ratio = ratio
+
+    @property
+    def projection(self):
+        """ Projection method, can be either 'perspective' or 'orthographic' """
+        return self._projection_method
+    
+    @projection.setter
+    def projection(self, projection_method='perspective'):
+        self._projection_method = projection_method
+
+    @property
+    def label_fmt(self):
+        """ Number format of the labels, default: '.1f' """
+        return self._label_fmt
+    
+    @label_fmt.setter
+    def label_fmt(self, fmt: str):
+        self._label_fmt = fmt
+
+    @property
+    def xlim(self):
+        """Custom x-axis limits"""
+        return self._lim['x']
+    
+    @xlim.setter
+    def xlim(self, xlim: list):
+        self._lim['x'] = xlim
+
+    @property
+    def ylim(self):
+        """Custom y-axis limits"""
+        return self._lim['y']
+    
+    @ylim.setter
+    def ylim(self, ylim: list):
+        self._lim['y'] = ylim
+
+    @property
+    def zlim(self):
+        """Custom z-axis limits"""
+        return self._lim['z']
+    
+    @zlim.setter
+    def zlim(self, zlim: list):
+        self._lim['z'] = zlim
+
+    @staticmethod
+    def _check_ticks(no_ticks):
+        if no_ticks > 1:
+            return no_ticks
+        raise InvalidTicks(
+            f'No. of ticks should be larger than 1, received: {no_ticks}'
+        )
+
+    @property
+    def xticks(self):
+        """ Approximate number of x-axis ticks
+
+        Should be 2 or larger.
+        """
+        return self._max_no_ticks['x']
+
+    @xticks.setter
+    def xticks(self, no_ticks: int):
+        self._max_no_ticks['x'] = self._check_ticks(no_ticks)
+
+    @property
+    def yticks(self):
+        """ Approximate number of y-axis ticks
+
+        Should be 2 or larger.
+        """
+        return self._max_no_ticks['y']
+
+    @yticks.setter
+    def yticks(self, no_ticks: int):
+        self._max_no_ticks['y'] = self._check_ticks(no_ticks)
+
+    @property
+    def zticks(self):
+        """ Approximate number of z-axis ticks
+
+        Should be 2 or larger.
+        """
+        return self._max_no_ticks['z']
+
+    @zticks.setter
+    def zticks(self, no_ticks: int):
+        self._max_no_ticks['z'] = self._check_ticks(no_ticks)
+
+    def export(self, filename):
+        """ Exports the current view to an image file """
+        self.flush_update()
+        with self.full_detail():
+            self._get_view().grabFramebuffer().save(filename)
+
+    @contextlib.contextmanager
+    def full_detail(self):
+        """
+        Context in which surfaces and points are drawn at full resolution,
+        regardless of their level of detail setting, such as for exports
+        """
+        instances = [
+            item.instance for item in self._items
+            if isinstance(item.instance, GLSurfacePlotItem | GLPointsItem)
+        ]
+        for instance in instances:
+            instance.lodSuspended = True
+        try:
+            yield
+        finally:
+            for instance in instances:
+                instance.lodSuspended = False
+
+    def delete(self):
+        """ Closes the axis """
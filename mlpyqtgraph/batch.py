@@ -0,0 +1,88 @@
+"""
+Parallel export of independent figures, using a pool of processes which each
+run a headless plotter
+"""
+
+import os
+import time
+import traceback
+import multiprocessing
+from collections.abc import Callable, Iterable, Iterator
+from concurrent import futures
+from typing import Any, NamedTuple
+
+from mlpyqtgraph.config import options
+
+
+class RenderJob(NamedTuple):
+    """
+    Plotting function, which is called without arguments by default, and the
+    image file to save its current figure to
+    """
+    function: Callable
+    filename: str
+    args: tuple = ()
+    kwargs: dict | None = None
+    dpi: float | None = None
+
+
+class RenderResult(NamedTuple):
+    """ Outcome of a render job, with the job's index in the batch """
+    index: int
+    filename: str
+    duration: float
+    result: Any = None
+    error: str | None = None
+
+
+def init_renderer(config_options):
+    """ Initializes a pool process as headless renderer """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    options.set_options(**config_options)
+
+
+def render_job(index, job: RenderJob) -> RenderResult:
+    """ Runs a render job in a headless plotter and saves its figure """
+    import mlpyqtgraph as mpg  # the package imports this module
+
+    def plot():
+        result = job.function(*job.args, **(job.kwargs or {}))
+        mpg.savefig(job.filename, dpi=job.dpi)
+        return result
+
+    start = time.perf_counter()
+    try:
+        result = mpg.plotter(plot)()
+    except Exception as err:
+        message = ''.join(traceback.format_exception(err))
+        return RenderResult(
+            index, job.filename, time.perf_counter() - start, error=message
+        )
+    duration = time.perf_counter() - start
+    return RenderResult(index, job.filename, duration, result)
+
+
+def render_batch(
+    jobs: Iterable[RenderJob | tuple], workers: int | None = None
+) -> Iterator[RenderResult]:
+    """
+    Renders the jobs in a pool of worker processes, yielding their results as
+    soon as they finish. Failing jobs yield a result with the error's traceback
+    instead of raising. Job functions need to be picklable.
+    """
+    jobs = [RenderJob(*job) for job in jobs]
+    config_options = dict(
+        options.config_options, headless=True, backend='thread'
+    )
+    with futures.ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_renderer,
+        initargs=(config_options,),
+    ) as executor:
+        pending = [
+            executor.submit(render_job, index, job)
+            for index, job in enumerate(jobs)
+        ]
+        for future in futures.as_completed(pending):
+            yield future.result()
@@ -0,0 +1,216 @@
+"""
+Reusable array buffers and bookkeeping of the array data copied on the GUI
+thread
+"""
+
+import math
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+
+class CopyCounter:
+    """ Thread-safe counter of calls and copied bytes per call name """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: [0, 0])
+
+    def record(self, name: str, nbytes: int = 0):
+        """ Register a call, which copied nbytes of array data """
+        with self._lock:
+            count = self._counts[name]
+            count[0] += 1
+            count[1] += int(nbytes)
+
+    def stats(self) -> dict:
+        """ Returns the number of calls and copied bytes per call name """
+        with self._lock:
+            return {
+                name: {'calls': calls, 'bytes': nbytes}
+                for name, (calls, nbytes) in self._counts.items()
+            }
+
+    def reset(self):
+        """ Reset all counters """
+        with self._lock:
+            self._counts.clear()
+
+
+copy_counter = CopyCounter()
+
+
+def as_float32(array, name: str | None = None) -> np.ndarray:
+    """
+    Returns array as C-contiguous float32 array, which is only copied if
+    required. If name is given, the call and copied bytes are recorded.
+    """
+    result = np.ascontiguousarray(array, dtype=np.float32)
+    if name is not None:
+        copied = not (
+            isinstance(array, np.ndarray) and np.shares_memory(result, array)
+        )
+        copy_counter.record(name, result.nbytes if copied else 0)
+    return result
+
+
+class ReusableBuffer:
+    """
+    Preallocated float32 buffer, which is handed out as C-contiguous view of
+    the requested shape and only reallocated if its capacity is exceeded.
+    Capacity grows geometrically.
+    """
+
+    def __init__(self, growth: float = 1.5):
+        self.growth = growth
+        self._array = np.empty(0, dtype=np.float32)
+
+    @property
+    def capacity(self) -> int:
+        """ Number of float32 elements that fit in the buffer """
+        return self._array.size
+
+    def get(self, shape: tuple) -> np.ndarray:
+        """ Returns a view of the buffer with the given shape """
+        size = math.prod(shape)
+        if size > self._array.size:
+            capacity = max(size, int(self._array.size*self.growth))
+            self._array = np.empty(capacity, dtype=np.float32)
+        return self._array[:size].reshape(shape)
+
+
+class GrowableBuffer:
+    """
+    Buffer to which rows can be appended, which is handed out as contiguous
+    view of all rows. Capacity grows geometrically, such that appending is
+    amortized proportional to the number of appended rows.
+    """
+
+    def __init__(self, row_shape: tuple = (), dtype=np.float64, growth=2.0):
+        self.growth = growth
+        self._array = np.empty((0, *row_shape), dtype=dtype)
+        self._owned = True
+        self.count = 0
+
+    @property
+    def capacity(self) -> int:
+        """ Number of rows that fit in the buffer """
+        return len(self._array)
+
+    @property
+    def array(self) -> np.ndarray:
+        """ Backing array, including the unused capacity """
+        return self._array
+
+    def append(self, values) -> tuple[slice, ...]:
+        """ Append rows and return the changed slices of the backing array """
+        return self.write(self.count, values)
+
+    def write(self, offset: int, values) -> tuple[slice, ...]:
+        """
+        Overwrite rows from offset onwards, appending the rows beyond the
+        current count, and return the changed slices of the backing array
+        """
+        if not 0 <= offset <= self.count:
+            raise IndexError(
+                f'offset {offset} is outside of the {self.count} rows'
+            )
+        values = np.asarray(values, dtype=self._array.dtype)
+        values = values.reshape(-1, *self._array.shape[1:])
+        start, stop = offset, offset + len(values)
+        if stop > self.capacity:
+            capacity = max(stop, int(self.capacity*self.growth))
+            shape = (capacity, *self._array.shape[1:])
+            array = np.empty(shape, dtype=self._array.dtype)
+            array[:self.count] = self._array[:self.count]
+            self._array = array
+        elif not self._owned:
+            self._array = self._array.copy()
+        self._owned = True
+        self._array[start:stop] = values
+        self.count = max(self.count, stop)
+        return (slice(start, stop),)
+
+    def assign(self, array: np.ndarray):
+        """
+        Replace all rows by the rows of array, which is used as backing array
+        without copying until rows are written
+        """
+        self._array = array.reshape(-1, *self._array.shape[1:])
+        self._owned = False
+        self.count = len(self._array)
+
+    def clear(self):
+        """ Remove all rows, but keep the capacity """
+        self.count = 0
+
+    def window(self) -> slice:
+        """ Slice of the backing array holding the rows """
+        return slice(0, self.count)
+
+    def view(self) -> np.ndarray:
+        """ Returns a view of all rows """
+        return self._array[self.window()]
+
+
+class RingBuffer:
+    """
+    Preallocated buffer holding the last capacity rows appended to it, which
+    are handed out as contiguous view without copying or reallocating
+
+    Each row is stored twice, at i and at i + capacity, such that the last
+    capacity rows are always contiguous in memory.
+    """
+
+    def __init__(self, capacity: int, row_shape: tuple = (), dtype=np.float64):
+        self._array = np.empty((2*capacity, *row_shape), dtype=dtype)
+        self._end = 0
+        self.count = 0
+
+    @property
+    def capacity(self) -> int:
+        """ Maximum number of rows """
+        return len(self._array) // 2
+
+    @property
+    def array(self) -> np.ndarray:
+        """ Backing array, with every row stored twice """
+        return self._array
+
+    def append(self, values) -> tuple[slice, ...]:
+        """
+        Append rows, dropping the oldest rows if capacity is exceeded, and
+        return the slices of the backing array that changed
+        """
+        values = np.asarray(values, dtype=self._array.dtype)
+        values = values.reshape(-1, *self._array.shape[1:])[-self.capacity:]
+        capacity, start = self.capacity, self._end
+        first = min(len(values), capacity - start)
+        rest = len(values) - first
+        changed = []
+        for offset in (0, capacity):
+            head = slice(offset + start, offset + start + first)
+            tail = slice(offset, offset + rest)
+            self._array[head] = values[:first]
+            self._array[tail] = values[first:]
+            changed.extend(
+                part for part in (head, tail) if part.stop > part.start
+            )
+        self._end = (start + len(values)) % capacity
+        self.count = min(self.count + len(values), capacity)
+        return tuple(changed)
+
+    def clear(self):
+        """ Remove all rows """
+        self._end = 0
+        self.count = 0
+
+    def window(self) -> slice:
+        """ Slice of the backing array holding the rows, oldest first """
+        stop = self._end + self.capacity
+        return slice(stop - self.count, stop)
+
+    def view(self) -> np.ndarray:
+        """ Returns a view of the last rows, from oldest to newest """
+        return self._array[self.window()]
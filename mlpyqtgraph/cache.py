@@ -0,0 +1,97 @@
+"""
+Cache of GUI item attribute values, which is shared between the GUI thread and
+the worker thread. The GUI thread publishes values whenever they change, such
+that the worker thread can read them without a round-trip.
+"""
+
+import threading
+from collections import Counter
+from copy import copy
+
+
+MISSING = object()
+
+
+def same_value(old, new):
+    """ Returns True if both values are known to be equal """
+    try:
+        return bool(old == new)
+    except ValueError:  # e.g. arrays with an ambiguous truth value
+        return False
+
+
+class AttributeCache:
+    """
+    Thread-safe cache of attribute values of a single GUI item
+
+    Only attributes listed in names are cached. The GUI item is responsible
+    for publishing every change of these attributes that is not caused by an
+    assignment from the worker thread.
+    """
+
+    def __init__(self, names):
+        self.names = frozenset(names)
+        self.generation = 0
+        self._values = {}
+        self._suspended = Counter()
+        self._lock = threading.Lock()
+
+    def __copy__(self):
+        """ The cache is shared between threads and never copied """
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        """
+        The cache can't be shared with another process, which receives an
+        empty cache that doesn't cache any attribute instead
+        """
+        return (AttributeCache, ((),))
+
+    def publish(self, values: dict):
+        """ Store new attribute values, called by the GUI thread """
+        with self._lock:
+            for name, value in values.items():
+                if self._suspended[name]:
+                    continue
+                old = self._values.get(name, MISSING)
+                if old is MISSING or not same_value(old, value):
+                    self._values[name] = value
+                    self.generation += 1
+
+    def lookup(self, name):
+        """ Returns a copy of the cached value, or MISSING, and generation """
+        with self._lock:
+            value = self._values.get(name, MISSING)
+            if value is not MISSING:
+                value = copy(value)
+            return value, self.generation
+
+    def fill(self, name, value, generation):
+        """
+        Store a value that was requested from the GUI thread, unless the GUI
+        thread published anything since generation was obtained
+        """
+        with self._lock:
+            if generation == self.generation and not self._suspended[name]:
+                self._values[name] = copy(value)
+
+    def invalidate(self, name):
+        """ Remove the cached value of an attribute """
+        with self._lock:
+            self._values.pop(name, None)
+
+    def suspend(self, name):
+        """ Invalidate and stop caching an attribute, while it is written """
+        with self._lock:
+            self._values.pop(name, None)
+            self._suspended[name] += 1
+
+    def resume(self, name):
+        """ Resume caching an attribute after it was written """
+        with self._lock:
+            self._suspended[name] -= 1
+            if self._suspended[name] <= 0:
+                del self._suspended[name]
@@ -0,0 +1,408 @@
+"""
+Bundling of worker thread attribute and method calls, such that several calls
+can be shipped to their GUI thread counterpart as a single message
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from pyqtgraph.Qt import QtCore
+from pqthreads import containers
+from pqthreads import descriptors
+from pqthreads import refs
+
+from mlpyqtgraph.config import options
+from mlpyqtgraph.cache import MISSING, AttributeCache
+from mlpyqtgraph.latency import CallTimes, call_stats, payload_size
+
+
+class Call(NamedTuple):
+    """ A single attribute assignment or method call on a GUI item """
+    kind: str
+    name: str
+    args: tuple = ()
+    kwargs: dict | None = None
+
+
+def apply_call(target, call: Call):
+    """ Apply a call to the given GUI item and return its result """
+    if call.kind == 'set':
+        setattr(target, call.name, *call.args)
+        return None
+    if call.kind == 'get':
+        return getattr(target, call.name)
+    if call.kind == 'call':
+        return getattr(target, call.name)(*call.args, **(call.kwargs or {}))
+    raise ValueError(f'Invalid call kind: {call.kind}')
+
+
+def call_name(agent_name, call: Call) -> str:
+    """ Name under which the call statistics of a call are recorded """
+    suffix = '=' if call.kind == 'set' else ''
+    return f'{agent_name}.{call.name}{suffix}'
+
+
+def record_call(agent_name, call: Call, times: CallTimes):
+    """ Record the timing and payload size of a call """
+    call_stats.record(
+        call_name(agent_name, call), times,
+        payload_size((call.args, call.kwargs)),
+    )
+
+
+class ItemContainer(containers.GUIItemContainer):
+    """
+    Container of GUI items, which looks items up by the index they were
+    created with, such that removing an item keeps the later items' indices
+    """
+
+    def get_item(self, index):
+        """ Returns the item with index """
+        try:
+            position = self.indices.index(index)
+        except ValueError as err:
+            raise containers.ItemException(
+                f'No {self.item_class.__name__} item with index {index}'
+            ) from err
+        return self.items[position]
+
+
+def gui_item(name, index):
+    """ Returns the item with index of the GUI container with name """
+    return refs.gui.get(name).get_item(index)
+
+
+@functools.cache
+def remote_members(cls, descriptor_class) -> frozenset:
+    """ Names of the class members that are instances of descriptor_class """
+    return frozenset(
+        name
+        for klass in cls.__mro__
+        for name, value in vars(klass).items()
+        if isinstance(value, descriptor_class)
+    )
+
+
+class CallTarget:
+    """ GUI item mixin, which applies calls sent by a CallDispatcher """
+    cached_attributes = ()
+    _attribute_cache = None
+
+    def apply_batch(self, calls):
+        """ Apply a list of calls in order """
+        for call in calls:
+            apply_call(self, Call(*call))
+
+    def timed_call(self, call):
+        """ Apply a call and return its result with start and finish time """
+        started = time.perf_counter()
+        result = apply_call(self, Call(*call))
+        return result, started, time.perf_counter()
+
+    @property
+    def attribute_cache(self):
+        """ Cache of the cached_attributes, shared with the worker thread """
+        if self._attribute_cache is None:
+            self._attribute_cache = AttributeCache(self.cached_attributes)
+        return self._attribute_cache
+
+    def publish(self, *names):
+        """ Publish the current values of cached attributes to the cache """
+        if self._attribute_cache is None:
+            return
+        values = {name: getattr(self, name) for name in names}
+        self._attribute_cache.publish(values)
+
+
+class CallDispatcher:
+    """
+    Worker item mixin, which is able to queue attribute assignments and method
+    calls and send them to the GUI thread in a single round-trip
+
+    Attributes listed in the `cached_attributes` of the GUI item are read from
+    an attribute cache, which is kept up to date by the GUI thread.
+
+    If the `call_stats` option is enabled, the timing of every call sent to
+    the GUI thread is recorded, see [`latency`](../latency), including the
+    creation and deletion of the GUI item.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._timed_operation('create', super().__init__, *args, **kwargs)
+
+    def close(self):
+        """ Deletes the GUI item """
+        self._timed_operation('delete', super().close)
+
+    def __setattr__(self, name, value):
+        if name not in self.remote_attributes():
+            super().__setattr__(name, value)
+            return
+        cache = self.__dict__.get('_attribute_cache')
+        calls = self.__dict__.get('_queued_calls')
+        if calls is not None:
+            if cache is not None:
+                cache.invalidate(name)
+            calls.append(Call('set', name, (value,)))
+        elif self.__dict__.get('_nonblocking'):
+            future = self._submit(Call('set', name, (value,)))
+            if cache is not None:
+                cache.suspend(name)
+                future.add_done_callback(lambda _: cache.resume(name))
+        else:
+            if cache is not None:
+                cache.invalidate(name)
+            if options.get_option('call_stats'):
+                self._timed_call(Call('set', name, (value,)))
+            else:
+                super().__setattr__(name, value)
+
+    def __getattribute__(self, name):
+        state = object.__getattribute__(self, '__dict__')
+        cls = type(self)
+        if name in remote_members(cls, descriptors.MethodDescriptor):
+            if (calls := state.get('_queued_calls')) is not None:
+                return functools.partial(queue_call, calls, name)
+            if state.get('_nonblocking'):
+                return functools.partial(self._submit_method, name)
+            if options.get_option('call_stats'):
+                return functools.partial(self._timed_method, name)
+        elif name in remote_members(cls, descriptors.AttributeDescriptor):
+            if calls := state.get('_queued_calls'):
+                self._send_calls(calls)
+            return self._read_attribute(name)
+        return super().__getattribute__(name)
+
+    @classmethod
+    def remote_attributes(cls):
+        """ Names of the attributes that live on the GUI thread """
+        return remote_members(cls, descriptors.AttributeDescriptor)
+
+    @contextmanager
+    def batch(self):
+        """
+        Queue all attribute assignments and method calls made inside the
+        context and apply them in order on the GUI thread, in one round-trip
+
+        Queued method calls return `None`. Reading an attribute inside the
+        context first sends the calls queued so far. If an exception is raised
+        inside the context, the queued calls are discarded. Nested batches are
+        merged into the outermost one.
+        """
+        if self.__dict__.get('_queued_calls') is not None:
+            yield self
+            return
+        calls = []
+        self.__dict__['_queued_calls'] = calls
+        try:
+            yield self
+        finally:
+            del self.__dict__['_queued_calls']
+        self._send_calls(calls)
+
+    @contextmanager
+    def nonblocking(self):
+        """
+        Inside the context, method calls and attribute assignments are sent to
+        the GUI thread without waiting for them to finish
+
+        Method calls return a `concurrent.futures.Future` holding the result.
+        Use [`flush`](../ml_functions/#mlpyqtgraph.ml_functions.flush) or
+        [`wait`](../ml_functions/#mlpyqtgraph.ml_functions.wait) to
+        synchronize with the GUI thread. Calls are applied in the order in
+        which they were made, including any blocking calls made in between.
+        """
+        previous = self.__dict__.get('_nonblocking', False)
+        self.__dict__['_nonblocking'] = True
+        try:
+            yield self
+        finally:
+            self.__dict__['_nonblocking'] = previous
+
+    def _read_attribute(self, name):
+        """ Read a GUI item attribute, from the attribute cache if possible """
+        cache = self.__dict__.get('_attribute_cache')
+        if cache is None:
+            cache = self.agent.request(self.index, 'attribute_cache')[0]
+            self.__dict__['_attribute_cache'] = cache
+        if name not in cache.names:
+            return self._request_attribute(name)
+        value, generation = cache.lookup(name)
+        if value is MISSING:
+            value = self._request_attribute(name)
+            cache.fill(name, value, generation)
+        return value
+
+    def _request_attribute(self, name):
+        """ Request a GUI item attribute from the GUI thread """
+        if options.get_option('call_stats'):
+            return self._timed_call(Call('get', name))
+        return super().__getattribute__(name)
+
+    def _send_calls(self, calls):
+        """ Send the queued calls to the GUI item and clear the queue """
+        if not calls:
+            return
+        batch = [tuple(call) for call in calls]
+        calls.clear()
+        if self.__dict__.get('_nonblocking'):
+            self._submit(Call('call', 'apply_batch', (batch,)))
+        elif options.get_option('call_stats'):
+            self._timed_call(Call('call', 'apply_batch', (batch,)))
+        else:
+            self.agent.method(self.index, 'apply_batch', batch)
+
+    def _timed_method(self, name, *args, **kwargs):
+        """ Call a GUI item method and record the timing of the call """
+        return self._timed_call(Call('call', name, args, kwargs))
+
+    def _timed_call(self, call):
+        """ Apply a call to the GUI item and record its timing """
+        sent = time.perf_counter()
+        result, started, finished = self.agent.method(
+            self.index, 'timed_call', tuple(call)
+        )
+        times = CallTimes(sent, started, finished, time.perf_counter())
+        record_call(self.agent.name, call, times)
+        return result
+
+    def _timed_operation(self, operation, func, *args, **kwargs):
+        """
+        Call func, which creates or deletes the GUI item, and record its
+        timing. The GUI thread doesn't report when it starts and finishes
+        these calls, such that their queueing delay counts as execution.
+        """
+        if not options.get_option('call_stats'):
+            func(*args, **kwargs)
+            return
+        sent = time.perf_counter()
+        func(*args, **kwargs)
+        received = time.perf_counter()
+        call_stats.record(
+            f'{self.agent.name}.{operation}',
+            CallTimes(sent, sent, received, received),
+            payload_size((args, kwargs)),
+        )
+
+    def _submit_method(self, name, *args, **kwargs):
+        """ Submit a method call without waiting for its result """
+        return self._submit(Call('call', name, args, kwargs))
+
+    def _submit(self, call):
+        """ Submit a call to the GUI item without waiting for its result """
+        if submit_call := getattr(self.agent, 'submit_call', None):
+            future = submit_call(self.index, call)
+            pending_calls.track(future)
+            return future
+        return CallExecutor.instance().submit(self.agent.name, self.index, call)
+
+
+def queue_call(calls, name, *args, **kwargs):
+    """ Queue a method call """
+    calls.append(Call('call', name, args, kwargs))
+
+
+class PendingCalls:
+    """ Registry of the futures of non-blocking calls, which are not flushed """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._failed = []
+
+    def track(self, future: futures.Future):
+        """
+        Register a future, first waiting for the oldest one if the maximum
+        number of pending calls is reached
+        """
+        max_pending = options.get_option('max_pending_calls')
+        while True:
+            with self._lock:
+                self._prune()
+                if len(self._pending) < max_pending:
+                    self._pending.append(future)
+                    return
+                oldest = self._pending[0]
+            # other threads can track and flush calls while this one waits
+            futures.wait([oldest])
+
+    def flush(self, timeout=None):
+        """
+        Block until all registered calls have been applied and raise the first
+        error that occurred, if any
+        """
+        with self._lock:
+            pending = list(self._pending)
+        _, not_done = futures.wait(pending, timeout=timeout)
+        if not_done:
+            raise TimeoutError(f'{len(not_done)} calls are still pending')
+        with self._lock:
+            self._prune()
+            failed, self._failed = self._failed, []
+        if failed:
+            raise failed[0].exception()
+
+    def _prune(self):
+        """ Remove finished calls from the pending calls, but keep errors """
+        while self._pending and self._pending[0].done():
+            future = self._pending.popleft()
+            if not future.cancelled() and future.exception() is not None:
+                self._failed.append(future)
+
+
+pending_calls = PendingCalls()
+
+
+class CallExecutor(QtCore.QObject):
+    """
+    Executes calls on GUI items in the GUI thread, while the submitting thread
+    continues immediately with a future as handle to the result
+    """
+    callSubmitted = QtCore.Signal(object)
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.callSubmitted.connect(self.execute)
+
+    @classmethod
+    def instance(cls):
+        """ Returns the executor, which lives in the GUI thread """
+        if cls._instance is None:
+            executor = cls()
+            if app := QtCore.QCoreApplication.instance():
+                executor.moveToThread(app.thread())
+            cls._instance = executor
+        return cls._instance
+
+    def submit(self, name, index, call: Call) -> futures.Future:
+        """ Submit a call to item index of the GUI container with name """
+        future = futures.Future()
+        pending_calls.track(future)
+        sent = time.perf_counter()
+        self.callSubmitted.emit((name, index, call, future, sent))
+        return future
+
+    @QtCore.Slot(object)
+    def execute(self, request):
+        """ Slot executing a submitted call """
+        name, index, call, future, sent = request
+        if not future.set_running_or_notify_cancel():
+            return
+        started = time.perf_counter()
+        try:
+            item = gui_item(name, index)
+            result = apply_call(item, call)
+        except Exception as err:
+            future.set_exception(err)
+            return
+        if options.get_option('call_stats'):
+            finished = time.perf_counter()
+            times = CallTimes(sent, started, finished, finished)
+            record_call(name, call, times)
+        future.set_result(result)
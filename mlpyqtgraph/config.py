@@ -19,6 +19,14 @@ class ConfigOptions:
         'segmentedLineMode': 'off',
         'no_segmented_line_mode': False,
         'black_on_white': True,
+        'signal_slot_timeout': 10_000,
+        'max_pending_calls': 1_000,
+        'backend': 'thread',
+        'shared_memory_size': 64*1024**2,
+        'call_stats': False,
+        'call_stats_file': None,
+        'headless': False,
+        'envelope_threshold': 1_000_000,
     }
 
     def __init__(self, **kwargs):
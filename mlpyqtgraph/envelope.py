@@ -0,0 +1,252 @@
+"""
+Min/max envelopes of large 2D lines
+
+An envelope pyramid holds the minimum and maximum of the samples of each
+bucket, for buckets that grow by a constant factor from level to level. A line
+only draws the level which matches the pixel width of its view box, as a
+vertical segment from the minimum to the maximum of each bucket. Peaks are
+therefore never lost, while the cost of a redraw is bounded by the screen
+width instead of the number of samples.
+
+The pyramid is built once per replacement of the samples, on a background
+thread, from a copy of them. Until it is available, the line falls back to
+pyqtgraph's own peak downsampling. Appended samples only reduce the buckets
+they fall in again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from pyqtgraph.Qt import QtCore
+
+from mlpyqtgraph.buffers import GrowableBuffer
+
+
+BUCKET_FACTOR = 4
+MIN_BUCKETS = 256
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='envelope')
+
+
+def is_sorted(x):
+    """ True if the positions x are non-decreasing """
+    return bool(np.all(x[1:] >= x[:-1]))
+
+
+class EnvelopePyramid:
+    """
+    Min/max envelopes of the samples y at the non-decreasing positions x.
+    Level k holds buckets of factor**k samples. The samples are used without
+    copying and can be extended.
+    """
+
+    def __init__(self, x, y, factor=BUCKET_FACTOR):
+        x, y = np.asarray(x), np.asarray(y)
+        self.factor = factor
+        self._x = GrowableBuffer(dtype=x.dtype)
+        self._y = GrowableBuffer(dtype=y.dtype)
+        self._x.assign(x)
+        self._y.assign(y)
+        self._levels = []
+        self.sorted = is_sorted(x)
+        if self.sorted:
+            self._build(0)
+
+    @property
+    def x(self):
+        """ Positions of the samples """
+        return self._x.view()
+
+    @property
+    def y(self):
+        """ Samples """
+        return self._y.view()
+
+    @property
+    def count(self):
+        """ Number of samples """
+        return self._x.count
+
+    @property
+    def levels(self):
+        """ Bucket size, positions, minima and maxima of each level """
+        return [
+            (bucket_size, *(buffer.view() for buffer in buffers))
+            for bucket_size, *buffers in self._levels
+        ]
+
+    def extend(self, x, y):
+        """ Appends samples and reduces the buckets they fall in again """
+        x, y = np.asarray(x), np.asarray(y)
+        if not len(x):
+            return
+        start = self.count
+        self.sorted = self.sorted and is_sorted(x) and (
+            start == 0 or x[0] >= self.x[-1]
+        )
+        self._x.append(x)
+        self._y.append(y)
+        if self.sorted:
+            self._build(start)
+        else:
+            self._levels.clear()
+
+    def _build(self, start):
+        """
+        Reduces each level to the next from the bucket holding sample start
+        onwards, until few buckets are left
+        """
+        bucket_size = 1
+        x, mins, maxs = self.x, self.y, self.y
+        level = 0
+        while len(mins) > MIN_BUCKETS:
+            bucket_size *= self.factor
+            start //= self.factor
+            if level == len(self._levels):
+                start = 0
+                self._levels.append((bucket_size, *(
+                    GrowableBuffer(dtype=values.dtype)
+                    for values in (x, mins, maxs)
+                )))
+            first = start*self.factor
+            starts = np.arange(first, len(mins), self.factor)
+            buckets = (
+                x[starts],
+                np.fmin.reduceat(mins[first:], starts - first),
+                np.fmax.reduceat(maxs[first:], starts - first),
+            )
+            buffers = self._levels[level][1:]
+            for buffer, values in zip(buffers, buckets):
+                buffer.write(start, values)
+            x, mins, maxs = (buffer.view() for buffer in buffers)
+            level += 1
+
+    def select(self, x_min, x_max, pixels):
+        """
+        Returns the x and y coordinates to draw between x_min and x_max at a
+        width of pixels: the samples themselves, if there are at most two per
+        pixel, or else the envelope of the finest level with at most one
+        bucket per pixel
+        """
+        start = max(int(np.searchsorted(self.x, x_min, 'left')) - 1, 0)
+        stop = int(np.searchsorted(self.x, x_max, 'right')) + 1
+        stop = min(stop, len(self.x))
+        samples = stop - start
+        if samples <= 2*pixels or not self.levels:
+            return self.x[start:stop], self.y[start:stop]
+        for bucket_size, x, mins, maxs in self.levels:
+            if samples/bucket_size <= pixels:
+                break
+        first = start//bucket_size
+        last = -(-stop//bucket_size)
+        x_env = np.repeat(x[first:last], 2)
+        y_env = np.empty_like(x_env, dtype=np.result_type(mins, np.float32))
+        y_env[0::2] = mins[first:last]
+        y_env[1::2] = maxs[first:last]
+        return x_env, y_env
+
+
+class LineEnvelope(QtCore.QObject):
+    """
+    Draws a pyqtgraph line item from an envelope pyramid, serving the level
+    which matches the x range and width of its view box whenever they change
+    """
+    built = QtCore.Signal(object)
+
+    def __init__(self, item, view_box, parent=None):
+        super().__init__(parent=parent)
+        self.item = item
+        self.view_box = view_box
+        self.pyramid = None
+        self._generation = 0
+        self._samples = None
+        self._refresh_pending = False
+        self.built.connect(self._use_pyramid)
+        view_box.sigXRangeChanged.connect(self.schedule_refresh)
+        view_box.sigResized.connect(self.schedule_refresh)
+
+    def set_data(self, x_coord, y_coord):
+        """
+        Shows the samples with pyqtgraph's peak downsampling and builds their
+        pyramid from a copy on a background thread, which replaces any
+        previous pyramid
+        """
+        self._generation += 1
+        self.pyramid = None
+        self._samples = (x_coord, y_coord)
+        self._show_samples()
+        _executor.submit(
+            self._build, self._generation, x_coord.copy(), y_coord.copy()
+        )
+
+    def extend(self, x_coord, y_coord):
+        """
+        Shows the samples, which extend the previous samples. The pyramid, if
+        already built, only reduces the buckets of the new samples.
+        """
+        self._samples = (x_coord, y_coord)
+        if self.pyramid is None:
+            # the pyramid under construction is extended once it is built
+            self.item.setData(x_coord, y_coord)
+            return
+        count = self.pyramid.count
+        self.pyramid.extend(x_coord[count:], y_coord[count:])
+        self._draw()
+
+    def _build(self, generation, x_coord, y_coord):
+        """ Builds a pyramid, on the background thread """
+        self.built.emit((generation, EnvelopePyramid(x_coord, y_coord)))
+
+    def _use_pyramid(self, result):
+        """ Switches to the pyramid, unless the data changed meanwhile """
+        generation, pyramid = result
+        if generation != self._generation:
+            return
+        x_coord, y_coord = self._samples
+        count = pyramid.count
+        pyramid.extend(x_coord[count:], y_coord[count:])
+        self.pyramid = pyramid
+        self._draw()
+
+    def _draw(self):
+        """
+        Draws the pyramid, unless too few or unsorted samples keep pyqtgraph's
+        downsampling
+        """
+        if self.pyramid.levels:
+            self.item.setDownsampling(auto=False)
+            self.item.setClipToView(False)
+            self.refresh()
+        else:
+            self._show_samples()
+
+    def _show_samples(self):
+        """ Shows the samples with pyqtgraph's peak downsampling """
+        self.item.setDownsampling(auto=True, method='peak')
+        self.item.setClipToView(True)
+        self.item.setData(*self._samples)
+
+    def schedule_refresh(self):
+        """ Refresh once all pending view changes have been processed """
+        if self.pyramid is not None and not self._refresh_pending:
+            self._refresh_pending = True
+            QtCore.QTimer.singleShot(0, self.refresh)
+
+    def refresh(self):
+        """ Hands the level matching the view box to the line item """
+        self._refresh_pending = False
+        if self.pyramid is None or not self.pyramid.levels:
+            return
+        if self.view_box.autoRangeEnabled()[0]:
+            # a clipped line would shrink the automatic range to the clip
+            x_min, x_max = self.pyramid.x[0], self.pyramid.x[-1]
+        else:
+            x_min, x_max = self.view_box.viewRange()[0]
+        pixels = max(int(self.view_box.width()), 1)
+        self.item.setData(*self.pyramid.select(x_min, x_max, pixels))
+
+    def detach(self):
+        """ Stops following the view box """
+        self._generation += 1
+        self.view_box.sigXRangeChanged.disconnect(self.schedule_refresh)
+        self.view_box.sigResized.disconnect(self.schedule_refresh)
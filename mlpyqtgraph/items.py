@@ -0,0 +1,82 @@
+"""
+Items of 3D axes, which can be updated after they have been plotted
+
+Each item keeps a reference to its axis' plot item, such that updates only
+transfer the new data instead of replotting the axis. Changing the data of an
+item only transforms and uploads that item, unless the axis ticks change.
+"""
+
+import numpy as np
+from pyqtgraph.Qt import QtCore
+
+from mlpyqtgraph.calls import CallTarget, gui_item
+
+
+class Item3D(QtCore.QObject, CallTarget):
+    """ Item in a 3D axis, of the given kind: 'line', 'surface' or 'points' """
+
+    def __init__(self, index, axis_index, kind, *args, parent=None, **kwargs):
+        super().__init__(parent=parent)
+        self.index = index
+        self.kind = kind
+        self.axis = gui_item('axis', axis_index)
+        self.item = getattr(self.axis, f'add_{kind}')(*args, **kwargs)
+
+    @property
+    def count(self):
+        """ Number of vertices of the item """
+        if self.kind == 'line' and not self.item.data:
+            # line strips keep their vertices in the plot item only
+            return len(self.item.instance.pos)
+        return np.size(self.item.data[-1])
+
+    @property
+    def visible(self):
+        """ Whether the item is shown """
+        return self.item.instance.visible()
+
+    def append(self, x_coord, y_coord, z_coord):
+        """
+        Appends vertices to a line. If the line has a tail, the oldest
+        vertices are dropped once the line has tail vertices.
+        """
+        if self.kind != 'line':
+            raise TypeError(f'Vertices can only be appended to lines, not to '
+                            f'{self.kind} items, use set_data instead')
+        self.axis.append_vertices(self.item, x_coord, y_coord, z_coord)
+
+    def set_data(self, *args, c=None, s=None):
+        """
+        Replaces the coordinates of the item, which are given like they were
+        given when plotting the item. The values c and sizes s of points are
+        kept if None, unless their number of points changes.
+        """
+        self.axis.set_item_data(self.item, *args, c=c, s=s)
+
+    def set_colormap(self, colormap, clim=None):
+        """
+        Colors the item by its z coordinates, or the values c of points, with
+        the given colormap, with colormap None for a single color. The
+        colormap's first and last color are at clim, or at the range of the
+        heights or values if None.
+        """
+        self.axis.set_item_colormap(self.item, colormap, clim)
+
+    def set_visible(self, visible=True):
+        """ Shows or hides the item """
+        self.item.instance.setVisible(visible)
+
+    def set_z(self, z_coord):
+        """
+        Replaces the heights of a surface, keeping its x and y coordinates and
+        faces
+        """
+        self.axis.set_surface_z(self.item, z_coord)
+
+    def flush_update(self):
+        """ Performs a scheduled update of the item's axis right away """
+        self.axis.flush_update()
+
+    def delete(self):
+        """ Removes the item from its axis """
+        self.axis.remove_item(self.item)
@@ -0,0 +1,141 @@
+"""
+Instrumentation of the calls from the worker thread to the GUI thread, which
+records queueing delay, execution time and payload size per call name
+
+Calls are recorded if the `call_stats` option is enabled. Non-blocking calls
+of the process backend are not recorded.
+"""
+
+import json
+import threading
+from collections import defaultdict, deque
+from typing import NamedTuple
+
+import numpy as np
+
+
+HISTOGRAM_EDGES = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)  # seconds
+HISTOGRAM_BARS = ' ▁▂▃▄▅▆▇█'
+
+
+def payload_size(payload) -> int:
+    """ Estimate the number of bytes of a call payload """
+    if isinstance(payload, np.ndarray):
+        return payload.nbytes
+    if isinstance(payload, str | bytes):
+        return len(payload)
+    if isinstance(payload, dict):
+        return sum(payload_size(value) for value in payload.values())
+    if isinstance(payload, list | tuple):
+        if len(payload) > 1_000:  # avoid iterating over long sequences
+            return 8*len(payload)
+        return sum(payload_size(value) for value in payload)
+    return 8
+
+
+def summary(values) -> dict:
+    """ Percentiles, mean and maximum of the given values """
+    values = np.asarray(values, dtype=float)
+    p50, p90, p99 = np.percentile(values, (50, 90, 99))
+    return {
+        'mean': float(values.mean()),
+        'p50': float(p50),
+        'p90': float(p90),
+        'p99': float(p99),
+        'max': float(values.max()),
+    }
+
+
+def histogram(values) -> list:
+    """ Number of values per decade, see HISTOGRAM_EDGES """
+    bins = (0.0, *HISTOGRAM_EDGES, np.inf)
+    return np.histogram(values, bins=bins)[0].tolist()
+
+
+class CallTimes(NamedTuple):
+    """
+    time.perf_counter() timestamps of sending a call, starting and finishing
+    its execution in the GUI thread and receiving its result
+    """
+    sent: float
+    started: float
+    finished: float
+    received: float
+
+
+class CallStats:
+    """
+    Thread-safe recorder of call timings, which keeps the most recent samples
+    per call name
+    """
+
+    def __init__(self, max_samples=10_000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+
+    def record(self, name, times: CallTimes, nbytes=0):
+        """ Record the timestamps and payload size of a call """
+        sent, started, finished, received = times
+        sample = (started - sent, finished - started, received - sent, nbytes)
+        with self._lock:
+            self._samples[name].append(sample)
+
+    def reset(self):
+        """ Remove all samples """
+        with self._lock:
+            self._samples.clear()
+
+    def report(self) -> 'StatsReport':
+        """ Summary of the recorded samples per call name """
+        with self._lock:
+            samples = {
+                name: list(values) for name, values in self._samples.items()
+            }
+        report = StatsReport()
+        for name, values in sorted(samples.items()):
+            queue, execution, total, nbytes = np.array(values).T
+            report[name] = {
+                'count': len(values),
+                'queue_delay': summary(queue),
+                'execution': summary(execution),
+                'total': summary(total),
+                'bytes': summary(nbytes),
+                'histogram': histogram(total),
+            }
+        return report
+
+    def dump(self, filename):
+        """ Write the report to a JSON file """
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class StatsReport(dict):
+    """ Call statistics per call name, printed as a table """
+
+    def __str__(self):
+        header = (f'{"call":<24}{"count":>7}{"queue p50":>11}{"exec p50":>10}'
+                  f'{"total p50":>11}{"p99":>9}{"max":>9}{"kB/call":>9}  '
+                  f'histogram')
+        lines = [header, '-'*len(header)]
+        for name, entry in self.items():
+            counts = np.asarray(entry['histogram'])
+            levels = np.ceil(8*counts/max(counts.max(), 1)).astype(int)
+            bars = ''.join(HISTOGRAM_BARS[level] for level in levels)
+            lines.append(
+                f'{name:<24}{entry["count"]:>7}'
+                f'{1e3*entry["queue_delay"]["p50"]:>9.3f}ms'
+                f'{1e3*entry["execution"]["p50"]:>8.3f}ms'
+                f'{1e3*entry["total"]["p50"]:>9.3f}ms'
+                f'{1e3*entry["total"]["p99"]:>7.2f}ms'
+                f'{1e3*entry["total"]["max"]:>7.1f}ms'
+                f'{entry["bytes"]["mean"]/1e3:>9.1f}  |{bars}|'
+            )
+        lines.append(
+            'histogram bins: <10µs, <100µs, <1ms, <10ms, <100ms, <1s, >1s'
+        )
+        return '\n'.join(lines)
+
+
+call_stats = CallStats()
@@ -0,0 +1,144 @@
+"""
+Line items of 2D axes, which can be extended with new samples
+
+Samples are kept in buffers on the GUI thread, such that each update only
+transfers the new samples. With `max_points`, a preallocated ring buffer keeps
+a rolling window of the last samples, without any reallocation.
+
+Lines with at least `envelope_threshold` samples, see the configuration
+options, are drawn from a min/max envelope pyramid, which matches the width of
+the view, see the [envelope](../envelope) module.
+"""
+
+import numpy as np
+from pyqtgraph.Qt import QtCore
+
+from mlpyqtgraph.buffers import GrowableBuffer, RingBuffer
+from mlpyqtgraph.calls import CallTarget, gui_item
+from mlpyqtgraph.config import options
+from mlpyqtgraph.envelope import LineEnvelope
+
+
+class Line2D(QtCore.QObject, CallTarget):
+    """
+    Line in a 2D axis, to which samples can be appended. With envelope, the
+    line is drawn from a min/max envelope pyramid, which is the default for
+    lines with at least envelope_threshold samples and no max_points.
+    """
+
+    def __init__(self, index, axis_index, x_coord, y_coord, **kwargs):
+        parent = kwargs.pop('parent', None)
+        # the streaming options are keyword-only, the rest are plot options
+        max_points = kwargs.pop('max_points', None)
+        envelope = kwargs.pop('envelope', None)
+        if max_points is not None and max_points < 1:
+            raise ValueError(
+                f'max_points must be at least 1, got {max_points}'
+            )
+        x_coord, y_coord = self.check_samples(x_coord, y_coord)
+        super().__init__(parent=parent)
+        self.index = index
+        self.axis = gui_item('axis', axis_index)
+        self._max_points = max_points
+        self._x = self.new_buffer()
+        self._y = self.new_buffer()
+        self._x.append(x_coord)
+        self._y.append(y_coord)
+        self._refresh_pending = False
+        self._replaced = False
+        if envelope is None:
+            threshold = options.get_option('envelope_threshold')
+            envelope = max_points is None and self.count >= threshold
+        elif envelope and max_points is not None:
+            raise ValueError('Lines with max_points have no envelope')
+        self.envelope = None
+        if envelope:
+            self.item = self.axis.plot_line(np.empty(0), np.empty(0), **kwargs)
+            self.envelope = LineEnvelope(self.item, self.axis.getViewBox())
+            self.envelope.set_data(self._x.view(), self._y.view())
+        else:
+            self.item = self.axis.plot_line(
+                self._x.view(), self._y.view(), **kwargs
+            )
+
+    def new_buffer(self):
+        """ Returns a ring buffer with max_points, or a growable buffer """
+        if self.max_points is None:
+            return GrowableBuffer()
+        return RingBuffer(self.max_points)
+
+    @property
+    def max_points(self):
+        """
+        Number of samples of the rolling window, or None. It's fixed when the
+        line is created, as the buffers are sized for it.
+        """
+        return self._max_points
+
+    @property
+    def count(self):
+        """ Number of samples of the line """
+        return self._x.count
+
+    def append(self, x_coord, y_coord):
+        """
+        Appends samples to the line. If max_points is set, the oldest samples
+        are dropped once the line has max_points samples.
+        """
+        x_coord, y_coord = self.check_samples(x_coord, y_coord)
+        self._x.append(x_coord)
+        self._y.append(y_coord)
+        self.schedule_refresh()
+
+    def set_data(self, x_coord, y_coord):
+        """ Replaces all samples of the line """
+        x_coord, y_coord = self.check_samples(x_coord, y_coord)
+        self._x.clear()
+        self._y.clear()
+        self._replaced = True
+        self.append(x_coord, y_coord)
+
+    @staticmethod
+    def check_samples(x_coord, y_coord):
+        """
+        Returns the samples as arrays, or raises a ValueError unless there are
+        as many x as y values, in one dimension
+        """
+        x_coord = np.atleast_1d(x_coord)
+        y_coord = np.atleast_1d(y_coord)
+        if x_coord.ndim != 1 or y_coord.ndim != 1:
+            raise ValueError('x and y must be one-dimensional')
+        if x_coord.shape != y_coord.shape:
+            raise ValueError('x and y must have the same number of samples')
+        return x_coord, y_coord
+
+    def schedule_refresh(self):
+        """ Refresh once all pending updates have been processed """
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            QtCore.QTimer.singleShot(0, self.refresh)
+
+    def flush_update(self):
+        """ Performs a scheduled refresh right away """
+        if self._refresh_pending:
+            self.refresh()
+
+    def refresh(self):
+        """
+        Hand the current samples to the plot item, or to the envelope, which
+        only reduces appended samples unless the samples were replaced
+        """
+        self._refresh_pending = False
+        if self.envelope is None:
+            self.item.setData(self._x.view(), self._y.view())
+        elif self._replaced:
+            self.envelope.set_data(self._x.view(), self._y.view())
+        else:
+            self.envelope.extend(self._x.view(), self._y.view())
+        self._replaced = False
+
+    def delete(self):
+        """ Removes the line from its axis """
+        if self.envelope is not None:
+            self.envelope.detach()
+        self.axis.removeItem(self.item)
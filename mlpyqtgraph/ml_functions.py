@@ -2,7 +2,13 @@
 Matplotlib-like functions for easy figure and plot definitions
 """
 
+from concurrent import futures
 from pqthreads import refs
+from mlpyqtgraph import animation
+from mlpyqtgraph import batch
+from mlpyqtgraph import buffers
+from mlpyqtgraph.calls import pending_calls
+from mlpyqtgraph.latency import call_stats
 
 
 def figure(*args, **kwargs):
@@ -37,10 +43,22 @@ def close(figure_ref):
     gcf().close(figure_ref)
 
 
-def plot(*args, **kwargs):
-    """ Plots into the current axis """
+def plot(x_coord, y_coord, **kwargs):
+    """
+    Plots into the current axis and returns a handle to the line, to which
+    samples can be appended with `append(x, y)`. With `max_points`, the line
+    only keeps a rolling window of the last max_points samples.
+
+    Wrap frequent appends in the line's `nonblocking()` context, such that
+    the worker thread doesn't wait for every update to be drawn.
+
+    Lines with many samples are drawn from a min/max envelope, which is built
+    on a background thread and matches the width of the view. Set `envelope`
+    to enable or disable this regardless of the number of samples.
+    """
     gcf().create_axis(axis_type='2D')
-    return gca().add(*args, **kwargs)
+    container = refs.worker.get('line')
+    return container.create(gca().index, x_coord, y_coord, **kwargs)
 
 
 def legend(*args):
@@ -49,21 +67,152 @@ def legend(*args):
 
 
 def surf(*args, **kwargs):
-    """ Plots a 3D surface """
+    """
+    Plots a 3D surface and returns a handle to it, see
+    [`Item3D`](../items/#mlpyqtgraph.items.Item3D). The heights of the
+    surface can be replaced with `set_z(z)`, which only updates the z
+    coordinates of the surface, as long as the axis ticks don't change.
+
+    The surface is colored by height with `colormap`, on the GPU, between the
+    heights `clim`, which default to the range of z. Change them with
+    `set_colormap(colormap, clim)`.
+
+    With `lod=True`, large surfaces are drawn at a level of detail which
+    matches their size on screen, with a grid cell of about `lodPixels`
+    pixels, and wireframe lines at least `gridPixels` pixels apart. Exports
+    are drawn at full detail.
+    """
     gcf().change_layout('Qt')
     gcf().create_axis(axis_type='3D')
-    gca().surf(*args, **kwargs)
+    container = refs.worker.get('item3d')
+    return container.create(gca().index, 'surface', *args, **kwargs)
+
+
+def plot3(x_coord, y_coord, z_coord, **kwargs):
+    """
+    Plots a 3D line and returns a handle to it, to which vertices can be
+    appended with `append(x, y, z)`. With `tail`, the line only keeps the last
+    tail vertices. Only the appended vertices are uploaded to the GPU.
+
+    Wrap frequent appends in the line's `nonblocking()` context, such that
+    the worker thread doesn't wait for every update to be drawn.
 
+    With `colormap`, the line is colored by height, between the heights
+    `clim`, which default to the range of z.
 
-def plot3(*args, **kwargs):
-    """ Plots a 3D line """
+    Lines with a color per vertex, an (N,4) `color` array, or other options
+    of pyqtgraph's `GLLinePlotItem`, such as `mode='lines'`, are drawn by a
+    `GLLinePlotItem`, to which no vertices can be appended.
+    """
     gcf().change_layout('Qt')
     gcf().create_axis(axis_type='3D')
-    gca().line(*args, **kwargs)
+    container = refs.worker.get('item3d')
+    return container.create(
+        gca().index, 'line', x_coord, y_coord, z_coord, **kwargs
+    )
 
 
 def points3(*args, **kwargs):
-    """ Plots 3D points """
+    """
+    Plots 3D points and returns a handle to them, see
+    [`Item3D`](../items/#mlpyqtgraph.items.Item3D). With `colormap`, the
+    points are colored by height, between the heights `clim`, which default
+    to the range of z.
+
+    With `c`, the points are colored by the values `c` instead, with the
+    colormap viridis unless `colormap` is given, between the values `clim`.
+    With `s`, each point has the size `s` in pixels. Both are uploaded as
+    compact attributes per point, such that colors are computed on the GPU.
+
+    With `lod=True`, clouds of more than `lodPoints` points draw a spatially
+    representative subset of at most `lodPoints` points while the camera
+    moves, and refine to all points once it rests.
+    """
     gcf().change_layout('Qt')
     gcf().create_axis(axis_type='3D')
-    gca().points(*args, **kwargs)
+    container = refs.worker.get('item3d')
+    return container.create(gca().index, 'points', *args, **kwargs)
+
+
+def savefig(filename, dpi=None):
+    """ Saves the current figure to an image file """
+    gcf().savefig(filename, dpi=dpi)
+
+
+def animate(update_fn, frames=None, interval=40):
+    """
+    Animates the current figure. The update function is called with each
+    frame, which are taken from frames if it is an iterable, range(frames) if
+    it is an integer, or counted until the figure is closed if it is None.
+
+    It returns the updates of the frame as tuples of a line or item handle and
+    the arguments of its `set_data` method, or a handle, a method name and its
+    arguments. A timer on the GUI thread applies the most recent frame every
+    interval milliseconds. Frames are dropped if the update function falls
+    behind schedule, or if the GUI thread can't keep up. An error raised while
+    applying a frame ends the animation, and is raised once it has stopped.
+
+    Returns the achieved frames per second, the number of applied and dropped
+    frames and statistics of the time to apply and paint a frame.
+    """
+    container = refs.worker.get('animation')
+    handle = container.create(gcf().index, interval)
+    return animation.animate(handle, update_fn, frames, interval)
+
+
+def render_batch(jobs, workers=None):
+    """
+    Renders independent figures in parallel, in a pool of headless processes
+
+    Each job is a [`RenderJob`](../batch/#mlpyqtgraph.batch.RenderJob) or a
+    tuple of a picklable plotting function and the image file to save its
+    figure to. Yields the
+    [`RenderResult`](../batch/#mlpyqtgraph.batch.RenderResult) of each job,
+    including its duration, as soon as it is finished.
+    """
+    yield from batch.render_batch(jobs, workers=workers)
+
+
+def copy_stats(reset=False):
+    """
+    Returns the number of calls and bytes of array data copied on the GUI
+    thread, per call name. Optionally resets the counters afterwards.
+    """
+    stats = buffers.copy_counter.stats()
+    if reset:
+        buffers.copy_counter.reset()
+    return stats
+
+
+def stats(reset=False):
+    """
+    Returns the latency statistics of the calls sent to the GUI thread, per
+    call name, which prints as a table. Requires the `call_stats` option.
+    Optionally removes the recorded samples afterwards.
+    """
+    report = call_stats.report()
+    if reset:
+        call_stats.reset()
+    return report
+
+
+def flush(timeout=None):
+    """
+    Block until all non-blocking calls have been applied in the GUI thread and
+    raise the first error raised by any of them
+    """
+    pending_calls.flush(timeout=timeout)
+
+
+def wait(*pending, timeout=None):
+    """
+    Wait for the given futures of non-blocking calls and return their results.
+    Without arguments, waits for all non-blocking calls, like `flush`.
+    """
+    if not pending:
+        flush(timeout=timeout)
+        return None
+    _, not_done = futures.wait(pending, timeout=timeout)
+    if not_done:
+        raise TimeoutError(f'{len(not_done)} calls are still pending')
+    return [future.result() for future in pending]
@@ -0,0 +1,403 @@
+"""
+Out-of-process GUI backend
+
+The GUI (figure windows and axes) runs in a child process, while the decorated
+function runs in the main thread of the calling process. Commands are sent
+through a pipe and large array payloads through a shared memory ring buffer,
+such that computations and rendering no longer compete for one interpreter.
+"""
+
+import sys
+import threading
+import traceback
+import multiprocessing
+from collections import deque
+from concurrent import futures
+from multiprocessing import shared_memory
+from typing import NamedTuple
+
+import numpy as np
+import pyqtgraph as pg
+from pyqtgraph.Qt import QtCore
+from pyqtgraph.Qt import QtWidgets
+from pqthreads import containers
+from pqthreads import refs
+
+from mlpyqtgraph.calls import Call, ItemContainer
+from mlpyqtgraph.config import options
+
+
+class RootException(Exception):
+    """ Root Exception of the process module """
+
+
+class GUIProcessError(RootException):
+    """ Raised if the GUI process reports an error or has stopped """
+
+
+class SharedArray(NamedTuple):
+    """ Reference to an array in the shared memory ring buffer """
+    offset: int
+    shape: tuple
+    dtype: str
+
+
+class SharedRingBuffer:
+    """
+    Ring buffer in shared memory for array payloads of in-flight messages
+
+    Each message occupies one contiguous block, which is released once the GUI
+    process has replied to the message. Messages are answered in order, so
+    blocks are released in the order in which they were allocated.
+    """
+    alignment = 64
+    min_nbytes = 1 << 16  # smaller arrays are cheaper to pickle
+
+    def __init__(self, size):
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.size = self.shm.size
+        self._head = 0
+        self._blocks = deque()
+        self._released = threading.Condition()
+        self._aborted = False
+
+    def _aligned(self, nbytes):
+        return -(-nbytes // self.alignment) * self.alignment
+
+    def _find_space(self, nbytes):
+        """ Returns the offset of a free block of nbytes, or None """
+        if not self._blocks:
+            self._head = 0
+            return 0 if nbytes <= self.size else None
+        tail = self._blocks[0][0]
+        if self._blocks[-1][0] >= tail:  # free space at the end and the start
+            if self._head + nbytes <= self.size:
+                return self._head
+            return 0 if nbytes <= tail else None
+        return self._head if self._head + nbytes <= tail else None
+
+    def allocate(self, nbytes):
+        """ Allocate a block of nbytes, waiting for blocks in flight if full """
+        with self._released:
+            while (offset := self._find_space(nbytes)) is None:
+                if self._aborted:
+                    raise GUIProcessError('The GUI process has stopped')
+                self._released.wait()
+            self._head = offset + nbytes
+            block = (offset, offset + nbytes)
+            self._blocks.append(block)
+            return block
+
+    def release(self, block):
+        """ Release the oldest allocated block """
+        if block is None:
+            return
+        with self._released:
+            self._blocks.popleft()
+            self._released.notify_all()
+
+    def abort(self):
+        """ Stop waiting for blocks to be released """
+        with self._released:
+            self._aborted = True
+            self._released.notify_all()
+
+    def pack(self, payload):
+        """
+        Move large arrays of the payload into one shared memory block and
+        return the payload with SharedArray references and the block
+        """
+        arrays = {}
+        collect_arrays(payload, arrays, self.min_nbytes)
+        arrays = list(arrays.values())
+        nbytes = sum(self._aligned(array.nbytes) for array in arrays)
+        if not arrays or nbytes > self.size:
+            return payload, None
+        block = self.allocate(nbytes)
+        offset = block[0]
+        shared = {}
+        for array in arrays:
+            target = np.ndarray(
+                array.shape, dtype=array.dtype, buffer=self.shm.buf,
+                offset=offset,
+            )
+            target[...] = array
+            del target
+            shared[id(array)] = SharedArray(
+                offset, array.shape, array.dtype.str
+            )
+            offset += self._aligned(array.nbytes)
+        return replace_arrays(payload, shared), block
+
+    def close(self):
+        """ Close and remove the shared memory """
+        self.shm.close()
+        self.shm.unlink()
+
+
+def collect_arrays(payload, arrays, min_nbytes):
+    """ Collect the numeric arrays of at least min_nbytes in payload """
+    if isinstance(payload, np.ndarray):
+        if payload.nbytes >= min_nbytes and payload.dtype.kind in 'biuf':
+            arrays[id(payload)] = payload
+    elif type(payload) in {list, tuple}:
+        for value in payload:
+            collect_arrays(value, arrays, min_nbytes)
+    elif isinstance(payload, dict):
+        for value in payload.values():
+            collect_arrays(value, arrays, min_nbytes)
+
+
+def replace_arrays(payload, shared):
+    """ Replace the arrays in payload with their shared counterparts """
+    if isinstance(payload, np.ndarray):
+        return shared.get(id(payload), payload)
+    if type(payload) in {list, tuple}:
+        return type(payload)(replace_arrays(value, shared) for value in payload)
+    if isinstance(payload, dict):
+        return {
+            key: replace_arrays(value, shared) for key, value in payload.items()
+        }
+    return payload
+
+
+def restore_arrays(payload, buffer):
+    """ Replace SharedArray references by copies of the shared arrays """
+    if isinstance(payload, SharedArray):
+        view = np.ndarray(
+            payload.shape, dtype=payload.dtype, buffer=buffer,
+            offset=payload.offset,
+        )
+        array = view.copy()
+        del view
+        return array
+    if type(payload) in {list, tuple}:
+        return type(payload)(restore_arrays(value, buffer) for value in payload)
+    if isinstance(payload, dict):
+        return {
+            key: restore_arrays(value, buffer) for key, value in payload.items()
+        }
+    return payload
+
+
+class ProcessChannel:
+    """
+    Sends commands to the GUI process and resolves their futures with the
+    replies, which are received in order by a reader thread
+    """
+
+    def __init__(self, connection, ring: SharedRingBuffer):
+        self.connection = connection
+        self.ring = ring
+        self._send_lock = threading.Lock()
+        self._in_flight = deque()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def submit(self, name, operation, *payload) -> futures.Future:
+        """ Send a command without waiting for the reply """
+        future = futures.Future()
+        with self._send_lock:
+            if self._closed:
+                raise GUIProcessError('The GUI process has stopped')
+            payload, block = self.ring.pack(payload)
+            self._in_flight.append((future, block))
+            self.connection.send((name, operation, payload))
+        return future
+
+    def call(self, name, operation, *payload):
+        """ Send a command and wait for its reply """
+        timeout = options.get_option('signal_slot_timeout')/1000
+        return self.submit(name, operation, *payload).result(timeout=timeout)
+
+    def _read(self):
+        """ Reader thread, resolving the futures of in-flight commands """
+        while True:
+            try:
+                success, value = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            future, block = self._in_flight.popleft()
+            self.ring.release(block)
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exception(GUIProcessError(value))
+        self.ring.abort()
+        with self._send_lock:
+            self._closed = True
+            while self._in_flight:
+                future, _ = self._in_flight.popleft()
+                future.set_exception(
+                    GUIProcessError('The GUI process has stopped')
+                )
+
+    def join(self, timeout=None):
+        """ Wait for the reader thread, which ends with the GUI process """
+        self._reader.join(timeout)
+
+
+class ProcessAgent:
+    """
+    Worker agent that forwards operations to the GUI process, with the same
+    interface as the worker agents of pqthreads
+    """
+
+    def __init__(self, name, channel: ProcessChannel):
+        self.name = name
+        self.channel = channel
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(name={self.name})'
+
+    def create(self, *args, **kwargs):
+        """ Create a GUI item and return its index """
+        return self.channel.call(self.name, 'create', args, kwargs)
+
+    def modify(self, index, **kwargs):
+        """ Modify GUI item attributes """
+        self.channel.call(self.name, 'modify', index, kwargs)
+
+    def request(self, index, *args):
+        """ Obtain GUI item attribute values """
+        return self.channel.call(self.name, 'request', index, args)
+
+    def method(self, index, func_name, *args, **kwargs):
+        """ Call a GUI item method and return its result """
+        return self.channel.call(
+            self.name, 'method', index, func_name, args, kwargs
+        )
+
+    def delete(self, index):
+        """ Delete the GUI item """
+        self.channel.call(self.name, 'delete', index)
+
+    def submit_call(self, index, call: Call) -> futures.Future:
+        """ Send a call without waiting for its result """
+        if call.kind == 'set':
+            return self.channel.submit(
+                self.name, 'modify', index, {call.name: call.args[0]}
+            )
+        return self.channel.submit(
+            self.name, 'method', index, call.name, call.args, call.kwargs or {}
+        )
+
+
+class GUIServer:
+    """ Executes the commands received from the calling process """
+
+    def __init__(self, app, connection, shm_name, gui_classes):
+        self.app = app
+        self.connection = connection
+        self.shm = shared_memory.SharedMemory(name=shm_name)
+        self.containers = {
+            name: ItemContainer(gui_class)
+            for name, gui_class in gui_classes.items()
+        }
+        for name, container in self.containers.items():
+            refs.gui.add(name, container)
+        if sys.platform == 'win32':
+            self.notifier = QtCore.QTimer()
+            self.notifier.timeout.connect(self.receive)
+            self.notifier.start(1)
+        else:
+            self.notifier = QtCore.QSocketNotifier(
+                connection.fileno(), QtCore.QSocketNotifier.Type.Read
+            )
+            self.notifier.activated.connect(self.receive)
+
+    def receive(self):
+        """ Execute all commands that are available """
+        try:
+            while self.connection.poll():
+                self.execute(*self.connection.recv())
+        except (EOFError, OSError):
+            self.app.quit()
+
+    def execute(self, name, operation, payload):
+        """ Execute a single command and send the reply """
+        if operation == 'finish':
+            self.connection.send((True, None))
+            self.finish()
+            return
+        try:
+            payload = restore_arrays(payload, self.shm.buf)
+            value = getattr(self.containers[name], operation)(*payload)
+            self.connection.send((True, value))
+        except Exception as err:
+            message = ''.join(traceback.format_exception(err))
+            self.connection.send((False, message))
+
+    def finish(self):
+        """
+        Quit once the last window is closed, windows are closed immediately in
+        headless mode
+        """
+        self.notifier.setEnabled(False)
+        if options.get_option('headless'):
+            self.app.closeAllWindows()
+        self.app.setQuitOnLastWindowClosed(True)
+        if not any(window.isVisible() for window in self.app.topLevelWindows()):
+            self.app.quit()
+
+    def close(self):
+        """ Release the shared memory and references """
+        refs.gui.clear()
+        self.shm.close()
+
+
+def gui_main(connection, shm_name, config_options, gui_classes):
+    """ Entry point of the GUI process """
+    QtWidgets.QApplication.setAttribute(
+        QtCore.Qt.ApplicationAttribute.AA_ShareOpenGLContexts
+    )
+    app = pg.mkQApp()
+    app.setQuitOnLastWindowClosed(False)
+    options.set_options(**config_options)
+    server = GUIServer(app, connection, shm_name, gui_classes)
+    try:
+        app.exec()
+    finally:
+        server.close()
+        connection.close()
+
+
+def run(wrapped, args, kwargs, gui_classes, worker_classes):
+    """
+    Run the wrapped function in this process, with the GUI in a child process
+    """
+    context = multiprocessing.get_context('spawn')
+    connection, child_connection = context.Pipe()
+    ring = SharedRingBuffer(options.get_option('shared_memory_size'))
+    process = context.Process(
+        target=gui_main,
+        args=(
+            child_connection, ring.shm.name, options.config_options,
+            gui_classes,
+        ),
+    )
+    process.start()
+    child_connection.close()
+    channel = ProcessChannel(connection, ring)
+    worker_containers = {
+        name: containers.WorkerItemContainer(
+            worker_class.with_agent(ProcessAgent(name, channel))
+        )
+        for name, worker_class in worker_classes.items()
+    }
+    for name, container in worker_containers.items():
+        refs.worker.add(name, container)
+    try:
+        result = wrapped(*args, **kwargs)
+        channel.call('', 'finish')
+    except BaseException:
+        process.terminate()
+        raise
+    finally:
+        process.join()
+        channel.join()
+        connection.close()
+        refs.worker.clear()
+        ring.close()
+    return result
@@ -0,0 +1,244 @@
+import numpy as np
+from OpenGL import GL
+from pyqtgraph import functions as fn
+from pyqtgraph.Qt import QtGui
+from pyqtgraph.opengl.GLGraphicsItem import GLGraphicsItem
+
+from mlpyqtgraph.buffers import GrowableBuffer, RingBuffer, copy_counter
+from mlpyqtgraph.utils.glbuffers import RangeUploadBuffer, compile_program
+from mlpyqtgraph.utils import glcolormap
+
+
+__all__ = ["GLLineStripItem"]
+
+
+class GLLineStripItem(GLGraphicsItem):
+    """
+    Draws a connected 3D line, to which vertices can be appended.
+
+    Vertices are kept in a buffer with geometrically growing capacity, or in a
+    ring buffer with the last `tail` vertices, which is mirrored in a vertex
+    buffer object. Appending only uploads the appended vertices, unless the
+    capacity grows. With a colormap, the line is colored by the z coordinate
+    of its vertices on the GPU.
+    """
+
+    _shaderProgram = None
+    _colormapProgram = None
+    keywords = ("pos", "color", "width", "antialias", "colormap", "clim")
+
+    def __init__(self, parentItem=None, tail=None, **kwds):
+        """All keyword arguments except tail are passed to setData()."""
+        super().__init__()
+        glopts = kwds.pop("glOptions", "additive")
+        self.setGLOptions(glopts)
+        self.tail = tail
+        self.color = (1.0, 1.0, 1.0, 1.0)
+        self.width = 1.0
+        self.antialias = False
+        if tail is None:
+            self._buffer = GrowableBuffer(row_shape=(3,), dtype=np.float32)
+        else:
+            self._buffer = RingBuffer(tail, row_shape=(3,), dtype=np.float32)
+        self._vbo = RangeUploadBuffer()
+        self._colormap = glcolormap.ItemColormap()
+
+        self.setParentItem(parentItem)
+        self.setData(**kwds)
+
+    @classmethod
+    def supports(cls, options):
+        """
+        True if a line with the keyword arguments options can be drawn as
+        strip, otherwise it needs a GLLinePlotItem, e.g. for colors per
+        vertex or for mode 'lines'.
+        """
+        options = dict(options)
+        if options.pop("mode", "line_strip") != "line_strip":
+            return False
+        options.pop("glOptions", None)
+        color = options.get("color")
+        if color is not None and not isinstance(color, str | QtGui.QColor):
+            if np.ndim(color) != 1:
+                return False
+        return all(key in cls.keywords for key in options)
+
+    @property
+    def pos(self):
+        """(N,3) array of the current vertices."""
+        return self._buffer.view()
+
+    def setData(self, **kwds):
+        """
+        Update the data displayed by this item. All arguments are optional.
+
+        ====================  ==================================================
+        **Arguments:**
+        ------------------------------------------------------------------------
+        pos                   (N,3) array of floats specifying vertex locations,
+                              which replace all current vertices.
+        color                 tuple of floats (0.0-1.0) specifying the line
+                              color. Colors per vertex aren't supported, see
+                              supports().
+        width                 float specifying the line width in pixels.
+        antialias             enables smooth line drawing.
+        colormap              name of a colormap, which colors the line by the
+                              z coordinate of its vertices instead of color,
+                              or None.
+        clim                  (low, high) z coordinates of the colormap's first
+                              and last color, or None for the range of z.
+        ====================  ==================================================
+        """
+        for k in kwds:
+            if k not in self.keywords:
+                raise ValueError(
+                    f"Invalid keyword argument: {k} (allowed arguments are "
+                    f"{', '.join(self.keywords)})"
+                )
+
+        if "pos" in kwds:
+            self._buffer.clear()
+            self._append(kwds.pop("pos"))
+
+        if "color" in kwds:
+            color = kwds.pop("color")
+            if isinstance(color, str):
+                color = fn.mkColor(color)
+            if isinstance(color, QtGui.QColor):
+                color = color.getRgbF()
+            if np.ndim(color) != 1:
+                raise ValueError("GLLineStripItem only has a single color")
+            self.color = tuple(color)
+
+        if "colormap" in kwds:
+            self._colormap.setColormap(kwds.pop("colormap"))
+        if "clim" in kwds:
+            self._colormap.setClim(kwds.pop("clim"))
+
+        for k, v in kwds.items():
+            setattr(self, k, v)
+
+        self.update()
+
+    def append(self, pos):
+        """Append (N,3) vertices to the line."""
+        self._append(pos)
+        self.update()
+
+    def _append(self, pos):
+        pos = np.asarray(pos, dtype=np.float32).reshape(-1, 3)
+        self._vbo.sync(self._buffer.array, self._buffer.append(pos))
+        self._colormap.scalarsChanged()
+        copy_counter.record("GLLineStripItem", pos.nbytes)
+
+    @staticmethod
+    def getShaderProgram():
+        klass = GLLineStripItem
+        if klass._shaderProgram is None:
+            klass._shaderProgram = compile_program(
+                SHADER_CORE, SHADER_LEGACY, ["a_position", "a_color"]
+            )
+        return klass._shaderProgram
+
+    @staticmethod
+    def getColormapProgram():
+        klass = GLLineStripItem
+        if klass._colormapProgram is None:
+            klass._colormapProgram = compile_program(
+                glcolormap.SHADER_CORE, glcolormap.SHADER_LEGACY,
+                ["a_position", "a_scalar"],
+            )
+        return klass._colormapProgram
+
+    def paint(self):
+        if self._buffer.count < 2:
+            return
+        self.setupGLState()
+        self._vbo.upload()
+
+        mat_mvp = self.mvpMatrix()
+        mat_mvp = np.array(mat_mvp.data(), dtype=np.float32)
+        colormapped = self._colormap.enabled
+        if colormapped:
+            program = self.getColormapProgram()
+        else:
+            program = self.getShaderProgram()
+
+        self._vbo.vbo.bind()
+        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, False, 0, None)
+        self._vbo.vbo.release()
+        GL.glEnableVertexAttribArray(0)
+        if colormapped:
+            glcolormap.scalar_pointer(1, self._vbo.vbo, component=2)
+            GL.glEnableVertexAttribArray(1)
+        else:
+            GL.glVertexAttrib4f(1, *self.color)
+
+        if self.antialias:
+            GL.glEnable(GL.GL_LINE_SMOOTH)
+            GL.glHint(GL.GL_LINE_SMOOTH_HINT, GL.GL_NICEST)
+        GL.glLineWidth(self.width)
+
+        window = self._buffer.window()
+        with program:
+            loc = GL.glGetUniformLocation(program, "u_mvp")
+            GL.glUniformMatrix4fv(loc, 1, False, mat_mvp)
+            if colormapped:
+                self._colormap.bind(program, self.pos[:, 2])
+            GL.glDrawArrays(
+                GL.GL_LINE_STRIP, window.start, window.stop - window.start
+            )
+            if colormapped:
+                self._colormap.release()
+
+        GL.glDisableVertexAttribArray(0)
+        if colormapped:
+            GL.glDisableVertexAttribArray(1)
+        if self.antialias:
+            GL.glDisable(GL.GL_LINE_SMOOTH)
+
+
+SHADER_LEGACY = {
+    GL.GL_VERTEX_SHADER: """
+        uniform mat4 u_mvp;
+        attribute vec4 a_position;
+        attribute vec4 a_color;
+        varying vec4 v_color;
+        void main() {
+            v_color = a_color;
+            gl_Position = u_mvp * a_position;
+        }
+    """,
+    GL.GL_FRAGMENT_SHADER: """
+        #ifdef GL_ES
+        precision mediump float;
+        #endif
+        varying vec4 v_color;
+        void main() {
+            gl_FragColor = v_color;
+        }
+    """,
+}
+
+SHADER_CORE = {
+    GL.GL_VERTEX_SHADER: """
+        uniform mat4 u_mvp;
+        in vec4 a_position;
+        in vec4 a_color;
+        out vec4 v_color;
+        void main() {
+            v_color = a_color;
+            gl_Position = u_mvp * a_position;
+        }
+    """,
+    GL.GL_FRAGMENT_SHADER: """
+        #ifdef GL_ES
+        precision mediump float;
+        #endif
+        in vec4 v_color;
+        out vec4 fragColor;
+        void main() {
+            fragColor = v_color;
+        }
+    """,
+}
@@ -1,50 +1,143 @@
-import enum
-import importlib
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from OpenGL import GL
-from OpenGL.GL import shaders
 from pyqtgraph import functions as fn
-from pyqtgraph.Qt import QT_LIB, QtGui
+from pyqtgraph.Qt import QtCore, QtGui
 from pyqtgraph.opengl.GLGraphicsItem import GLGraphicsItem
 
-if QT_LIB in ["PyQt5", "PySide2"]:
-    QtOpenGL = QtGui
-else:
-    QtOpenGL = importlib.import_module(f"{QT_LIB}.QtOpenGL")
+from mlpyqtgraph.buffers import GrowableBuffer, as_float32, copy_counter
+from mlpyqtgraph.utils.glbuffers import (
+    QtOpenGL, RangeUploadBuffer, compile_program, projected_size
+)
+from mlpyqtgraph.utils import glcolormap
+
+
+__all__ = ["GLPointsItem", "lod_order"]
+
+
+LOD_LEVELS = 10
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lod")
+
+
+def _spread_bits(cells):
+    """Spread the 10 lowest bits of cells to every third bit."""
+    cells = cells.astype(np.uint32)
+    cells = (cells | (cells << 16)) & 0x030000FF
+    cells = (cells | (cells << 8)) & 0x0300F00F
+    cells = (cells | (cells << 4)) & 0x030C30C3
+    cells = (cells | (cells << 2)) & 0x09249249
+    return cells
+
+
+def _voxel_codes(pos, cells):
+    """
+    Interleaved bits of the voxel of each of the (N,3) finite points pos, of
+    cells voxels per axis, which make the voxels of each level contiguous runs
+    """
+    codes = np.zeros(len(pos), dtype=np.uint32)
+    if not len(pos):
+        return codes
+    for axis in range(3):
+        coord = pos[:, axis]
+        low, high = coord.min(), coord.max()
+        # a flat axis has a single voxel, whatever its offset from the origin
+        scale = cells / (high - low) if high > low else 0.0
+        cell = np.clip((coord - low) * scale, 0, cells - 1)
+        codes |= _spread_bits(cell) << axis
+    return codes
+
+
+def lod_order(pos, levels=LOD_LEVELS, seed=0):
+    """
+    Order of the (N,3) points pos, of which every prefix is a representative
+    subset. Level k divides the bounding box into 2**k voxels per axis and
+    holds a random point of each occupied voxel, which isn't in a coarser
+    level yet. The order lists the points level by level, the remaining
+    points in random order and points with missing coordinates last. Returns
+    the order as uint32 indices and the number of points up to and including
+    each level.
+    """
+    pos = np.asarray(pos)
+    valid = np.isfinite(pos).all(axis=1)
+    finite = np.flatnonzero(valid)
+    shuffle = finite[np.random.default_rng(seed).permutation(len(finite))]
+    codes = _voxel_codes(pos[shuffle], 2**levels)
+    order = np.argsort(codes)
+    codes = codes[order]
+    rank = np.full(len(shuffle), levels + 1, dtype=np.uint8)
+    for level in range(levels + 1 if len(shuffle) else 0):
+        voxels = codes >> 3 * (levels - level)
+        starts = np.flatnonzero(np.r_[True, voxels[1:] != voxels[:-1]])
+        # the first point of a voxel in the shuffled order is a random one
+        first = np.minimum.reduceat(order, starts)
+        rank[first] = np.minimum(rank[first], level)
+    order = np.concatenate((
+        shuffle[np.argsort(rank, kind="stable")], np.flatnonzero(~valid)
+    )).astype(np.uint32)
+    counts = np.cumsum(np.bincount(rank, minlength=levels + 2))[:levels + 1]
+    return order, counts
 
 
-__all__ = ["GLPointsItem"]
-
+class GLPointsItem(GLGraphicsItem):
+    """
+    Draws points in 3D with fixed pixel size.
 
-class DirtyFlag(enum.Flag):
-    POSITION = enum.auto()
-    COLOR = enum.auto()
+    Points can be appended or overwritten from an offset, in which case only
+    the changed points are uploaded. Capacity grows geometrically. With a
+    colormap, the points are colored on the GPU by a float32 scalar per
+    point, or by their z coordinate, and sizes per point are uint8 if they
+    are whole pixels, which is much less to upload than (N,4) colors.
 
-
-class GLPointsItem(GLGraphicsItem):
-    """Draws points in 3D with fixed pixel size."""
+    With lod, large point sets are drawn in a level of detail order, which is
+    built on a background thread. While the camera moves, only a subset of
+    the points is drawn, which doubles with each frame once the camera rests,
+    until all points are drawn.
+    """
 
     _shaderProgram = None
+    _colormapProgram = None
+    lodIdleInterval = 150
+    lodBuilt = QtCore.Signal(object)
 
     def __init__(self, parentItem=None, **kwds):
         """All keyword arguments are passed to setData()."""
         super().__init__()
         glopts = kwds.pop("glOptions", "opaque")
         self.setGLOptions(glopts)
-        self.pos = None
         self.size = 5.0
-        self.color = (1.0, 1.0, 1.0, 1.0)
         self.depth_offset = "auto"
         self.depth_bias = "auto"
 
-        self.m_vbo_position = QtOpenGL.QOpenGLBuffer(
-            QtOpenGL.QOpenGLBuffer.Type.VertexBuffer
-        )
-        self.m_vbo_color = QtOpenGL.QOpenGLBuffer(
-            QtOpenGL.QOpenGLBuffer.Type.VertexBuffer
+        self._positions = GrowableBuffer(row_shape=(3,), dtype=np.float32)
+        self._colors = GrowableBuffer(row_shape=(4,), dtype=np.float32)
+        self._scalars = GrowableBuffer(dtype=np.float32)
+        self._sizes = GrowableBuffer(dtype=np.float32)
+        self._uniform_color = (1.0, 1.0, 1.0, 1.0)
+        self.m_vbo_position = RangeUploadBuffer()
+        self.m_vbo_color = RangeUploadBuffer()
+        self.m_vbo_scalar = RangeUploadBuffer()
+        self.m_vbo_size = RangeUploadBuffer()
+        self._colormap = glcolormap.ItemColormap()
+
+        self.lod = False
+        self.lodPoints = 1_000_000
+        self.lodSuspended = False
+        self.m_ibo_lod = RangeUploadBuffer(
+            QtOpenGL.QOpenGLBuffer.Type.IndexBuffer
         )
-        self.dirty_bits = DirtyFlag(0)
+        self._lod_counts = None
+        self._lod_extent = None
+        self._lod_generation = 0
+        self._lod_pending = False
+        self._lod_mvp = None
+        self._lod_drawn = 0
+        self._lod_refining = False
+        self._lod_idle = QtCore.QTimer()
+        self._lod_idle.setSingleShot(True)
+        self._lod_idle.timeout.connect(self._refine)
+        self.lodBuilt.connect(self._set_lod_order)
 
         self.setParentItem(parentItem)
         self.setData(**kwds)
@@ -60,89 +153,242 @@ class GLPointsItem(GLGraphicsItem):
         color                 (N,4) array of floats (0.0-1.0) or
                       tuple of floats specifying
                       a single color for all points.
-        size                  float specifying point size in pixels (default 5.0)
+        offset                int, if given, pos, a color array, scalars and
+                      sizes overwrite the points from offset onwards
+                      instead of replacing all points. Points beyond
+                      the current number of points are appended.
+        size                  float specifying point size in pixels
+                      (default 5.0).
+        sizes                 (N,) array of point sizes in pixels, which are
+                      stored as uint8 if they are whole numbers up
+                      to 255, or None for size.
         depth_offset          tuple (factor, units), "auto", or None.
                       Uses GL_POLYGON_OFFSET_POINT when supported.
         depth_bias            float, "auto", or None.
                       Clip-space bias applied as z -= bias * w.
+        scalars               (N,) array of values, which the colormap maps
+                      to colors instead of the z coordinates, or None.
+        colormap              name of a colormap, which colors the points by
+                      their scalars or z coordinate instead of color,
+                      or None.
+        clim                  (low, high) scalars or z coordinates of the
+                      colormap's first and last color, or None for
+                      their range.
+        lod                   bool, draw more than lodPoints points in a level
+                      of detail order (default False). The order is
+                      rebuilt after the positions change.
+        lodPoints             int, maximum number of points drawn while the
+                      camera moves (default 1,000,000).
         ====================  ==================================================
         """
-        args = ["pos", "color", "size", "depth_offset", "depth_bias"]
-        for k in kwds.keys():
+        args = [
+            "pos", "color", "offset", "size", "depth_offset", "depth_bias",
+            "colormap", "clim", "lod", "lodPoints", "scalars", "sizes",
+        ]
+        for k in kwds:
             if k not in args:
-                raise Exception(
-                    "Invalid keyword argument: %s (allowed arguments are %s)"
-                    % (k, str(args))
+                raise ValueError(
+                    f"Invalid keyword argument: {k} (allowed arguments are "
+                    f"{', '.join(args)})"
                 )
 
+        offset = kwds.pop("offset", None)
         if "pos" in kwds:
-            pos = kwds.pop("pos")
-            self.pos = np.ascontiguousarray(pos, dtype=np.float32)
-            self.dirty_bits |= DirtyFlag.POSITION
+            self._set_positions(kwds.pop("pos"), offset)
+
+        if "scalars" in kwds:
+            scalars = kwds.pop("scalars")
+            if scalars is not None and offset is None:
+                scalars = as_float32(scalars, name="GLPointsItem.scalars")
+            self._set_attribute(self._scalars, self.m_vbo_scalar, offset,
+                                scalars)
+            self._colormap.scalarsChanged()
+
+        if "sizes" in kwds:
+            sizes = kwds.pop("sizes")
+            if sizes is not None and offset is None:
+                sizes = self._compact_sizes(sizes)
+            self._set_attribute(self._sizes, self.m_vbo_size, offset, sizes)
+
+        if "colormap" in kwds:
+            self._colormap.setColormap(kwds.pop("colormap"))
+        if "clim" in kwds:
+            self._colormap.setClim(kwds.pop("clim"))
 
         if "color" in kwds:
-            color = kwds.pop("color")
-            if isinstance(color, np.ndarray):
-                color = np.ascontiguousarray(color, dtype=np.float32)
-                self.dirty_bits |= DirtyFlag.COLOR
-            if isinstance(color, str):
-                color = fn.mkColor(color)
-            if isinstance(color, QtGui.QColor):
-                color = color.getRgbF()
-            self.color = color
+            self._set_colors(kwds.pop("color"), offset)
 
         for k, v in kwds.items():
             setattr(self, k, v)
 
         self.update()
 
-    def upload_vbo(self, vbo, arr):
-        if arr is None:
-            vbo.destroy()
-            return
-        if not vbo.isCreated():
-            vbo.create()
-        vbo.bind()
-        if vbo.size() != arr.nbytes:
-            vbo.allocate(arr, arr.nbytes)
+    def _set_positions(self, pos, offset):
+        """Replace all positions, or write them from offset if given."""
+        if offset is None:
+            pos = as_float32(pos, name="GLPointsItem.pos")
+            self._positions.assign(pos)
+            self.m_vbo_position.set(self._positions.array)
         else:
-            vbo.write(0, arr, arr.nbytes)
-        vbo.release()
+            self._write(self._positions, self.m_vbo_position, offset, pos)
+        self._positions_changed()
 
-    @staticmethod
-    def getShaderProgram():
-        klass = GLPointsItem
+    def _set_colors(self, color, offset):
+        """
+        Use an (N,4) color array as colors of the points, written from offset
+        if given, or any other color as single color of all points.
+        """
+        if not isinstance(color, np.ndarray):
+            self._uniform_color = self._mkcolor(color)
+            self.m_vbo_color.set(None)
+        elif offset is None:
+            color = np.ascontiguousarray(color, dtype=np.float32)
+            self._colors.assign(color)
+            self.m_vbo_color.set(self._colors.array)
+        else:
+            self._write(self._colors, self.m_vbo_color, offset, color)
+
+    def append(self, pos, color=None, scalars=None, sizes=None):
+        """
+        Append (N,3) points. If the points have individual colors, color is
+        required and is either an (N,4) array or a single color. Likewise,
+        scalars and sizes are required if the points have individual ones.
+        """
+        pos = np.asarray(pos).reshape(-1, 3)
+        offset = self._positions.count
+        if self.m_vbo_color.array is not None:
+            if color is None:
+                raise ValueError("Points with individual colors need a color")
+            color = np.broadcast_to(self._mkcolor(color), (len(pos), 4))
+            self._write(self._colors, self.m_vbo_color, offset, color)
+        elif color is not None:
+            raise ValueError("Points with a single color can't append colors")
+        for name, buffer, vbo, values in (
+            ("scalars", self._scalars, self.m_vbo_scalar, scalars),
+            ("sizes", self._sizes, self.m_vbo_size, sizes),
+        ):
+            if vbo.array is not None:
+                if values is None:
+                    raise ValueError(f"Points with individual {name} need "
+                                     f"{name}")
+                values = np.broadcast_to(values, len(pos))
+                self._write(buffer, vbo, offset, values)
+            elif values is not None:
+                raise ValueError(f"Points without individual {name} can't "
+                                 f"append {name}")
+        self._write(self._positions, self.m_vbo_position, offset, pos)
+        self._positions_changed()
+        self.update()
+
+    def _positions_changed(self):
+        """Invalidate the colormap and level of detail order of the points."""
+        self._colormap.scalarsChanged()
+        self._lod_generation += 1
+        self._lod_counts = None
 
-        if klass._shaderProgram is not None:
-            return klass._shaderProgram
+    def _set_attribute(self, buffer, vbo, offset, values):
+        """
+        Use values as attribute of all points, or write them from offset if
+        given. If values is None, the points have no such attribute.
+        """
+        if values is None:
+            buffer.clear()
+            vbo.set(None)
+        elif offset is None:
+            buffer.assign(values)
+            vbo.set(buffer.array)
+        else:
+            self._write(buffer, vbo, offset, values)
 
-        ctx = QtGui.QOpenGLContext.currentContext()
-        fmt = ctx.format()
+    @staticmethod
+    def _whole_pixels(sizes):
+        """True if all sizes fit uint8, as whole pixels up to 255."""
+        return bool(
+            np.all((sizes >= 0) & (sizes <= 255))
+            and np.array_equal(sizes, np.round(sizes))
+        )
 
-        if ctx.isOpenGLES():
-            if fmt.version() >= (3, 0):
-                glsl_version = "#version 300 es\n"
-                sources = SHADER_CORE
-            else:
-                glsl_version = ""
-                sources = SHADER_LEGACY
+    @classmethod
+    def _compact_sizes(cls, sizes):
+        """Sizes as uint8 if they are whole pixels up to 255, or float32."""
+        sizes = np.asarray(sizes)
+        if sizes.size and cls._whole_pixels(sizes):
+            compact = np.ascontiguousarray(sizes, dtype=np.uint8)
         else:
-            if fmt.version() >= (3, 1):
-                glsl_version = "#version 140\n"
-                sources = SHADER_CORE
-            else:
-                glsl_version = ""
-                sources = SHADER_LEGACY
+            compact = as_float32(sizes)
+        copy_counter.record("GLPointsItem.sizes", compact.nbytes)
+        return compact
 
-        compiled = [shaders.compileShader([glsl_version, v], k) for k, v in sources.items()]
-        program = shaders.compileProgram(*compiled)
+    @staticmethod
+    def _mkcolor(color):
+        if isinstance(color, str):
+            color = fn.mkColor(color)
+        if isinstance(color, QtGui.QColor):
+            color = color.getRgbF()
+        if isinstance(color, np.ndarray):
+            return color
+        return tuple(color)
+
+    @classmethod
+    def _write(cls, buffer, vbo, offset, values):
+        """
+        Write values from offset and mark the changed rows for upload. uint8
+        sizes are promoted to float32 if the values don't fit.
+        """
+        values = np.asarray(values)
+        if buffer.array.dtype == np.uint8 and not cls._whole_pixels(values):
+            buffer.assign(buffer.view().astype(np.float32))
+            vbo.set(buffer.array)
+        values = np.asarray(values, dtype=buffer.array.dtype)
+        vbo.sync(buffer.array, buffer.write(offset, values))
+        copy_counter.record("GLPointsItem.write", values.nbytes)
+
+    @property
+    def pos(self):
+        """(N,3) array of the point locations, None if there are none."""
+        if self._positions.count == 0:
+            return None
+        return self._positions.view()
+
+    @property
+    def color(self):
+        """(N,4) array of point colors, or a single color for all points."""
+        if self.m_vbo_color.array is not None:
+            return self._colors.view()
+        return self._uniform_color
+
+    @property
+    def scalars(self):
+        """(N,) array of the scalars of the points, None if they have none."""
+        if self.m_vbo_scalar.array is None:
+            return None
+        return self._scalars.view()
+
+    @property
+    def sizes(self):
+        """(N,) array of the point sizes, None if they have a single size."""
+        if self.m_vbo_size.array is None:
+            return None
+        return self._sizes.view()
 
-        GL.glBindAttribLocation(program, 0, "a_position")
-        GL.glBindAttribLocation(program, 1, "a_color")
-        GL.glLinkProgram(program)
+    @staticmethod
+    def getShaderProgram():
+        klass = GLPointsItem
+        if klass._shaderProgram is None:
+            klass._shaderProgram = compile_program(
+                SHADER_CORE, SHADER_LEGACY, ["a_position", "a_color", "a_size"]
+            )
+        return klass._shaderProgram
 
-        klass._shaderProgram = program
-        return program
+    @staticmethod
+    def getColormapProgram():
+        klass = GLPointsItem
+        if klass._colormapProgram is None:
+            klass._colormapProgram = compile_program(
+                COLORMAP_SHADER_CORE, COLORMAP_SHADER_LEGACY,
+                ["a_position", "a_scalar", "a_size"],
+            )
+        return klass._colormapProgram
 
     def _resolve_depth_settings(self):
         depth_offset = self.depth_offset
@@ -173,68 +419,110 @@ class GLPointsItem(GLGraphicsItem):
 
         return depth_offset, depth_bias
 
+    def _lod_count(self, mat_mvp):
+        """
+        Number of points to draw from the level of detail order: a subset
+        while the camera moves, which doubles per frame once the camera
+        rests, or all points
+        """
+        count = self._positions.count
+        if not self.lod or self.lodSuspended or count <= self.lodPoints:
+            return count
+        if self._lod_counts is None:
+            self._build_lod_order()
+            return count
+        if self._lod_mvp is None or not np.array_equal(mat_mvp, self._lod_mvp):
+            self._lod_mvp = mat_mvp
+            self._lod_drawn = self._lod_budget()
+            self._lod_refining = False
+            self._lod_idle.start(self.lodIdleInterval)
+        elif self._lod_refining and self._lod_drawn < count:
+            self._lod_drawn = min(2 * self._lod_drawn, count)
+            QtCore.QTimer.singleShot(0, self.update)
+        return self._lod_drawn
+
+    def _lod_budget(self):
+        """
+        Number of points drawn while the camera moves: the levels of which
+        the voxels are at least a point size apart on the screen, but at most
+        lodPoints points
+        """
+        budget = self.lodPoints
+        pixels = projected_size(self, *self._lod_extent)
+        if pixels is not None:
+            level = int(np.log2(max(pixels / self.size, 1.0)))
+            budget = min(budget, self._lod_counts[min(level, LOD_LEVELS)])
+        return max(int(budget), 1)
+
+    def _refine(self):
+        """Start refining once the camera rests."""
+        self._lod_refining = True
+        self.update()
+
+    def _build_lod_order(self):
+        """Build the level of detail order on the background thread."""
+        if not self._lod_pending:
+            self._lod_pending = True
+            # later writes from an offset would change a view during the build
+            _executor.submit(self._lod_task, self._lod_generation,
+                             self._positions.view().copy())
+
+    def _lod_task(self, generation, pos):
+        """Build the order of pos and its bounding box, on the thread."""
+        extent = (np.fmin.reduce(pos, axis=0), np.fmax.reduce(pos, axis=0))
+        self.lodBuilt.emit((generation,) + lod_order(pos) + (extent,))
+
+    def _set_lod_order(self, result):
+        """Use a built order, unless the positions changed since."""
+        generation, order, counts, extent = result
+        self._lod_pending = False
+        if generation == self._lod_generation:
+            self.m_ibo_lod.set(order)
+            self._lod_counts = counts
+            self._lod_extent = extent
+            self._lod_mvp = None
+        self.update()
+
+    def _attributes_complete(self):
+        """True if all attributes per point have a value for each point."""
+        return all(
+            buffer.count >= self._positions.count
+            for buffer, vbo in (
+                (self._colors, self.m_vbo_color),
+                (self._scalars, self.m_vbo_scalar),
+                (self._sizes, self.m_vbo_size),
+            )
+            if vbo.array is not None
+        )
+
     def paint(self):
-        if self.pos is None:
+        if self.pos is None or not self._attributes_complete():
+            # points and their attributes may be replaced one after another
             return
         self.setupGLState()
 
         mat_mvp = self.mvpMatrix()
         mat_mvp = np.array(mat_mvp.data(), dtype=np.float32)
 
-        context = QtGui.QOpenGLContext.currentContext()
-
-        if DirtyFlag.POSITION in self.dirty_bits:
-            self.upload_vbo(self.m_vbo_position, self.pos)
-        if DirtyFlag.COLOR in self.dirty_bits:
-            self.upload_vbo(self.m_vbo_color, self.color)
-        self.dirty_bits = DirtyFlag(0)
-
-        program = self.getShaderProgram()
-
-        enabled_locs = []
-
-        loc = 0
-        self.m_vbo_position.bind()
-        GL.glVertexAttribPointer(loc, 3, GL.GL_FLOAT, False, 0, None)
-        self.m_vbo_position.release()
-        enabled_locs.append(loc)
-
-        loc = 1
-        if isinstance(self.color, np.ndarray):
-            self.m_vbo_color.bind()
-            GL.glVertexAttribPointer(loc, 4, GL.GL_FLOAT, False, 0, None)
-            self.m_vbo_color.release()
-            enabled_locs.append(loc)
+        self.m_vbo_position.upload()
+        self.m_vbo_color.upload()
+        self.m_vbo_scalar.upload()
+        self.m_vbo_size.upload()
+        count = self._lod_count(mat_mvp)
+        if count < self._positions.count:
+            self.m_ibo_lod.upload()
+
+        colormapped = self._colormap.enabled
+        if colormapped:
+            program = self.getColormapProgram()
         else:
-            GL.glVertexAttrib4f(loc, *self.color)
-
-        depth_was_enabled = GL.glIsEnabled(GL.GL_DEPTH_TEST)
-        depth_func = GL.glGetIntegerv(GL.GL_DEPTH_FUNC)
-        depth_mask = GL.glGetBooleanv(GL.GL_DEPTH_WRITEMASK)
-        if hasattr(depth_mask, "__len__"):
-            depth_mask = bool(depth_mask[0])
-        GL.glEnable(GL.GL_DEPTH_TEST)
-        GL.glDepthFunc(GL.GL_LEQUAL)
-        GL.glDepthMask(GL.GL_TRUE)
+            program = self.getShaderProgram()
 
+        enabled_locs, scalars = self._set_attribute_pointers(colormapped)
         depth_offset, depth_bias = self._resolve_depth_settings()
+        depth_state = self._push_depth_state(depth_offset)
 
-        point_offset_supported = hasattr(GL, "GL_POLYGON_OFFSET_POINT")
-        offset_was_enabled = False
-        prev_offset_factor = None
-        prev_offset_units = None
-        if point_offset_supported and depth_offset is not None:
-            offset_was_enabled = GL.glIsEnabled(GL.GL_POLYGON_OFFSET_POINT)
-            prev_offset_factor = GL.glGetFloatv(GL.GL_POLYGON_OFFSET_FACTOR)
-            prev_offset_units = GL.glGetFloatv(GL.GL_POLYGON_OFFSET_UNITS)
-            if hasattr(prev_offset_factor, "__len__"):
-                prev_offset_factor = float(prev_offset_factor[0])
-            if hasattr(prev_offset_units, "__len__"):
-                prev_offset_units = float(prev_offset_units[0])
-            GL.glEnable(GL.GL_POLYGON_OFFSET_POINT)
-            GL.glPolygonOffset(*depth_offset)
-
-        sfmt = context.format()
+        sfmt = QtGui.QOpenGLContext.currentContext().format()
         core_forward_compatible = (
             sfmt.profile() == sfmt.OpenGLContextProfile.CoreProfile
             and not sfmt.testOption(sfmt.FormatOption.DeprecatedFunctions)
@@ -251,13 +539,14 @@ class GLPointsItem(GLGraphicsItem):
             loc = GL.glGetUniformLocation(program, "u_mvp")
             GL.glUniformMatrix4fv(loc, 1, False, mat_mvp)
 
-            size_loc = GL.glGetUniformLocation(program, "u_pointSize")
-            GL.glUniform1f(size_loc, self.size)
-
             bias_loc = GL.glGetUniformLocation(program, "u_depthBias")
             GL.glUniform1f(bias_loc, float(depth_bias or 0.0))
 
-            GL.glDrawArrays(GL.GL_POINTS, 0, len(self.pos))
+            if colormapped:
+                self._colormap.bind(program, scalars)
+            self._draw_points(count)
+            if colormapped:
+                self._colormap.release()
 
         for loc in enabled_locs:
             GL.glDisableVertexAttribArray(loc)
@@ -266,24 +555,114 @@ class GLPointsItem(GLGraphicsItem):
             GL.glDisable(GL.GL_PROGRAM_POINT_SIZE)
             GL.glPointSize(1.0)
 
-        if point_offset_supported and depth_offset is not None:
+        self._pop_depth_state(depth_offset, depth_state)
+
+    def _set_attribute_pointers(self, colormapped):
+        """
+        Point the position, color and size attributes to their buffers, or
+        set them to constants. Returns the locations of the attributes read
+        from buffers and the scalars of the colormap, if colormapped.
+        """
+        enabled_locs = []
+
+        loc = 0
+        self.m_vbo_position.vbo.bind()
+        GL.glVertexAttribPointer(loc, 3, GL.GL_FLOAT, False, 0, None)
+        self.m_vbo_position.vbo.release()
+        enabled_locs.append(loc)
+
+        loc = 1
+        scalars = self.scalars
+        if colormapped and scalars is not None:
+            glcolormap.scalar_pointer(loc, self.m_vbo_scalar.vbo)
+            enabled_locs.append(loc)
+        elif colormapped:
+            scalars = self.pos[:, 2]
+            glcolormap.scalar_pointer(loc, self.m_vbo_position.vbo, component=2)
+            enabled_locs.append(loc)
+        elif self.m_vbo_color.array is not None:
+            self.m_vbo_color.vbo.bind()
+            GL.glVertexAttribPointer(loc, 4, GL.GL_FLOAT, False, 0, None)
+            self.m_vbo_color.vbo.release()
+            enabled_locs.append(loc)
+        else:
+            GL.glVertexAttrib4f(loc, *self._uniform_color)
+
+        loc = 2
+        if self.m_vbo_size.array is not None:
+            gl_type = {
+                np.uint8: GL.GL_UNSIGNED_BYTE, np.float32: GL.GL_FLOAT,
+            }[self._sizes.array.dtype.type]
+            self.m_vbo_size.vbo.bind()
+            GL.glVertexAttribPointer(loc, 1, gl_type, False, 0, None)
+            self.m_vbo_size.vbo.release()
+            enabled_locs.append(loc)
+        else:
+            GL.glVertexAttrib1f(loc, self.size)
+
+        return enabled_locs, scalars
+
+    def _draw_points(self, count):
+        """Draw count points, in level of detail order if not all points."""
+        if count < self._positions.count:
+            self.m_ibo_lod.vbo.bind()
+            GL.glDrawElements(GL.GL_POINTS, count, GL.GL_UNSIGNED_INT, None)
+            self.m_ibo_lod.vbo.release()
+        else:
+            GL.glDrawArrays(GL.GL_POINTS, 0, count)
+
+    @staticmethod
+    def _push_depth_state(depth_offset):
+        """
+        Enable depth testing, and the polygon offset of points if supported
+        and depth_offset is given. Returns the previous state.
+        """
+        depth_was_enabled = GL.glIsEnabled(GL.GL_DEPTH_TEST)
+        depth_func = GL.glGetIntegerv(GL.GL_DEPTH_FUNC)
+        depth_mask = GL.glGetBooleanv(GL.GL_DEPTH_WRITEMASK)
+        if hasattr(depth_mask, "__len__"):
+            depth_mask = bool(depth_mask[0])
+        GL.glEnable(GL.GL_DEPTH_TEST)
+        GL.glDepthFunc(GL.GL_LEQUAL)
+        GL.glDepthMask(GL.GL_TRUE)
+
+        offset_was_enabled = False
+        prev_offset = None
+        if hasattr(GL, "GL_POLYGON_OFFSET_POINT") and depth_offset is not None:
+            offset_was_enabled = GL.glIsEnabled(GL.GL_POLYGON_OFFSET_POINT)
+            prev_offset = tuple(
+                float(np.ravel(GL.glGetFloatv(name))[0])
+                for name in (
+                    GL.GL_POLYGON_OFFSET_FACTOR, GL.GL_POLYGON_OFFSET_UNITS
+                )
+            )
+            GL.glEnable(GL.GL_POLYGON_OFFSET_POINT)
+            GL.glPolygonOffset(*depth_offset)
+
+        return (depth_was_enabled, depth_func, depth_mask, offset_was_enabled,
+                prev_offset)
+
+    @staticmethod
+    def _pop_depth_state(depth_offset, state):
+        """Restore the state returned by _push_depth_state."""
+        (depth_was_enabled, depth_func, depth_mask, offset_was_enabled,
+         prev_offset) = state
+        if hasattr(GL, "GL_POLYGON_OFFSET_POINT") and depth_offset is not None:
             if not offset_was_enabled:
                 GL.glDisable(GL.GL_POLYGON_OFFSET_POINT)
-            if prev_offset_factor is not None and prev_offset_units is not None:
-                GL.glPolygonOffset(prev_offset_factor, prev_offset_units)
+            GL.glPolygonOffset(*prev_offset)
 
         GL.glDepthFunc(depth_func)
         GL.glDepthMask(depth_mask)
         if not depth_was_enabled:
             GL.glDisable(GL.GL_DEPTH_TEST)
 
-
 SHADER_LEGACY = {
     GL.GL_VERTEX_SHADER: """
         uniform mat4 u_mvp;
-        uniform float u_pointSize;
         uniform float u_depthBias;
         attribute vec4 a_position;
+        attribute float a_size;
         attribute vec4 a_color;
         varying vec4 v_color;
         void main() {
@@ -291,7 +670,7 @@ SHADER_LEGACY = {
             vec4 clip = u_mvp * a_position;
             clip.z -= u_depthBias * clip.w;
             gl_Position = clip;
-            gl_PointSize = u_pointSize;
+            gl_PointSize = a_size;
         }
     """,
     GL.GL_FRAGMENT_SHADER: """
@@ -308,9 +687,9 @@ SHADER_LEGACY = {
 SHADER_CORE = {
     GL.GL_VERTEX_SHADER: """
         uniform mat4 u_mvp;
-        uniform float u_pointSize;
         uniform float u_depthBias;
         in vec4 a_position;
+        in float a_size;
         in vec4 a_color;
         out vec4 v_color;
         void main() {
@@ -318,7 +697,7 @@ SHADER_CORE = {
             vec4 clip = u_mvp * a_position;
             clip.z -= u_depthBias * clip.w;
             gl_Position = clip;
-            gl_PointSize = u_pointSize;
+            gl_PointSize = a_size;
         }
     """,
     GL.GL_FRAGMENT_SHADER: """
@@ -334,3 +713,41 @@ SHADER_CORE = {
 }
 
 
+
+COLORMAP_SHADER_LEGACY = {
+    GL.GL_VERTEX_SHADER: """
+        uniform mat4 u_mvp;
+        uniform float u_depthBias;
+        attribute vec4 a_position;
+        attribute float a_size;
+        attribute float a_scalar;
+        varying float v_scalar;
+        void main() {
+            v_scalar = a_scalar;
+            vec4 clip = u_mvp * a_position;
+            clip.z -= u_depthBias * clip.w;
+            gl_Position = clip;
+            gl_PointSize = a_size;
+        }
+    """,
+    GL.GL_FRAGMENT_SHADER: glcolormap.FRAGMENT_LEGACY,
+}
+
+COLORMAP_SHADER_CORE = {
+    GL.GL_VERTEX_SHADER: """
+        uniform mat4 u_mvp;
+        uniform float u_depthBias;
+        in vec4 a_position;
+        in float a_size;
+        in float a_scalar;
+        out float v_scalar;
+        void main() {
+            v_scalar = a_scalar;
+            vec4 clip = u_mvp * a_position;
+            clip.z -= u_depthBias * clip.w;
+            gl_Position = clip;
+            gl_PointSize = a_size;
+        }
+    """,
+    GL.GL_FRAGMENT_SHADER: glcolormap.FRAGMENT_CORE,
+}
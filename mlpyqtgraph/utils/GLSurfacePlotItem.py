@@ -1,26 +1,139 @@
+import functools
+
 import numpy as np
 
 from pyqtgraph.opengl import MeshData
-from pyqtgraph.opengl import GLMeshItem, GLLinePlotItem
+from pyqtgraph.opengl import GLMeshItem
+from pyqtgraph.opengl.items.GLMeshItem import DirtyFlag
+from pyqtgraph.Qt import QtGui
 from OpenGL import GL as ogl
 
-__all__ = ['GLSurfacePlotItem']
+from mlpyqtgraph.buffers import copy_counter
+from mlpyqtgraph.utils.glbuffers import (
+    QtOpenGL, RangeUploadBuffer, compile_program, projected_size
+)
+from mlpyqtgraph.utils import GLLineStripItem as line_strip
+from mlpyqtgraph.utils.glcolormap import (
+    SHADER_CORE, SHADER_LEGACY, ItemColormap, scalar_pointer
+)
+from mlpyqtgraph.utils.GLWireframeItem import GLWireframeItem
+
+__all__ = ['GLSurfacePlotItem', 'GridTopology', 'grid_topology']
+
+
+class GridTopology:
+    """
+    Triangle faces and wireframe edges of a regular grid of rows x cols
+    vertexes, as read-only index arrays. The uploaded index buffers are kept
+    per OpenGL share group, such that surfaces of the same shape share them.
+    """
+
+    def __init__(self, rows, cols):
+        self.shape = (rows, cols)
+        idx = np.arange(rows*cols, dtype=np.uint32).reshape(rows, cols)
+        top_left, top_right = idx[:-1, :-1], idx[:-1, 1:]
+        bottom_left, bottom_right = idx[1:, :-1], idx[1:, 1:]
+        # per row of quads, all upper triangles come before the lower ones
+        upper = np.stack((top_left, top_right, bottom_left), axis=-1)
+        lower = np.stack((bottom_left, top_right, bottom_right), axis=-1)
+        self.faces = np.stack((upper, lower), axis=1).reshape(-1, 3)
+        horizontal = np.stack((idx[:, :-1], idx[:, 1:]), axis=-1)
+        vertical = np.stack((idx[:-1, :], idx[1:, :]), axis=-1)
+        self.edges = np.concatenate(
+            (horizontal.reshape(-1, 2), vertical.reshape(-1, 2))
+        )
+        self.faces.setflags(write=False)
+        self.edges.setflags(write=False)
+        self._thinned_edges = {1: self.edges}
+        self._index_buffers = {}
+
+    def edges_every(self, step):
+        """
+        Edges of every step-th grid line in both directions, including the
+        last lines, at the full resolution along the lines
+        """
+        if step not in self._thinned_edges:
+            rows, cols = self.shape
+            idx = np.arange(rows*cols, dtype=np.uint32).reshape(rows, cols)
+            row_lines = np.unique(np.r_[0:rows:step, rows - 1])
+            col_lines = np.unique(np.r_[0:cols:step, cols - 1])
+            horizontal = np.stack(
+                (idx[row_lines, :-1], idx[row_lines, 1:]), axis=-1
+            )
+            vertical = np.stack(
+                (idx[:-1, col_lines], idx[1:, col_lines]), axis=-1
+            )
+            edges = np.concatenate(
+                (horizontal.reshape(-1, 2), vertical.reshape(-1, 2))
+            )
+            edges.setflags(write=False)
+            self._thinned_edges[step] = edges
+        return self._thinned_edges[step]
+
+    def index_buffer(self, kind='faces', step=1):
+        """
+        Index buffer of the faces, or of the edges of every step-th grid line,
+        for the share group of the current OpenGL context, which is created
+        and uploaded on first use
+        """
+        indices = self.faces if kind == 'faces' else self.edges_every(step)
+        key = (QtGui.QOpenGLContext.currentContext().shareGroup(), kind, step)
+        ibo = self._index_buffers.get(key)
+        if ibo is None or not ibo.isCreated():
+            ibo = QtOpenGL.QOpenGLBuffer(
+                QtOpenGL.QOpenGLBuffer.Type.IndexBuffer
+            )
+            ibo.create()
+            ibo.bind()
+            ibo.allocate(indices, indices.nbytes)
+            ibo.release()
+            self._index_buffers[key] = ibo
+        return ibo
+
+
+@functools.lru_cache(maxsize=32)
+def grid_topology(rows, cols) -> GridTopology:
+    """ Shared topology of a grid of rows x cols vertexes """
+    return GridTopology(rows, cols)
+
+
+def block_average(vertexes):
+    """
+    Average blocks of 2 x 2 vertexes of a (rows, cols, 3) vertex array. An odd
+    last row or column is averaged with itself, such that the edges of the
+    grid are kept.
+    """
+    rows, cols = vertexes.shape[:2]
+    if rows % 2:
+        vertexes = np.concatenate((vertexes, vertexes[-1:]), axis=0)
+    if cols % 2:
+        vertexes = np.concatenate((vertexes, vertexes[:, -1:]), axis=1)
+    rows, cols = vertexes.shape[:2]
+    blocks = vertexes.reshape(rows//2, 2, cols//2, 2, 3)
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
 
 
 class GLSurfacePlotItem(GLMeshItem):
     """
     **Bases:** :class:`GLMeshItem <pyqtgraph.opengl.GLMeshItem>`
-    
-    Displays a surface plot on a regular x,y grid with optional wireframe overlay.
+
+    Displays a surface plot on a regular x,y grid with optional wireframe
+    overlay.
     """
 
     mesh_keys = ('x', 'y', 'z', 'colors')
     grid_keys = ('showGrid', 'lineColor', 'lineWidth', 'lineAntialias')
+    colormap_keys = ('colormap', 'clim')
+    lod_keys = ('lod', 'lodPixels', 'gridPixels')
+    lod_min_size = 4
+    _colormapProgram = None
+    _colorProgram = None
 
     def __init__(self, parentItem=None, **kwds):
         """
-        The x, y, z, colors, showGrid, lineColor, lineWidth and lineAntialias
-        arguments are passed to setData().
+        The x, y, z, colors, showGrid, lineColor, lineWidth, lineAntialias,
+        colormap, clim, lod, lodPixels and gridPixels arguments are passed to
+        setData().
         All other keyword arguments are passed to GLMeshItem.__init__().
         """
         self._x = None
@@ -34,10 +147,26 @@ class GLSurfacePlotItem(GLMeshItem):
         self._lineWidth = 1.0
         self._lineAntialias = False
         self._vertexes = None
+        self._topology = None
+        self._shared_ibo = False
+        self._colormap = ItemColormap()
+        # whether self.colors are colormap colors, and whether they're stale
+        self._lit_colors = False
+        self._lit_colors_stale = False
+        self._lod = False
+        self._lodPixels = 2.0
+        self._gridPixels = None
+        self._levels = None
+        self._level_vbos = []
+        self._extent = None
+        self.lodSuspended = False
+        self._dirty_bits = DirtyFlag(0)
         self._meshdata = MeshData()
 
         # splitout GLSurfacePlotItem from kwds
-        surface_keys = self.mesh_keys + self.grid_keys
+        surface_keys = (
+            self.mesh_keys + self.grid_keys + self.colormap_keys + self.lod_keys
+        )
         surface_kwds = {}
         for arg in surface_keys:
             if arg in kwds:
@@ -45,7 +174,9 @@ class GLSurfacePlotItem(GLMeshItem):
 
         super().__init__(meshdata=self._meshdata, **kwds)
         
-        self.lineplot = GLLinePlotItem(parentItem=self, mode='lines', glOptions='translucent')
+        self.lineplot = GLWireframeItem(
+            parentItem=self, glOptions='translucent'
+        )
         # in GLViewWidget.drawItemTree(), at the same depth value, child items
         # come before the parent. make it such that our grid lines get drawn
         # after the surface mesh.
@@ -56,13 +187,15 @@ class GLSurfacePlotItem(GLMeshItem):
         
     def setData(self, **kwds):
         """
-        Update the data in this surface plot. 
-        
-        ==============  =====================================================================
+        Update the data in this surface plot.
+
+        ==============  ======================================================
         **Arguments:**
-        x,y             1D or 2D arrays of values specifying positions of vertexes.
+        x,y             1D or 2D arrays of values specifying positions of
+                        vertexes.
                         If 1D: shape (N,) - interpreted as grid coordinates
-                        If 2D: shape (rows, cols) - interpreted as per-vertex positions
+                        If 2D: shape (rows, cols) - interpreted as per-vertex
+                        positions
                         If omitted, integers are assumed.
         z               2D array of height values, shape (rows, cols)
         colors          (width, height, 4) array of vertex colors.
@@ -70,162 +203,467 @@ class GLSurfacePlotItem(GLMeshItem):
         lineColor       Color of the grid lines.
         lineWidth       Width of the grid lines.
         lineAntialias   Enable antialiasing for the grid lines.
-        ==============  =====================================================================
-        
+        colormap        Name of a colormap, which colors the surface by height
+                        on the GPU, or None to use the colors. With a shader,
+                        the colors are computed on the CPU instead, such that
+                        the shader lights them.
+        clim            (low, high) heights of the colormap's first and last
+                        color, or None for the range of z.
+        lod             Draw a level of detail, which averages blocks of
+                        vertexes, depending on the size of the surface on
+                        screen. Requires the default shader and no vertex
+                        colors.
+        lodPixels       Pixels per grid cell below which a coarser level is
+                        drawn.
+        gridPixels      Minimum pixels between wireframe lines, or None to
+                        draw all lines of the drawn level.
+        ==============  ======================================================
+
         All arguments are optional.
-        
-        Note that if vertex positions are updated, the normal vectors for each triangle must 
-        be recomputed. This is somewhat expensive if the surface was initialized with smooth=False
-        and very expensive if smooth=True. For faster performance, initialize with 
-        computeNormals=False and use per-vertex colors or a normal-independent shader program.
+
+        Note that if vertex positions are updated, the normal vectors for each
+        triangle must be recomputed. This is somewhat expensive if the surface
+        was initialized with smooth=False and very expensive if smooth=True.
+        For faster performance, initialize with computeNormals=False and use
+        per-vertex colors or a normal-independent shader program.
         """
 
-        for arg in self.grid_keys:
-            if arg in kwds:
-                setattr(self, '_' + arg, kwds[arg])
+        self._set_options(kwds)
+        if not any(key in kwds for key in self.mesh_keys + self.grid_keys):
+            return
 
         x, y, z, colors = map(kwds.get, self.mesh_keys)
+        self._set_coordinates(x, y, z)
 
-        if x is not None:
-            x_shape = np.asarray(x).shape
-            if self._x is None or self._x_shape != x_shape:
-                self._vertexes = None
-            self._x = x
-            self._x_shape = x_shape
-        
-        if y is not None:
-            y_shape = np.asarray(y).shape
-            if self._y is None or self._y_shape != y_shape:
-                self._vertexes = None
-            self._y = y
-            self._y_shape = y_shape
-        
-        if z is not None:
-            if self._x is not None and z.shape[0] != self._x_shape[0]:
-                raise Exception('Z values must have shape (len(x), len(y)) or match x.shape[0]')
-            if self._y is not None and z.shape[1] != self._y_shape[-1]:  # -1 handles both 1D and 2D
-                raise Exception('Z values must have shape (len(x), len(y)) or match y.shape[-1]')
-            self._z = z
-            if self._vertexes is not None and self._z.shape != self._vertexes.shape[:2]:
-                self._vertexes = None
-        
         if colors is not None:
             self._colors = colors
             self._meshdata.setVertexColors(colors)
-        
+
         if self._z is None:
             return
-        
+
         updateMesh = False
         newVertexes = False
-        
+
         ## Generate vertex and face array
         if self._vertexes is None:
             newVertexes = True
-            self._vertexes = np.empty((self._z.shape[0], self._z.shape[1], 3), dtype=np.float32)
+            self._vertexes = np.empty(
+                (self._z.shape[0], self._z.shape[1], 3), dtype=np.float32
+            )
             self.generateFaces()
             self._meshdata.setFaces(self._faces)
             updateMesh = True
-        
+
         ## Copy x, y, z data into vertex array
-        if newVertexes or x is not None:
-            if x is None:
-                if self._x is None:
-                    x = np.arange(self._z.shape[0])
-                else:
-                    x = self._x
-            
-            x_arr = np.asarray(x)
-            if x_arr.ndim == 1:
-                self._vertexes[:, :, 0] = x_arr.reshape(len(x_arr), 1)
-            elif x_arr.ndim == 2:
-                if x_arr.shape != self._vertexes.shape[:2]:
-                    raise Exception(f'x shape {x_arr.shape} must match z shape {self._z.shape}')
-                self._vertexes[:, :, 0] = x_arr
-            updateMesh = True
-        
-        if newVertexes or y is not None:
-            if y is None:
-                if self._y is None:
-                    y = np.arange(self._z.shape[1])
-                else:
-                    y = self._y
-            
-            y_arr = np.asarray(y)
-            if y_arr.ndim == 1:
-                self._vertexes[:, :, 1] = y_arr.reshape(1, len(y_arr))
-            elif y_arr.ndim == 2:
-                if y_arr.shape != self._vertexes.shape[:2]:
-                    raise Exception(f'y shape {y_arr.shape} must match z shape {self._z.shape}')
-                self._vertexes[:, :, 1] = y_arr
-            updateMesh = True
-        
+        for axis, values, current in ((0, x, self._x), (1, y, self._y)):
+            if newVertexes or values is not None:
+                self._write_coordinate(
+                    axis, current if values is None else values
+                )
+                updateMesh = True
+
         if newVertexes or z is not None:
-            self._vertexes[...,2] = self._z
+            self._vertexes[..., 2] = self._z
             updateMesh = True
 
+        copy_counter.record(
+            'GLSurfacePlotItem', self._vertexes.nbytes if updateMesh else 0
+        )
+
         ## Update MeshData
         if updateMesh:
-            self._meshdata.setVertexes(self._vertexes.reshape(self._vertexes.shape[0]*self._vertexes.shape[1], 3))
+            self._levels = self._extent = None
+            self._meshdata.setVertexes(self._vertexes.reshape(-1, 3))
             self.meshDataChanged()
 
         # rebuild grid whenever mesh or parent changes
         self._update_grid()
 
+    def _set_options(self, kwds):
+        """Apply the grid, level of detail and colormap arguments of kwds."""
+        for arg in self.grid_keys + self.lod_keys:
+            if arg in kwds:
+                setattr(self, '_' + arg, kwds[arg])
+        if any(key in kwds for key in self.lod_keys):
+            self.update()
+
+        if 'colormap' in kwds:
+            self._colormap.setColormap(kwds['colormap'])
+            self._lit_colors_stale = True
+            self.update()
+        if 'clim' in kwds:
+            self._colormap.setClim(kwds['clim'])
+            self._lit_colors_stale = True
+            self.update()
+
+    def _set_coordinates(self, x, y, z):
+        """
+        Store the given coordinates, discarding the vertex array if its shape
+        changes
+        """
+        if x is not None:
+            x_shape = np.asarray(x).shape
+            if self._x is None or self._x_shape != x_shape:
+                self._vertexes = None
+            self._x = x
+            self._x_shape = x_shape
+
+        if y is not None:
+            y_shape = np.asarray(y).shape
+            if self._y is None or self._y_shape != y_shape:
+                self._vertexes = None
+            self._y = y
+            self._y_shape = y_shape
+
+        if z is not None:
+            if self._x is not None and z.shape[0] != self._x_shape[0]:
+                raise ValueError(
+                    'Z values must have shape (len(x), len(y)) or match '
+                    'x.shape[0]'
+                )
+            # -1 handles both 1D and 2D
+            if self._y is not None and z.shape[1] != self._y_shape[-1]:
+                raise ValueError(
+                    'Z values must have shape (len(x), len(y)) or match '
+                    'y.shape[-1]'
+                )
+            self._z = z
+            self._colormap.scalarsChanged()
+            if (self._vertexes is not None
+                    and self._z.shape != self._vertexes.shape[:2]):
+                self._vertexes = None
+
+    def _write_coordinate(self, axis, values):
+        """
+        Copy the x (axis 0) or y (axis 1) coordinates into the vertex array,
+        which are integers if values is None
+        """
+        if values is None:
+            values = np.arange(self._z.shape[axis])
+        values = np.asarray(values)
+        if values.ndim == 1:
+            shape = (-1, 1) if axis == 0 else (1, -1)
+            self._vertexes[:, :, axis] = values.reshape(shape)
+        elif values.ndim == 2:
+            if values.shape != self._vertexes.shape[:2]:
+                raise ValueError(
+                    f'{"xy"[axis]} shape {values.shape} must match z shape '
+                    f'{self._z.shape}'
+                )
+            self._vertexes[:, :, axis] = values
+
+    def set_z(self, z, colors=None):
+        """
+        Replace the height values, keeping the faces and the x and y vertex
+        coordinates. If colors is given, it replaces the face colors.
+
+        Only the z coordinates of the vertexes are rewritten, which the
+        wireframe draws from, and normals are only recomputed if a shader is
+        set. Falls back to setData() if the shape of z changes.
+
+        With lod, the levels of detail are discarded, as every block of them
+        changes. They're rebuilt once a coarser level is drawn, which costs
+        about a third of the vertexes per drawn frame while z is streamed.
+        """
+        z = np.asarray(z)
+        if self._vertexes is None or z.shape != self._vertexes.shape[:2]:
+            self.setData(z=z)
+            if colors is not None:
+                self._meshdata.setFaceColors(colors)
+            return
+        self._z = z
+        self._vertexes[..., 2] = z
+        self._colormap.scalarsChanged()
+        self._lit_colors_stale = True
+        self._levels = self._extent = None
+        copy_counter.record('GLSurfacePlotItem.set_z', z.size*4)
+
+        md = self._meshdata
+        if colors is not None:
+            md.setFaceColors(colors)
+        if (self.vertexes is not None
+                and not np.shares_memory(self.vertexes, self._vertexes)):
+            # face indexed meshes, such as with smooth=False, hold copies of
+            # the vertexes, which are only updated by parsing the mesh again
+            md.setVertexes(self._vertexes.reshape(-1, 3))
+            self.meshDataChanged()
+        elif self.vertexes is not None:
+            # the mesh has been parsed and shares the vertex array
+            self._dirty_bits |= DirtyFlag.POSITION
+            if self.opts['computeNormals'] and self.opts['shader'] is not None:
+                md.resetNormals()
+                self.normals = md.vertexNormals()
+                self._dirty_bits |= DirtyFlag.NORMAL
+            if colors is not None:
+                self.colors = md.faceColors()
+                self._dirty_bits |= DirtyFlag.COLOR
+            if self.opts['drawEdges']:
+                self._dirty_bits |= DirtyFlag.EDGE_VERTS
+
+        # the wireframe draws from the vertex array, which changed in place
+        self.lineplot.vertexesChanged()
+        self.update()
+
+    def meshDataChanged(self):
+        super().meshDataChanged()
+        self._lit_colors = False
+
+    def parseMeshData(self):
+        dirty_bits = super().parseMeshData() | self._dirty_bits
+        self._dirty_bits = DirtyFlag(0)
+        if DirtyFlag.FACES in dirty_bits and self._shares_faces():
+            # use the cached faces instead of the copy made by MeshData
+            self.faces = self._topology.faces
+        return dirty_bits
+
+    def upload_vertex_buffers(self, dirty_bits):
+        if DirtyFlag.FACES in dirty_bits:
+            if self._shares_faces():
+                self.m_ibo_faces = self._topology.index_buffer()
+                self._shared_ibo = True
+                dirty_bits &= ~DirtyFlag.FACES
+            elif self._shared_ibo:
+                # never overwrite or destroy the shared index buffer
+                self.m_ibo_faces = QtOpenGL.QOpenGLBuffer(
+                    QtOpenGL.QOpenGLBuffer.Type.IndexBuffer
+                )
+                self._shared_ibo = False
+        super().upload_vertex_buffers(dirty_bits)
+
+    def _shares_faces(self):
+        """ Whether the mesh faces are those of the shared grid topology """
+        return (
+            self._topology is not None and self.faces is not None
+            and self._meshdata.faces() is self._topology.faces
+        )
+
+    @staticmethod
+    def getColormapProgram():
+        klass = GLSurfacePlotItem
+        if klass._colormapProgram is None:
+            klass._colormapProgram = compile_program(
+                SHADER_CORE, SHADER_LEGACY, ['a_position', 'a_scalar']
+            )
+        return klass._colormapProgram
+
+    @staticmethod
+    def getColorProgram():
+        klass = GLSurfacePlotItem
+        if klass._colorProgram is None:
+            klass._colorProgram = compile_program(
+                line_strip.SHADER_CORE, line_strip.SHADER_LEGACY,
+                ['a_position', 'a_color']
+            )
+        return klass._colorProgram
+
     def paint(self):
+        level, step = self._select_level()
         if self._showGrid:
             ogl.glEnable(ogl.GL_POLYGON_OFFSET_FILL)
             ogl.glPolygonOffset(1.0, 1.0)
-        super().paint()
+        if level > 0:
+            self._paint_level(level)
+        elif self._colormap.enabled and self.opts['shader'] is None:
+            self._paint_colormapped()
+        else:
+            self._update_lit_colors()
+            super().paint()
+        # the wireframe is drawn after the surface, from the same level
+        if level > 0:
+            self.lineplot.setSource(
+                self._level_vbos[level - 1],
+                grid_topology(*self._levels[level].shape[:2]), step
+            )
+        else:
+            self.lineplot.setSource(step=step)
         if self._showGrid:
             ogl.glDisable(ogl.GL_POLYGON_OFFSET_FILL)
             ogl.glPolygonOffset(0.0, 0.0)
 
-    def generateFaces(self):
-        cols = self._z.shape[1]-1
-        rows = self._z.shape[0]-1
-        faces = np.empty((cols*rows*2, 3), dtype=np.uint32)
-        rowtemplate1 = np.arange(cols).reshape(cols, 1) + np.array([[0, 1, cols+1]])
-        rowtemplate2 = np.arange(cols).reshape(cols, 1) + np.array([[cols+1, 1, cols+2]])
-        for row in range(rows):
-            start = row * cols * 2 
-            faces[start:start+cols] = rowtemplate1 + row * (cols+1)
-            faces[start+cols:start+(cols*2)] = rowtemplate2 + row * (cols+1)
-        self._faces = faces
+    def _update_lit_colors(self):
+        """
+        Color the vertexes by the colormap on the CPU if a shader is set, as
+        the colormap program has no lighting, or drop the colormap colors
+        """
+        if not self._colormap.enabled or self.opts['shader'] is None:
+            if self._lit_colors:
+                self.meshDataChanged()
+            return
+        self._dirty_bits = self.parseMeshData()
+        if self.vertexes is None:
+            return
+        if not self._lit_colors or self._lit_colors_stale:
+            self.colors = self._colormap.colors(
+                self.vertexes[..., 2], self._vertexes[..., 2]
+            )
+            self._dirty_bits |= DirtyFlag.COLOR
+            self._lit_colors = True
+            self._lit_colors_stale = False
 
-    @staticmethod
-    def _broadcast_coords(coords, target_shape, z_shape, reshaped):
-        """Broadcast 1D coords or use 2D coords directly."""
-        if coords is None:
-            coords = np.arange(target_shape)
-        coords = np.asarray(coords)
-        if coords.ndim == 1:
-            coords = np.broadcast_to(coords.reshape(*reshaped), z_shape)
-        return coords
+    def _paint_colormapped(self):
+        """ Draw the faces, colored by the z coordinate of the vertexes """
+        self.setupGLState()
+        if (dirty_bits := self.parseMeshData()):
+            self.upload_vertex_buffers(dirty_bits)
+        if not self.opts['drawFaces'] or self.vertexes is None:
+            return
+        if (faces := self.faces) is None:
+            count = np.prod(self.vertexes.shape[:-1])
+            self._draw_faces(self.m_vbo_position, None, count)
+        else:
+            self._draw_faces(self.m_vbo_position, self.m_ibo_faces, faces.size)
 
-    def _update_grid(self):
-        if not self._showGrid or self._z is None:
+    def _paint_level(self, level):
+        """ Draw the faces of a level of detail from its vertex buffer """
+        self.setupGLState()
+        if not self.opts['drawFaces']:
             return
+        vbo = self._level_vbos[level - 1]
+        vbo.upload()
+        topology = grid_topology(*self._levels[level].shape[:2])
+        self._draw_faces(
+            vbo.vbo, topology.index_buffer('faces'), topology.faces.size
+        )
+
+    def _draw_faces(self, vbo, ibo, count):
+        """
+        Draw count vertexes of vbo as triangles, indexed by ibo if given, with
+        the colormap or the uniform color
+        """
+        mat_mvp = self.mvpMatrix()
+        mat_mvp = np.array(mat_mvp.data(), dtype=np.float32)
+        colormapped = self._colormap.enabled
+        if colormapped:
+            program = self.getColormapProgram()
+        else:
+            program = self.getColorProgram()
 
-        opts = {
-            'antialias':  self._lineAntialias,
-            'color':      self._lineColor,
-            'width':      self._lineWidth,
-        }
+        vbo.bind()
+        ogl.glVertexAttribPointer(0, 3, ogl.GL_FLOAT, False, 0, None)
+        vbo.release()
+        ogl.glEnableVertexAttribArray(0)
+        if colormapped:
+            # the scalar is the z component of the positions
+            scalar_pointer(1, vbo, component=2)
+            ogl.glEnableVertexAttribArray(1)
+        else:
+            color = self.opts['color']
+            if isinstance(color, QtGui.QColor):
+                color = color.getRgbF()
+            ogl.glVertexAttrib4f(1, *color)
 
-        z = self._z.astype(np.float32)
-        rows, cols = z.shape
+        with program:
+            loc = ogl.glGetUniformLocation(program, 'u_mvp')
+            ogl.glUniformMatrix4fv(loc, 1, False, mat_mvp)
+            if colormapped:
+                self._colormap.bind(program, self._vertexes[..., 2])
+            if ibo is None:
+                ogl.glDrawArrays(ogl.GL_TRIANGLES, 0, count)
+            else:
+                ibo.bind()
+                ogl.glDrawElements(
+                    ogl.GL_TRIANGLES, count, ogl.GL_UNSIGNED_INT, None
+                )
+                ibo.release()
+            if colormapped:
+                self._colormap.release()
 
-        xvals = self._broadcast_coords(self._x, rows, z.shape, (rows, 1))
-        yvals = self._broadcast_coords(self._y, cols, z.shape, (1, cols))
+        ogl.glDisableVertexAttribArray(0)
+        if colormapped:
+            ogl.glDisableVertexAttribArray(1)
 
-        verts_flat = np.column_stack((xvals.ravel(), yvals.ravel(), z.ravel()))
+    def _build_levels(self):
+        """
+        Builds the pyramid of levels of detail, of which each level averages
+        blocks of 2 x 2 vertexes of the previous level, down to a few rows or
+        columns
+        """
+        levels = [self._vertexes]
+        while min(levels[-1].shape[:2]) > 2*self.lod_min_size:
+            levels.append(block_average(levels[-1]))
+        for level, vertexes in enumerate(levels[1:]):
+            if level == len(self._level_vbos):
+                self._level_vbos.append(RangeUploadBuffer())
+            self._level_vbos[level].set(vertexes.reshape(-1, 3))
+        copy_counter.record(
+            'GLSurfacePlotItem.lod', sum(v.nbytes for v in levels[1:])
+        )
+        self._levels = levels
+
+    def _level_count(self):
+        """
+        Number of levels of detail _build_levels() builds, including the full
+        resolution, without building them
+        """
+        rows, cols = self._vertexes.shape[:2]
+        count = 1
+        while min(rows, cols) > 2*self.lod_min_size:
+            rows, cols = (rows + 1)//2, (cols + 1)//2
+            count += 1
+        return count
+
+    def _select_level(self):
+        """
+        The level of detail for the current view, of which a grid cell covers
+        about lodPixels pixels, and the step between wireframe lines, such
+        that they are at least gridPixels pixels apart
+        """
+        view = self.view()
+        # the levels are drawn unlit, without the colors of the vertexes
+        plain = not (
+            self._meshdata.hasVertexColor() or self._meshdata.hasFaceColor()
+            or self.opts['shader'] is not None
+        )
+        if (not self._lod or self.lodSuspended or view is None
+                or self._vertexes is None or not plain):
+            return 0, 1
+        pixels = self._projected_size()
+        if pixels is None:
+            return 0, 1
+        # pixels per grid cell along the diagonal at full resolution
+        cells = np.hypot(*self._vertexes.shape[:2])
+        cell_pixels = pixels/cells
+        level, count = 0, self._level_count()
+        while level + 1 < count and cell_pixels*2**level < self._lodPixels:
+            level += 1
+        if level > 0 and self._levels is None:
+            # only built once drawn, as full resolution needs no levels
+            self._build_levels()
+        step = 1
+        if self._gridPixels:
+            while cell_pixels*2**level*step < self._gridPixels:
+                step *= 2
+        return level, step
 
-        idx = np.arange(z.size, dtype=np.int32).reshape(*z.shape)
-        h = np.column_stack((idx[:, :-1].ravel(), idx[:, 1:].ravel()))
-        v = np.column_stack((idx[:-1, :].ravel(), idx[1:, :].ravel()))
-        edges = np.vstack((h, v))
+    def _projected_size(self):
+        """
+        Length in pixels of the diagonal of the surface's bounding box on the
+        screen, or None if part of it is behind the camera
+        """
+        if self._extent is None:
+            vertexes = self._vertexes.reshape(-1, 3)
+            self._extent = (
+                np.fmin.reduce(vertexes, axis=0),
+                np.fmax.reduce(vertexes, axis=0),
+            )
+        return projected_size(self, *self._extent)
+
+    def generateFaces(self):
+        self._topology = grid_topology(*self._z.shape)
+        self._faces = self._topology.faces
+
+    def _update_grid(self):
+        self.lineplot.setVisible(self._showGrid)
+        if not self._showGrid or self._z is None:
+            return
 
-        pts = verts_flat[edges].reshape(-1, 3)
+        # the wireframe indexes the float32 vertex array, without copying it
+        self.lineplot.setData(
+            vertexes=self._vertexes.reshape(-1, 3),
+            topology=grid_topology(*self._vertexes.shape[:2]),
+            antialias=self._lineAntialias,
+            color=self._lineColor,
+            width=self._lineWidth,
+        )
 
-        self.lineplot.setData(pos=pts, **opts)
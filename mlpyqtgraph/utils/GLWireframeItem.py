@@ -0,0 +1,146 @@
+import numpy as np
+from OpenGL import GL
+from pyqtgraph import functions as fn
+from pyqtgraph.Qt import QtGui
+from pyqtgraph.opengl.GLGraphicsItem import GLGraphicsItem
+
+from mlpyqtgraph.utils.glbuffers import RangeUploadBuffer, compile_program
+from mlpyqtgraph.utils.GLLineStripItem import SHADER_CORE, SHADER_LEGACY
+
+
+__all__ = ["GLWireframeItem"]
+
+
+class GLWireframeItem(GLGraphicsItem):
+    """
+    Draws the edges of a grid as lines, straight from the grid's vertex array.
+
+    The lines are drawn through the shared edge index buffer of the grid's
+    topology, instead of copying both vertices of every edge. Modifying the
+    vertex array in place only requires the changed vertices to be uploaded.
+    While painting, the parent item can switch the wireframe to another vertex
+    buffer, such as that of a level of detail, and thin out the grid lines.
+    """
+
+    _shaderProgram = None
+
+    def __init__(self, parentItem=None, **kwds):
+        """All keyword arguments are passed to setData()."""
+        super().__init__()
+        glopts = kwds.pop("glOptions", "translucent")
+        self.setGLOptions(glopts)
+        self.vertexes = None
+        self.topology = None
+        self.color = (1.0, 1.0, 1.0, 1.0)
+        self.width = 1.0
+        self.antialias = False
+        self._vbo = RangeUploadBuffer()
+        self._source = None
+        self._step = 1
+
+        self.setParentItem(parentItem)
+        self.setData(**kwds)
+
+    def setData(self, **kwds):
+        """
+        Update the data displayed by this item. All arguments are optional.
+
+        ====================  ==================================================
+        **Arguments:**
+        ------------------------------------------------------------------------
+        vertexes              (N,3) float32 array of vertex locations, which is
+                              uploaded as a whole.
+        topology              GridTopology, of which the edges index vertexes.
+        color                 tuple of floats (0.0-1.0) specifying the line
+                              color.
+        width                 float specifying the line width in pixels.
+        antialias             enables smooth line drawing.
+        ====================  ==================================================
+        """
+        args = ["vertexes", "topology", "color", "width", "antialias"]
+        for k in kwds:
+            if k not in args:
+                raise ValueError(
+                    f"Invalid keyword argument: {k} (allowed arguments are "
+                    f"{', '.join(args)})"
+                )
+
+        if "vertexes" in kwds:
+            self.vertexes = kwds.pop("vertexes")
+            self._vbo.set(self.vertexes)
+
+        if "color" in kwds:
+            color = kwds.pop("color")
+            if isinstance(color, str):
+                color = fn.mkColor(color)
+            if isinstance(color, QtGui.QColor):
+                color = color.getRgbF()
+            self.color = tuple(color)
+
+        for k, v in kwds.items():
+            setattr(self, k, v)
+
+        self.update()
+
+    def vertexesChanged(self, start=0, stop=None):
+        """Mark vertexes start to stop as modified in place."""
+        if self.vertexes is None:
+            return
+        self._vbo.mark(start, len(self.vertexes) if stop is None else stop)
+        self.update()
+
+    def setSource(self, vbo=None, topology=None, step=1):
+        """
+        Draw every step-th grid line of topology from vbo, the vertex buffer
+        of another item, or from the own vertexes if vbo is None. Doesn't
+        schedule an update, such that it can be called while painting.
+        """
+        self._source = None if vbo is None else (vbo, topology)
+        self._step = step
+
+    @staticmethod
+    def getShaderProgram():
+        klass = GLWireframeItem
+        if klass._shaderProgram is None:
+            klass._shaderProgram = compile_program(
+                SHADER_CORE, SHADER_LEGACY, ["a_position", "a_color"]
+            )
+        return klass._shaderProgram
+
+    def paint(self):
+        if self._source is not None:
+            vbo, topology = self._source
+        elif self.vertexes is not None and self.topology is not None:
+            vbo, topology = self._vbo, self.topology
+        else:
+            return
+        self.setupGLState()
+        vbo.upload()
+        ibo = topology.index_buffer("edges", self._step)
+        count = topology.edges_every(self._step).size
+
+        mat_mvp = self.mvpMatrix()
+        mat_mvp = np.array(mat_mvp.data(), dtype=np.float32)
+        program = self.getShaderProgram()
+
+        vbo.vbo.bind()
+        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, False, 0, None)
+        vbo.vbo.release()
+        GL.glEnableVertexAttribArray(0)
+        GL.glVertexAttrib4f(1, *self.color)
+
+        if self.antialias:
+            GL.glEnable(GL.GL_LINE_SMOOTH)
+            GL.glHint(GL.GL_LINE_SMOOTH_HINT, GL.GL_NICEST)
+        GL.glLineWidth(self.width)
+
+        with program:
+            loc = GL.glGetUniformLocation(program, "u_mvp")
+            GL.glUniformMatrix4fv(loc, 1, False, mat_mvp)
+            ibo.bind()
+            GL.glDrawElements(GL.GL_LINES, count, GL.GL_UNSIGNED_INT, None)
+            ibo.release()
+
+        GL.glDisableVertexAttribArray(0)
+        if self.antialias:
+            GL.glDisable(GL.GL_LINE_SMOOTH)
@@ -0,0 +1,143 @@
+import importlib
+
+import numpy as np
+from OpenGL import GL
+from OpenGL.GL import shaders
+from pyqtgraph.Qt import QT_LIB, QtGui
+
+if QT_LIB in {"PyQt5", "PySide2"}:
+    QtOpenGL = QtGui
+else:
+    QtOpenGL = importlib.import_module(f"{QT_LIB}.QtOpenGL")
+
+
+__all__ = [
+    "QtOpenGL", "RangeUploadBuffer", "compile_program", "projected_size",
+]
+
+
+def compile_program(core_sources, legacy_sources, attributes):
+    """
+    Compile a shader program for the current context, using the core or
+    legacy shader sources depending on the context's version. The attributes
+    are bound to locations 0, 1, ... in the given order.
+    """
+    ctx = QtGui.QOpenGLContext.currentContext()
+    fmt = ctx.format()
+
+    if ctx.isOpenGLES():
+        core = fmt.version() >= (3, 0)
+        glsl_version = "#version 300 es\n" if core else ""
+    else:
+        core = fmt.version() >= (3, 1)
+        glsl_version = "#version 140\n" if core else ""
+    sources = core_sources if core else legacy_sources
+
+    compiled = [
+        shaders.compileShader([glsl_version, v], k) for k, v in sources.items()
+    ]
+    program = shaders.compileProgram(*compiled)
+    for location, name in enumerate(attributes):
+        GL.glBindAttribLocation(program, location, name)
+    GL.glLinkProgram(program)
+    return program
+
+
+def projected_size(item, low, high):
+    """
+    Length in pixels of the diagonal of the box from low to high, in the
+    coordinates of item, on the screen of its view. None if the item has no
+    view or part of the box is behind the camera.
+    """
+    view = item.view()
+    if view is None:
+        return None
+    corners = np.array(
+        [[x, y, z, 1.0] for x in (low[0], high[0])
+         for y in (low[1], high[1]) for z in (low[2], high[2])]
+    )
+    mvp = np.array(item.mvpMatrix().data()).reshape(4, 4)
+    clip = corners @ mvp
+    if np.any(clip[:, 3] <= 0) or not np.all(np.isfinite(clip)):
+        return None
+    ndc = clip[:, :2] / clip[:, 3:]
+    size = (ndc.max(axis=0) - ndc.min(axis=0)) / 2
+    size *= (view.deviceWidth(), view.deviceHeight())
+    return float(np.hypot(*size))
+
+
+class RangeUploadBuffer:
+    """
+    Vertex buffer object mirroring an array, which uploads only the rows that
+    were marked as changed. The whole array is uploaded if it is replaced and
+    the buffer is only reallocated if its size changes. With an index buffer
+    type, it mirrors an array of vertex indices instead.
+    """
+
+    def __init__(self, buffer_type=QtOpenGL.QOpenGLBuffer.Type.VertexBuffer):
+        self.vbo = QtOpenGL.QOpenGLBuffer(buffer_type)
+        self.array = None
+        self._ranges = []
+        self._reallocate = True
+
+    def set(self, array):
+        """Mirror array, which is uploaded as a whole."""
+        self.array = array
+        self._ranges.clear()
+        self._reallocate = True
+
+    def sync(self, array, changed):
+        """
+        Mirror array, of which only the changed slices need to be uploaded if
+        it is the array that is already mirrored.
+        """
+        if array is not self.array:
+            self.set(array)
+            return
+        for rows in changed:
+            self.mark(rows.start, rows.stop)
+
+    def mark(self, start, stop):
+        """Mark rows start to stop of the array as changed."""
+        if stop > start:
+            self._ranges.append((start, stop))
+
+    @property
+    def pending(self):
+        """True if an upload is required."""
+        return self._reallocate or bool(self._ranges)
+
+    def merged_ranges(self):
+        """Changed row ranges, sorted and with overlapping ranges merged."""
+        merged = []
+        for start, stop in sorted(self._ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], stop)
+            else:
+                merged.append([start, stop])
+        return merged
+
+    def upload(self):
+        """Upload the changed rows, requires a current OpenGL context."""
+        if self.array is None:
+            if self.vbo.isCreated():
+                self.vbo.destroy()
+            return
+        if not self.vbo.isCreated():
+            self.vbo.create()
+            self._reallocate = True
+        if not self.pending:
+            return
+        self.vbo.bind()
+        if self.vbo.size() != self.array.nbytes:
+            self.vbo.allocate(self.array, self.array.nbytes)
+        elif self._reallocate:
+            self.vbo.write(0, self.array, self.array.nbytes)
+        else:
+            row_bytes = self.array.strides[0]
+            for start, stop in self.merged_ranges():
+                rows = self.array[start:stop]
+                self.vbo.write(start*row_bytes, rows, rows.nbytes)
+        self.vbo.release()
+        self._ranges.clear()
+        self._reallocate = False
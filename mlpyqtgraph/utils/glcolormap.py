@@ -0,0 +1,236 @@
+import ctypes
+import functools
+
+import numpy as np
+from OpenGL import GL
+from pyqtgraph import ColorMap, colormap
+from pyqtgraph.Qt import QtCore, QtGui
+
+
+__all__ = [
+    "FRAGMENT_CORE", "FRAGMENT_LEGACY", "ItemColormap", "LUT_SIZE",
+    "SHADER_CORE", "SHADER_LEGACY", "scalar_pointer",
+]
+
+
+LUT_SIZE = 256
+
+# maps the scalar of a fragment to the center of a texel of the lookup table
+COLORMAP_FUNCTION = f"""
+    uniform sampler2D u_lut;
+    uniform vec2 u_clim;
+    vec2 lut_coord(float scalar) {{
+        float t = clamp((scalar - u_clim.x)/(u_clim.y - u_clim.x), 0.0, 1.0);
+        return vec2((t*{LUT_SIZE - 1:.1f} + 0.5)/{LUT_SIZE:.1f}, 0.5);
+    }}
+"""
+
+FRAGMENT_LEGACY = f"""
+    #ifdef GL_ES
+    precision mediump float;
+    #endif
+    {COLORMAP_FUNCTION}
+    varying float v_scalar;
+    void main() {{
+        gl_FragColor = texture2D(u_lut, lut_coord(v_scalar));
+    }}
+"""
+
+FRAGMENT_CORE = f"""
+    #ifdef GL_ES
+    precision mediump float;
+    #endif
+    {COLORMAP_FUNCTION}
+    in float v_scalar;
+    out vec4 fragColor;
+    void main() {{
+        fragColor = texture(u_lut, lut_coord(v_scalar));
+    }}
+"""
+
+# colors vertices at a_position by the scalar a_scalar
+SHADER_LEGACY = {
+    GL.GL_VERTEX_SHADER: """
+        uniform mat4 u_mvp;
+        attribute vec4 a_position;
+        attribute float a_scalar;
+        varying float v_scalar;
+        void main() {
+            v_scalar = a_scalar;
+            gl_Position = u_mvp * a_position;
+        }
+    """,
+    GL.GL_FRAGMENT_SHADER: FRAGMENT_LEGACY,
+}
+
+SHADER_CORE = {
+    GL.GL_VERTEX_SHADER: """
+        uniform mat4 u_mvp;
+        in vec4 a_position;
+        in float a_scalar;
+        out float v_scalar;
+        void main() {
+            v_scalar = a_scalar;
+            gl_Position = u_mvp * a_position;
+        }
+    """,
+    GL.GL_FRAGMENT_SHADER: FRAGMENT_CORE,
+}
+
+
+_textures = {}
+_contexts = {}
+
+
+def lut_texture(name, lut):
+    """
+    Texture of the lookup table of a colormap, for the share group of the
+    current OpenGL context, which is created and uploaded on first use
+    """
+    context = QtGui.QOpenGLContext.currentContext()
+    group = context.shareGroup()
+    _track_context(context, group)
+    key = (group, name)
+    texture = _textures.get(key)
+    if texture is None:
+        texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        for param, value in (
+            (GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR),
+            (GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR),
+            (GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE),
+            (GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE),
+        ):
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, param, value)
+        GL.glTexImage2D(
+            GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, len(lut), 1, 0,
+            GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, lut
+        )
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        _textures[key] = texture
+    return texture
+
+
+def _track_context(context, group):
+    """Register a context using the textures of its share group."""
+    contexts = _contexts.setdefault(group, set())
+    if context not in contexts:
+        contexts.add(context)
+        context.aboutToBeDestroyed.connect(
+            functools.partial(_forget_context, context, group),
+            QtCore.Qt.ConnectionType.DirectConnection,
+        )
+
+
+def _forget_context(context, group):
+    """
+    Forget a destroyed context, and the textures of its share group once the
+    last context using them is destroyed, which frees the textures
+    """
+    contexts = _contexts.get(group, set())
+    contexts.discard(context)
+    if not contexts:
+        _contexts.pop(group, None)
+        for key in [key for key in _textures if key[0] == group]:
+            del _textures[key]
+
+
+def scalar_pointer(loc, vbo, component=None):
+    """
+    Point attribute loc at the bound vertex buffer. If component is given,
+    the scalar is that component of (N,3) float32 positions, such that no
+    separate scalar buffer is needed.
+    """
+    vbo.bind()
+    if component is None:
+        GL.glVertexAttribPointer(loc, 1, GL.GL_FLOAT, False, 0, None)
+    else:
+        GL.glVertexAttribPointer(
+            loc, 1, GL.GL_FLOAT, False, 12, ctypes.c_void_p(4*component)
+        )
+    vbo.release()
+
+
+class ItemColormap:
+    """
+    Colormap of a GL item, applied on the GPU to a scalar per vertex.
+
+    The colormap's lookup table is a texture, which is shared by all items
+    using the colormap, and the color limits are uniforms. Changing the
+    colormap or the limits therefore doesn't touch the vertex data. Without
+    explicit limits, the limits are the range of the scalars, which is only
+    recomputed after the scalars changed.
+    """
+
+    def __init__(self):
+        self.name = None
+        self.clim = None
+        self._lut = None
+        self._auto_clim = None
+
+    @property
+    def enabled(self):
+        """True if a colormap is set."""
+        return self.name is not None
+
+    def setColormap(self, name):
+        """Use the colormap with the given name, or no colormap if None."""
+        if name is not None and name != self.name:
+            self._lut = colormap.get(name).getLookupTable(
+                0.0, 1.0, LUT_SIZE, alpha=True, mode=ColorMap.BYTE
+            )
+            self._lut = np.ascontiguousarray(self._lut, dtype=np.uint8)
+        self.name = name
+
+    def setClim(self, clim):
+        """Fixed (low, high) color limits, or None for the scalar range."""
+        self.clim = None if clim is None else tuple(map(float, clim))
+
+    def scalarsChanged(self):
+        """Invalidate the automatic color limits."""
+        self._auto_clim = None
+
+    def limits(self, scalars):
+        """Color limits, the range of scalars unless fixed limits are set."""
+        if self.clim is not None:
+            return self.clim
+        if self._auto_clim is None:
+            scalars = np.asarray(scalars).reshape(-1)
+            low, high = 0.0, 1.0
+            if scalars.size:
+                low = float(np.fmin.reduce(scalars))
+                high = float(np.fmax.reduce(scalars))
+                if np.isnan(low):
+                    low, high = 0.0, 1.0
+            self._auto_clim = (low, high)
+        return self._auto_clim
+
+    def colors(self, values, scalars):
+        """
+        RGBA colors of values as uint8, like the colormap program colors
+        them, with automatic limits computed from scalars. Missing values get
+        the first color.
+        """
+        low, high = self.limits(scalars)
+        if high <= low:
+            high = low + 1.0
+        t = (np.asarray(values, dtype=np.float32) - low)/(high - low)
+        t = np.clip(np.nan_to_num(t), 0.0, 1.0)
+        return self._lut[np.rint(t*(LUT_SIZE - 1)).astype(np.intp)]
+
+    def bind(self, program, scalars):
+        """
+        Bind the lookup table to texture unit 0 and set the uniforms of the
+        current program, with automatic limits computed from scalars.
+        """
+        low, high = self.limits(scalars)
+        if high <= low:
+            high = low + 1.0
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, lut_texture(self.name, self._lut))
+        GL.glUniform1i(GL.glGetUniformLocation(program, "u_lut"), 0)
+        GL.glUniform2f(GL.glGetUniformLocation(program, "u_clim"), low, high)
+
+    @staticmethod
+    def release():
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
@@ -95,7 +95,12 @@ class LinearTransform:
         self.scale = (new[-1] - new[0])/(old[-1] - old[0])
         self.offset = new[0] - old[0]*self.scale
 
-    def __call__(self, array: np.ndarray) -> np.ndarray:
-        """ Apply the linear transformation """
-        return self.scale*array + self.offset
+    def __call__(self, array: np.ndarray,
+                 out: np.ndarray | None = None) -> np.ndarray:
+        """ Apply the linear transformation, optionally writing into out """
+        if out is None:
+            return self.scale*array + self.offset
+        np.multiply(array, self.scale, out=out, casting='unsafe')
+        out += self.offset
+        return out
         
\ No newline at end of file
@@ -3,11 +3,14 @@ This module contains all classes for handling the GUI figures and axes in mlpyqt
 
 """
 
+import contextlib
 import sys
 from pyqtgraph.Qt import QtWidgets
 from pyqtgraph.Qt import QtCore
+from pyqtgraph.Qt import QtGui
 import pyqtgraph as pg
-from pqthreads import refs
+from mlpyqtgraph.calls import CallTarget, gui_item
+from mlpyqtgraph.config import options
 
 
 pg.setConfigOption('background', 'w')
@@ -27,14 +30,20 @@ class NoFigureLayout(RootException):
     """ This Exception is raised the figure layout has not been set """
 
 
-class FigureWindow(QtCore.QObject):
+class SaveFigureError(RootException):
+    """ This Exception is raised if a figure can't be saved to a file """
+
+
+class FigureWindow(QtCore.QObject, CallTarget):
     """ Controls a figure window instance """
     triggered = QtCore.Signal()
     axis_factory = None
+    cached_attributes = ('width', 'height')
 
     def __init__(self, index, title='Figure', width=600, height=500, layout_type='pg', parent=None):
         super().__init__(parent=parent)
         self.index = index
+        self.axis = None
         self.layout_type = None
         self.window = self.setup_window(parent, width, height)
         self.change_layout(layout_type)
@@ -42,11 +51,23 @@ class FigureWindow(QtCore.QObject):
         self.window.show()
 
     def setup_window(self, parent, width, height):
-        """ Setup the figure window as QMainWindow """
+        """
+        Setup the figure window as QMainWindow, which is never mapped to the
+        screen in headless mode
+        """
         window = QtWidgets.QMainWindow(parent)
+        if options.get_option('headless'):
+            window.setAttribute(QtCore.Qt.WidgetAttribute.WA_DontShowOnScreen)
         window.resize(width, height)
+        window.installEventFilter(self)
         return window
 
+    def eventFilter(self, watched, event):
+        """ Publish the window size to the attribute cache after resizing """
+        if event.type() == QtCore.QEvent.Type.Resize:
+            self.publish('width', 'height')
+        return super().eventFilter(watched, event)
+
     def change_layout(self, layout_type='pg'):
         """
         Change the figure's layout type; 'pg' for pyqtgraph's native layout or 'Qt'
@@ -59,14 +80,17 @@ class FigureWindow(QtCore.QObject):
         self.layout_type = layout_type
         LayoutWidget = pg.GraphicsLayoutWidget
         if layout_type == 'Qt':
-            LayoutWidget = pg.opengl.GLViewWidget
+            # imported on demand, to avoid loading OpenGL for 2D figures
+            from pyqtgraph.opengl import GLViewWidget
+            LayoutWidget = GLViewWidget
         self.window.setCentralWidget(LayoutWidget())
         return True
 
     def add_axis(self, index):
         """ Adds an axis to the figure """
-        axis = refs.gui.get('axis').items[index]
+        axis = gui_item('axis', index)
         self.graphics_layout.addItem(axis)
+        self.axis = axis
 
     @property
     def graphics_layout(self):
@@ -109,6 +133,61 @@ class FigureWindow(QtCore.QObject):
         else:
             self.window.raise_()
 
+    def savefig(self, filename, dpi=None):
+        """
+        Saves the figure to an image file. If dpi is given, the figure is
+        rendered at dpi instead of the logical dpi of the screen.
+        """
+        scale = None if dpi is None else dpi/self.window.logicalDpiX()
+        if self.layout_type == 'Qt':
+            image = self.grab_3d(scale)
+        else:
+            image = self.render_2d(1.0 if scale is None else scale)
+        if dpi is not None:
+            dots_per_meter = round(dpi/0.0254)
+            image.setDotsPerMeterX(dots_per_meter)
+            image.setDotsPerMeterY(dots_per_meter)
+        if not image.save(str(filename)):
+            raise SaveFigureError(f'Unable to save figure to {filename}')
+
+    def render_2d(self, scale=1.0):
+        """ Renders the GraphicsLayoutWidget's scene into an image """
+        view = self.graphics_layout
+        image = QtGui.QImage(
+            view.size()*scale, QtGui.QImage.Format.Format_ARGB32
+        )
+        image.fill(view.backgroundBrush().color())
+        painter = QtGui.QPainter(image)
+        painter.setRenderHint(
+            QtGui.QPainter.RenderHint.Antialiasing,
+            options.get_option('antialiasing'),
+        )
+        target = QtCore.QRectF(image.rect())
+        view.render(painter, target, view.viewport().rect())
+        painter.end()
+        return image
+
+    def grab_3d(self, scale=None):
+        """
+        Renders the GLViewWidget into an image, with surfaces at full detail,
+        by temporarily resizing its framebuffer if a scale is given
+        """
+        view = self.graphics_layout
+        if self.axis is None:
+            full_detail = contextlib.nullcontext()
+        else:
+            self.axis.flush_update()
+            full_detail = self.axis.full_detail()
+        with full_detail:
+            if scale is None:
+                return view.grabFramebuffer()
+            size = view.size()
+            view.resize(size*scale)
+            try:
+                return view.grabFramebuffer()
+            finally:
+                view.resize(size)
+
     def delete(self):
         """ Closes the window """
         self.window.close()
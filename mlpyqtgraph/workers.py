@@ -4,9 +4,10 @@ This modules defines all worker thread related classes and instances
 
 from pqthreads import containers
 from pqthreads import refs
+from mlpyqtgraph.calls import CallDispatcher
 
 
-class AxisWorker(containers.WorkerItem):
+class AxisWorker(CallDispatcher, containers.WorkerItem):
     """ Worker thread axis to Control AxisWidget on the GUI thread """
     factory = containers.WorkerItem.get_factory()
     row = factory.attribute()
@@ -45,7 +46,7 @@ class AxisWorker(containers.WorkerItem):
     update = factory.method()
 
 
-class FigureWorker(containers.WorkerItem):
+class FigureWorker(CallDispatcher, containers.WorkerItem):
     """ Worker thread figure to control FigureWindow on the GUI thread"""
     factory = containers.WorkerItem.get_factory()
     width = factory.attribute()
@@ -54,6 +55,7 @@ class FigureWorker(containers.WorkerItem):
     change_layout = factory.method()
     add_axis = factory.method()
     has_axis = factory.method()
+    savefig = factory.method()
 
     def __init__(self, *args, **kwargs):
         self.axis = None
@@ -68,3 +70,37 @@ class FigureWorker(containers.WorkerItem):
         index = axis.index
         self.add_axis(index)
         self.axis = axis
+
+
+class LineWorker(CallDispatcher, containers.WorkerItem):
+    """ Worker thread line to control Line2D on the GUI thread """
+    factory = containers.WorkerItem.get_factory()
+    max_points = factory.attribute()
+    count = factory.attribute()
+    append = factory.method()
+    set_data = factory.method()
+
+
+class Item3DWorker(CallDispatcher, containers.WorkerItem):
+    """ Worker thread 3D item to control Item3D on the GUI thread """
+    factory = containers.WorkerItem.get_factory()
+    kind = factory.attribute()
+    count = factory.attribute()
+    visible = factory.attribute()
+    append = factory.method()
+    set_data = factory.method()
+    set_z = factory.method()
+    set_colormap = factory.method()
+    set_visible = factory.method()
+
+    def remove(self):
+        """ Removes the item from its axis, which invalidates the handle """
+        refs.worker.get('item3d').close(self)
+
+
+class AnimationWorker(CallDispatcher, containers.WorkerItem):
+    """ Worker thread animation to control Animation on the GUI thread """
+    factory = containers.WorkerItem.get_factory()
+    running = factory.attribute()
+    push = factory.method()
+    stop = factory.method()
@@ -0,0 +1,58 @@
+""" Tests of the 3D axis' limits and scheduled updates """
+
+import numpy as np
+import pyqtgraph as pg
+import pytest
+from pyqtgraph.opengl import GLViewWidget
+
+from mlpyqtgraph.axes3d import Axis3D
+
+
+@pytest.fixture
+def axis():
+    """ A 3D axis in a view, without showing the view """
+    pg.mkQApp()
+    view = GLViewWidget()
+    axis = Axis3D(0)
+    view.addItem(axis)
+    yield axis
+    view.deleteLater()
+
+
+def test_single_value_limits(axis):
+    """ Test that coordinates with a single value get ticks around it """
+    axis.add_points([0, 1], [1, np.nan], [0, 0])
+    axis.flush_update()
+    ticks = axis._layout[0]
+    assert ticks['y'][0] < 1 < ticks['y'][-1]
+    assert ticks['z'][0] < 0 < ticks['z'][-1]
+
+
+def test_failed_update(axis):
+    """ Test that the error of a scheduled update reaches the next call """
+    axis.add_points([0, 1, 2], [0, 1, 2], [0, 1, 0])
+    axis.label_fmt = 'invalid'
+    axis.update()
+    # the timer performs the update, which fails to format the labels
+    pg.QtCore.QCoreApplication.processEvents()
+    assert not axis._update_scheduled
+    axis.label_fmt = '.1f'
+    with pytest.raises(ValueError, match='invalid'):
+        axis.flush_update()
+    # the error is raised once, and the axis is updated from scratch
+    axis.flush_update()
+    assert axis._layout is not None
+    assert not any(item.dirty for item in axis._items)
+
+
+def test_invalid_surface_z(axis):
+    """ Test that heights of another shape leave the surface unchanged """
+    x = np.linspace(-1, 1, 5)
+    z = np.outer(x, x)
+    item = axis.add_surface(x, x, z)
+    axis.flush_update()
+    data, bounds = item.data, item.bounds
+    with pytest.raises(ValueError):
+        axis.set_surface_z(item, np.zeros((4, 5)))
+    assert item.data is data
+    assert item.bounds is bounds
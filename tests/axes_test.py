@@ -0,0 +1,19 @@
+""" Tests of the 2D axis' attributes """
+
+import pyqtgraph as pg
+
+from mlpyqtgraph.axes import Axis2D
+
+
+def test_labels():
+    """ Test that labels and units are read and published as they were set """
+    pg.mkQApp()
+    axis = Axis2D(0)
+    cache = axis.attribute_cache
+    axis.xlabel = 'x'
+    axis.xunits = 's'
+    axis.ylabel = 'y'
+    assert (axis.xlabel, axis.xunits, axis.ylabel) == ('x', 's', 'y')
+    assert cache.lookup('xlabel')[0] == 'x'
+    assert cache.lookup('xunits')[0] == 's'
+    assert cache.lookup('ylabel')[0] == 'y'
@@ -1,6 +1,48 @@
 """ Basic tests for mlpyqtgraph """
 
+import functools
+import time
+
+import numpy as np
+import pyqtgraph as pg
+import pytest
+from pqthreads import refs
+from pyqtgraph import functions as fn
+from pyqtgraph.Qt import QtGui
+
 import mlpyqtgraph as mpg
+from mlpyqtgraph.config import options
+from mlpyqtgraph.utils.glcolormap import LUT_SIZE
+
+
+def gui_object(agent, handle):
+    """
+    The GUI thread object of a worker handle, to check the result of calls
+    that have already been applied
+    """
+    return refs.gui.get(agent).get_item(handle.index)
+
+
+@functools.cache
+def gl_available():
+    """ Whether an OpenGL context can be created, to render 3D figures """
+    pg.mkQApp()
+    return QtGui.QOpenGLContext().create()
+
+
+@pytest.fixture
+def requires_gl():
+    """ Skips tests, which render 3D figures, if OpenGL isn't available """
+    if not gl_available():
+        pytest.skip('OpenGL is not available')
+
+
+def wait_until(condition, timeout=10.0):
+    """ Waits until the GUI thread has made condition true """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
 
 
 def test_simple_plot():
@@ -25,3 +67,419 @@ def test_decorator_option():
         fig.close()
 
     main()
+
+
+def test_batch():
+    """ Test sending batched calls to 2D and 3D axes """
+
+    @mpg.plotter(call_stats=True)
+    def main():
+        fig = mpg.figure(title='Test')
+        mpg.plot([1, 2, 3], [2, 3, 4])
+        ax = mpg.gca()
+        mpg.stats(reset=True)
+        with ax.batch():
+            ax.grid = True
+            ax.xlim = (0, 4)
+            ax.xlabel = 'x'
+            ax.xunits = 's'
+        # the assignments are applied in a single round-trip
+        assert list(mpg.stats()) == ['axis.apply_batch']
+        assert mpg.stats()['axis.apply_batch']['count'] == 1
+        # in order, such that the units are added to the new label
+        assert ax.xlabel == 'x'
+        assert ax.xunits == 's'
+        fig.close()
+
+        fig = mpg.figure(title='Test')
+        mpg.plot3([1, 2, 3], [2, 3, 4], [3, 4, 5])
+        ax = mpg.gca()
+        with ax.batch():
+            ax.azimuth = 30
+            ax.label_fmt = '.1f'
+            ax.zlim = [0, 6]
+            ax.update()
+        assert ax.label_fmt == '.1f'
+        ax.elevation = 20
+        ax.update(immediate=True)
+        assert ax.elevation == 20
+        fig.close()
+
+    try:
+        main()
+    finally:
+        options.set_options(call_stats=False)
+
+
+def test_nonblocking():
+    """ Test non-blocking calls and synchronizing with the GUI thread """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        mpg.plot3([1, 2, 3], [2, 3, 4], [3, 4, 5])
+        ax = mpg.gca()
+        with ax.nonblocking():
+            future = ax.line([1, 2, 3], [3, 2, 1], [0, 1, 0])
+            ax.azimuth = 30
+            ax.update()
+        mpg.flush()
+        assert future.done()
+        assert ax.azimuth == 30
+        fig.close()
+
+    main()
+
+
+def test_attribute_cache():
+    """ Test reading cached attributes after modifying them """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        mpg.plot([1, 2, 3], [2, 3, 4])
+        ax = mpg.gca()
+        ax.xlabel = 'x'
+        assert ax.xlabel == 'x'
+        ax.xlabel = 'y'
+        assert ax.xlabel == 'y'
+        width = fig.width
+        assert fig.width == width
+        fig.close()
+
+    main()
+
+
+@pytest.mark.usefixtures('requires_gl')
+def test_savefig(tmp_path):
+    """ Test saving 2D and 3D figures in headless mode """
+
+    @mpg.plotter(headless=True)
+    def main():
+        mpg.figure(title='2D')
+        mpg.plot([1, 2, 3], [2, 3, 4])
+        mpg.savefig(tmp_path / 'plot.png')
+        mpg.savefig(tmp_path / 'plot_hires.png', dpi=192)
+        mpg.figure(title='3D')
+        mpg.plot3([1, 2, 3], [2, 3, 4], [3, 4, 5])
+        mpg.savefig(tmp_path / 'plot3.png', dpi=192)
+
+    try:
+        main()
+    finally:
+        options.set_options(headless=False)
+    assert (tmp_path / 'plot.png').stat().st_size > 0
+    assert (tmp_path / 'plot_hires.png').stat().st_size > 0
+    assert (tmp_path / 'plot3.png').stat().st_size > 0
+
+
+def test_streaming_line():
+    """ Test appending samples to a line with a rolling window """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        line = mpg.plot([0, 1], [0, 1], max_points=100)
+        with line.nonblocking():
+            for start in range(2, 200, 10):
+                samples = range(start, start + 10)
+                line.append(samples, samples)
+        assert line.count == 100
+        assert line.max_points == 100
+        fig.close()
+
+    main()
+
+
+@pytest.mark.usefixtures('requires_gl')
+def test_line3_vertex_colors(tmp_path):
+    """ Test drawing a 3D line with a color per vertex """
+
+    @mpg.plotter(headless=True)
+    def main():
+        fig = mpg.figure(title='Test')
+        t = np.linspace(0, 1, 50)
+        colors = np.tile([1.0, 0.0, 0.0, 1.0], (len(t), 1))
+        line = mpg.plot3(t, t, t, color=colors, width=5, glOptions='opaque')
+        assert line.count == len(t)
+        mpg.savefig(tmp_path / 'line.png')
+        fig.close()
+
+    try:
+        main()
+    finally:
+        options.set_options(headless=False)
+    image = QtGui.QImage(str(tmp_path / 'line.png')).convertToFormat(
+        QtGui.QImage.Format.Format_RGBA8888
+    )
+    pixels = fn.ndarray_from_qimage(image)
+    red = (pixels[..., 0] > 200) & (pixels[..., 1] < 60) & (pixels[..., 2] < 60)
+    assert red.any()
+
+
+def test_streaming_line3():
+    """ Test appending vertices to a 3D line with a tail """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        line = mpg.plot3([0, 1], [0, 1], [0, 1], tail=50)
+        with line.nonblocking():
+            for start in range(2, 100, 10):
+                samples = range(start, start + 10)
+                line.append(samples, samples, samples)
+        assert line.count == 50
+        fig.close()
+
+    main()
+
+
+def test_envelope_line():
+    """ Test drawing and updating a line from its min/max envelope """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        x = np.arange(100_000)
+        line = mpg.plot(x, np.sin(x/100), envelope=True)
+        ax = mpg.gca()
+        ax.xlim = (1_000, 2_000)
+        line.set_data(x, np.cos(x/100))
+        line.append(x[-1] + x, np.cos(x/100))
+        line_envelope = gui_object('line', line).envelope
+        # the pyramid is built in the background and holds all samples
+        wait_until(lambda: line_envelope.pyramid is not None
+                   and line_envelope.pyramid.count == 2*len(x))
+        assert line_envelope.pyramid.levels
+        fig.close()
+
+    main()
+
+
+def test_animate():
+    """ Test animating 2D and 3D lines """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        line = mpg.plot([0, 1], [0, 1])
+
+        def update(frame):
+            return [(line, ([0, 1, 2], [frame, 1, 0]))]
+
+        stats = mpg.animate(update, frames=5, interval=10)
+        assert stats['frames'] + stats['dropped'] == 5
+        assert stats['paint_time']['max'] > 0
+        fig.close()
+
+        fig = mpg.figure(title='Test')
+        line = mpg.plot3([0, 1], [0, 1], [0, 1])
+        stats = mpg.animate(
+            lambda frame: [(line, ([0, 1], [0, frame + 1], [1, 0]))],
+            frames=3, interval=10,
+        )
+        assert stats['frames'] >= 1
+        fig.close()
+
+    main()
+
+
+def test_animate_error():
+    """ Test that an error applying a frame reaches the caller """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        line = mpg.plot3([0, 1], [0, 1], [0, 1])
+        # the frames lack the z coordinates of the line
+        mpg.animate(
+            lambda frame: [(line, ([0, 1], [0, frame + 1]))],
+            frames=3, interval=10,
+        )
+        fig.close()
+
+    with pytest.raises(TypeError):
+        main()
+
+
+def test_surface_set_z():
+    """ Test replacing the heights of a surface """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        x = np.linspace(-1, 1, 20)
+        y = np.linspace(-1, 1, 30)
+        z = np.outer(x, y)
+        surface = mpg.surf(x, y, z)
+        surface.set_z(0.9*z)
+        surface.set_z(10*z)
+        new_z = np.outer(x, y)**2
+        surface.set_z(new_z)
+        mpg.gca().update(immediate=True)
+        instance = gui_object('item3d', surface).item.instance
+        # the vertexes hold the new heights, up to the axis' scaling
+        vertex_z = instance._vertexes[..., 2]
+        assert np.corrcoef(vertex_z.ravel(), new_z.ravel())[0, 1] > 0.999
+        fig.close()
+
+    main()
+
+
+def test_item_handles():
+    """ Test updating, hiding and removing 3D items through their handles """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        points = mpg.points3([0, 1, 2], [0, 1, 2], [0, 1, 0])
+        line = mpg.plot3([0, 1], [0, 1], [0, 1])
+        points.set_data([0, 1], [1, 0], [0, 0])
+        assert points.count == 2
+        line.set_visible(False)
+        assert not line.visible
+        line.remove()
+        axis = mpg.gca()
+        axis.update(immediate=True)
+        # the remaining points lie in the plane z = 0
+        limits = gui_object('axis', axis)._aggregate_limits()
+        np.testing.assert_array_equal(limits['x'], [0, 1])
+        np.testing.assert_array_equal(limits['z'], [0, 0])
+        fig.close()
+
+    main()
+
+
+def test_item_handles_after_remove():
+    """ Test that handles stay valid after removing an earlier item """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        first = mpg.points3([0, 1], [0, 1], [0, 1])
+        second = mpg.points3([0, 1, 2], [0, 1, 2], [0, 1, 2])
+        first.remove()
+        second.set_data([0, 1], [1, 0], [0, 0])
+        assert second.count == 2
+        third = mpg.points3([0], [0], [0])
+        assert third.count == 1
+        second.remove()
+        third.set_visible(False)
+        assert not third.visible
+        fig.close()
+
+    main()
+
+
+def test_nan_points():
+    """ Test 3D items with missing values """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        points = mpg.points3([0, np.nan, 2], [0, 1, 2], [0, 1, np.nan])
+        bounds = gui_object('item3d', points).item.bounds
+        # the bounds skip the missing values
+        np.testing.assert_array_equal(bounds['x'], [0, 2])
+        np.testing.assert_array_equal(bounds['z'], [0, 1])
+        points.set_data([0, 1], [1, np.nan], [0, 0])
+        bounds = gui_object('item3d', points).item.bounds
+        np.testing.assert_array_equal(bounds['y'], [1, 1])
+        line = mpg.plot3([0, 1], [0, 1], [0, np.nan])
+        line.append(2, 2, 2)
+        bounds = gui_object('item3d', line).item.bounds
+        np.testing.assert_array_equal(bounds['z'], [0, 2])
+        fig.close()
+
+    main()
+
+
+def test_colormap():
+    """ Test colormapping surfaces, lines and points by height """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        x = np.linspace(-1, 1, 20)
+        z = np.outer(x, x)
+        surface = mpg.surf(x, x, z, colormap='viridis', clim=(-0.5, 0.5))
+        surface.set_colormap('CET-L10')
+        line = mpg.plot3(x, x, x, colormap='viridis')
+        line.append(2, 2, 2)
+        points = mpg.points3(x, x, x, colormap='viridis', clim=(0, 1))
+        points.set_colormap(None)
+        # the lookup table of the new colormap is uploaded as texture
+        surface_colormap = gui_object('item3d', surface).item.instance._colormap
+        expected = pg.colormap.get('CET-L10').getLookupTable(
+            0.0, 1.0, LUT_SIZE, alpha=True, mode=pg.ColorMap.BYTE
+        )
+        np.testing.assert_array_equal(surface_colormap._lut, expected)
+        line_colormap = gui_object('item3d', line).item.instance._colormap
+        assert line_colormap.name == 'viridis'
+        assert not gui_object('item3d', points).item.instance._colormap.enabled
+        fig.close()
+
+    main()
+
+
+@pytest.mark.usefixtures('requires_gl')
+def test_surface_lod(tmp_path):
+    """
+    Test drawing a surface at a level of detail and exporting it, see
+    surface_test for the levels themselves
+    """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        x = np.linspace(-1, 1, 400)
+        z = np.outer(x, x)
+        surface = mpg.surf(x, x, z, lod=True, gridPixels=8)
+        mpg.savefig(tmp_path / 'surface.png')
+        instance = gui_object('item3d', surface).item.instance
+        assert instance._levels is not None
+        # the 400 x 400 grid spans fewer pixels than it has cells, such that
+        # a coarser level is drawn, with wireframe lines skipped
+        level, step = instance._select_level()
+        assert level > 0
+        assert step > 1
+        fig.close()
+
+    main()
+
+
+@pytest.mark.usefixtures('requires_gl')
+def test_points_lod(tmp_path):
+    """ Test drawing points in a level of detail order and exporting them """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        x, y, z = np.random.default_rng(0).normal(size=(3, 10_000))
+        points = mpg.points3(x, y, z, lod=True, lodPoints=1_000)
+        mpg.gca().azimuth = 30
+        mpg.savefig(tmp_path / 'points.png')
+        instance = gui_object('item3d', points).item.instance
+        # the export has drawn all points and started building their order
+        wait_until(lambda: instance._lod_counts is not None)
+        # while the camera moves, only a subset of the points is drawn
+        assert instance._lod_budget() < len(x)
+        fig.close()
+
+    main()
+
+
+def test_point_attributes():
+    """ Test coloring points by values and giving them individual sizes """
+
+    @mpg.plotter
+    def main():
+        fig = mpg.figure(title='Test')
+        x, y, z = np.random.default_rng(0).normal(size=(3, 100))
+        points = mpg.points3(x, y, z, c=np.hypot(x, y), s=np.arange(100) % 8)
+        points.set_data(x, y, 2*z)
+        points.set_data(x[:50], y[:50], z[:50], c=x[:50], s=4)
+        points.set_colormap('CET-L10', clim=(-1, 1))
+        fig.close()
+
+    main()
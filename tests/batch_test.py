@@ -0,0 +1,32 @@
+""" Tests for the parallel batch export """
+
+import mlpyqtgraph as mpg
+from mlpyqtgraph.batch import RenderJob
+
+
+def plot_line(offset=0):
+    """ Plotting function of a render job """
+    mpg.plot([1, 2, 3], [2 + offset, 3, 4])
+    return offset
+
+
+def fail():
+    """ Plotting function of a failing render job """
+    raise ValueError('failing job')
+
+
+def test_render_batch(tmp_path):
+    """ Test rendering jobs in parallel and streaming their results """
+    jobs = [
+        (plot_line, str(tmp_path / 'first.png')),
+        RenderJob(plot_line, str(tmp_path / 'second.png'), args=(1,), dpi=192),
+        (fail, str(tmp_path / 'failed.png')),
+    ]
+    results = sorted(mpg.render_batch(jobs, workers=2))
+    assert [result.index for result in results] == [0, 1, 2]
+    assert results[1].result == 1
+    assert results[0].duration > 0
+    assert 'failing job' in results[2].error
+    assert (tmp_path / 'first.png').stat().st_size > 0
+    assert (tmp_path / 'second.png').stat().st_size > 0
+    assert not (tmp_path / 'failed.png').exists()
@@ -0,0 +1,43 @@
+""" Smoke tests for the hot path benchmark suite """
+
+import pytest
+
+from benchmarks import hot_paths
+
+
+def test_run_benchmarks():
+    """ Test that all benchmarks run at the smallest data size """
+    results = hot_paths.run_benchmarks(sizes=(1_000,), repeats=1, min_time=0)
+    assert set(results) == set(hot_paths.BENCHMARKS)
+    assert results['Axis2D.add']['1000']['best'] > 0
+
+
+def test_compare():
+    """ Test detecting regressions against the baseline """
+    baseline = {'a': {'1000': {'best': 1.0}}, 'b': {'1000': {'best': 1.0}}}
+    results = {'a': {'1000': {'best': 1.1}}, 'b': {'1000': {'best': 2.0}}}
+    assert hot_paths.compare(results, baseline) == [('b', '1000', 2.0)]
+
+
+def test_import_ratio():
+    """ Test comparing the import time with that of the dependencies """
+    package, dependencies = hot_paths.IMPORT_BENCHMARKS
+    results = {
+        package: {'0': {'best': 3.0}}, dependencies: {'0': {'best': 2.0}},
+    }
+    assert hot_paths.import_ratio(results) == pytest.approx(1.5)
+    assert hot_paths.import_ratio({package: results[package]}) is None
+
+
+def test_first_run_records_baseline(tmp_path):
+    """ Test that the first run records the baseline of the machine """
+    baseline = tmp_path/'baseline.json'
+    argv = [
+        '--filter', 'ticklabels.coord_generator', '--sizes', '1000',
+        '--repeats', '1', '--tolerance', '100', '--baseline', str(baseline),
+    ]
+    assert hot_paths.main(argv) == 0
+    recorded = baseline.read_text(encoding='utf-8')
+    assert hot_paths.main(argv) == 0
+    assert baseline.read_text(encoding='utf-8') == recorded
+    assert hot_paths.main([*argv, '--save-baseline']) == 0
@@ -0,0 +1,98 @@
+""" Tests for the reusable buffers and copy counters """
+
+import numpy as np
+import pytest
+
+from mlpyqtgraph.buffers import (
+    CopyCounter, GrowableBuffer, ReusableBuffer, RingBuffer, as_float32,
+    copy_counter,
+)
+from mlpyqtgraph.utils.ticklabels import LinearTransform
+
+
+def test_reusable_buffer():
+    """ Test that the buffer is only reallocated if its capacity is exceeded """
+    buffer = ReusableBuffer()
+    first = buffer.get((100, 3))
+    assert first.shape == (100, 3)
+    assert first.dtype == np.float32
+    assert first.flags.c_contiguous
+    second = buffer.get((50, 3))
+    assert np.shares_memory(first, second)
+    third = buffer.get((101, 3))
+    assert not np.shares_memory(first, third)
+    assert buffer.capacity >= 450
+
+
+def test_as_float32_counts_copies():
+    """ Test that only actual copies are counted """
+    copy_counter.reset()
+    array = np.zeros(10, dtype=np.float32)
+    assert as_float32(array, name='test') is array
+    as_float32(np.zeros(10), name='test')
+    assert copy_counter.stats()['test'] == {'calls': 2, 'bytes': 40}
+
+
+def test_copy_counter_reset():
+    """ Test resetting the counters """
+    counter = CopyCounter()
+    counter.record('test', 8)
+    counter.reset()
+    assert not counter.stats()
+
+
+def test_linear_transform_out():
+    """ Test writing the linear transform into a float32 buffer column """
+    transform = LinearTransform((0.0, 10.0), (0.0, 1.0))
+    values = np.linspace(0.0, 10.0, 11)
+    out = np.empty((11, 3), dtype=np.float32)
+    transform(values, out=out[:, 1])
+    np.testing.assert_allclose(out[:, 1], transform(values), rtol=1e-6)
+
+
+def test_ring_buffer():
+    """ Test the rolling window of the ring buffer """
+    ring = RingBuffer(5)
+    samples = []
+    for chunk in ([1, 2], [3], [4, 5, 6], list(range(7, 14))):
+        ring.append(chunk)
+        samples.extend(chunk)
+        np.testing.assert_array_equal(ring.view(), samples[-5:])
+    assert ring.view().flags.c_contiguous
+    assert ring.append([14]) == (slice(1, 2), slice(6, 7))
+
+
+def test_growable_buffer():
+    """ Test appending rows to the growable buffer """
+    buffer = GrowableBuffer(row_shape=(3,))
+    assert buffer.append(np.ones((5, 3))) == (slice(0, 5),)
+    assert buffer.append(np.zeros((2, 3))) == (slice(5, 7),)
+    assert buffer.capacity >= 7
+    np.testing.assert_array_equal(buffer.view()[5:], 0.0)
+
+
+def test_growable_buffer_write():
+    """ Test overwriting rows of the growable buffer from an offset """
+    buffer = GrowableBuffer(row_shape=(3,), dtype=np.float32)
+    array = np.zeros((4, 3), dtype=np.float32)
+    buffer.assign(array)
+    assert np.shares_memory(buffer.array, array)
+    assert buffer.write(2, np.ones((3, 3))) == (slice(2, 5),)
+    assert buffer.count == 5
+    assert buffer.capacity == 8
+    np.testing.assert_array_equal(buffer.view()[2:], 1.0)
+    with pytest.raises(IndexError):
+        buffer.write(6, np.ones((1, 3)))
+
+
+def test_growable_buffer_write_copies_assigned():
+    """ Test that writing rows doesn't change an assigned array """
+    buffer = GrowableBuffer(row_shape=(3,), dtype=np.float32)
+    array = np.zeros((4, 3), dtype=np.float32)
+    buffer.assign(array)
+    buffer.write(1, np.ones((1, 3)))
+    np.testing.assert_array_equal(array, 0.0)
+    np.testing.assert_array_equal(buffer.view()[1], 1.0)
+    owned = buffer.array
+    buffer.write(2, np.ones((1, 3)))
+    assert buffer.array is owned
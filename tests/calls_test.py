@@ -0,0 +1,33 @@
+""" Tests of the registry of non-blocking calls """
+
+import threading
+from concurrent import futures
+
+from mlpyqtgraph.calls import PendingCalls
+from mlpyqtgraph.config import options
+
+
+def test_track_releases_lock():
+    """ Test that waiting for the oldest pending call doesn't block others """
+    max_pending = options.get_option('max_pending_calls')
+    options.set_options(max_pending_calls=1)
+    try:
+        pending = PendingCalls()
+        oldest, newest = futures.Future(), futures.Future()
+        pending.track(oldest)
+        tracking = threading.Thread(
+            target=pending.track, args=(newest,), daemon=True
+        )
+        tracking.start()
+        tracking.join(timeout=0.1)
+        assert tracking.is_alive()
+        # another thread can still flush while track waits
+        assert pending._lock.acquire(timeout=1.0)
+        pending._lock.release()
+        oldest.set_result(None)
+        tracking.join(timeout=1.0)
+        assert not tracking.is_alive()
+        newest.set_result(None)
+        pending.flush(timeout=1.0)
+    finally:
+        options.set_options(max_pending_calls=max_pending)
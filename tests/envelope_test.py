@@ -0,0 +1,85 @@
+""" Tests of the min/max envelopes of 2D lines """
+
+import numpy as np
+import pyqtgraph as pg
+import pytest
+
+from mlpyqtgraph import envelope
+from mlpyqtgraph.envelope import EnvelopePyramid, LineEnvelope
+
+
+def test_envelope_keeps_peaks():
+    """ Test that the envelope of a single spike contains the spike """
+    x = np.arange(1_000_003, dtype=float)
+    y = np.zeros_like(x)
+    y[123_457] = 5.0
+    y[654_321] = -3.0
+    pyramid = EnvelopePyramid(x, y)
+    x_env, y_env = pyramid.select(x[0], x[-1], pixels=500)
+    assert len(x_env) <= 2*500
+    assert y_env.max() == pytest.approx(5.0)
+    assert y_env.min() == pytest.approx(-3.0)
+    assert x_env[0] == x[0]
+
+
+def test_envelope_zoomed_in():
+    """ Test that a narrow range returns the samples themselves """
+    x = np.linspace(0.0, 1.0, 100_000)
+    y = np.sin(50*x)
+    pyramid = EnvelopePyramid(x, y)
+    x_sel, y_sel = pyramid.select(0.5, 0.501, pixels=800)
+    assert len(x_sel) < 200
+    np.testing.assert_array_equal(y_sel, np.sin(50*x_sel))
+    assert x_sel[0] <= 0.5 and x_sel[-1] >= 0.501
+
+
+def test_unsorted_envelope():
+    """ Test that unsorted x coordinates have no envelope levels """
+    x = np.random.default_rng(0).random(10_000)
+    pyramid = EnvelopePyramid(x, np.zeros_like(x))
+    assert not pyramid.sorted
+    assert not pyramid.levels
+
+
+def test_extend_envelope():
+    """ Test that extending a pyramid equals building it from all samples """
+    x = np.arange(300_001, dtype=float)
+    y = np.sin(x/1_000)*np.sqrt(x)
+    pyramid = EnvelopePyramid(x[:1_000], y[:1_000])
+    for start, stop in ((1_000, 1_001), (1_001, 70_000), (70_000, len(x))):
+        pyramid.extend(x[start:stop], y[start:stop])
+    expected = EnvelopePyramid(x, y)
+    assert len(pyramid.levels) == len(expected.levels)
+    for level, expected_level in zip(pyramid.levels, expected.levels):
+        assert level[0] == expected_level[0]
+        for values, expected_values in zip(level[1:], expected_level[1:]):
+            np.testing.assert_array_equal(values, expected_values)
+
+
+def test_extend_unsorted_envelope():
+    """ Test that samples before the last position discard the levels """
+    x = np.arange(10_000, dtype=float)
+    pyramid = EnvelopePyramid(x, np.zeros_like(x))
+    assert pyramid.levels
+    pyramid.extend([5.0], [1.0])
+    assert not pyramid.sorted
+    assert not pyramid.levels
+    assert pyramid.count == len(x) + 1
+
+
+def test_line_envelope():
+    """ Test that a line builds its pyramid from a copy and extends it """
+    app = pg.mkQApp()
+    plot = pg.PlotWidget()
+    line = LineEnvelope(plot.plot(), plot.getViewBox())
+    x = np.arange(100_000, dtype=float)
+    y = np.zeros_like(x)
+    line.set_data(x, y)
+    y[0] = 1.0
+    envelope._executor.submit(lambda: None).result()
+    app.processEvents()
+    assert line.pyramid.y[0] == pytest.approx(0.0)
+    x_all, y_all = np.arange(200_000, dtype=float), np.ones(200_000)
+    line.extend(x_all, y_all)
+    assert line.pyramid.count == len(x_all)
+    assert line.pyramid.levels[-1][3].max() == pytest.approx(1.0)
@@ -0,0 +1,38 @@
+""" Tests of the colormap shaders and lookup table textures """
+
+import numpy as np
+
+from mlpyqtgraph.utils import glcolormap
+
+
+def test_fragment_shaders():
+    """ Test that the lookup function is part of the fragment shaders """
+    for shader in (glcolormap.FRAGMENT_LEGACY, glcolormap.FRAGMENT_CORE):
+        assert 'vec2((t*255.0 + 0.5)/256.0, 0.5)' in shader
+        assert shader.count('{') == shader.count('}') == 2
+
+
+def test_forget_context():
+    """ Test that textures are dropped with the last context using them """
+    group, first, second = object(), object(), object()
+    glcolormap._contexts[group] = {first, second}
+    glcolormap._textures[(group, 'viridis')] = 1
+    glcolormap._forget_context(first, group)
+    assert (group, 'viridis') in glcolormap._textures
+    glcolormap._forget_context(second, group)
+    assert (group, 'viridis') not in glcolormap._textures
+    assert group not in glcolormap._contexts
+
+
+def test_colors():
+    """ Test coloring values on the CPU with the lookup table """
+    colormap = glcolormap.ItemColormap()
+    colormap.setColormap('viridis')
+    lut = colormap._lut
+    colors = colormap.colors([-1.0, 0.0, 0.5, 1.0, 2.0, np.nan], [0.0, 1.0])
+    assert colors.dtype == np.uint8
+    np.testing.assert_array_equal(colors[[0, 1, 5]], lut[[0, 0, 0]])
+    np.testing.assert_array_equal(colors[[3, 4]], lut[[-1, -1]])
+    np.testing.assert_array_equal(colors[2], lut[128])
+    colormap.setClim((0.0, 2.0))
+    np.testing.assert_array_equal(colormap.colors([2.0], None), lut[[-1]])
@@ -0,0 +1,15 @@
+""" Guards for the cold start of importing mlpyqtgraph """
+
+import subprocess
+import sys
+
+
+def test_opengl_not_imported():
+    """ Test that the OpenGL stack is only imported for 3D axes """
+    code = (
+        'import sys, mlpyqtgraph; '
+        'print(any(name.split(".")[0] == "OpenGL" or '
+        'name.startswith("pyqtgraph.opengl") for name in sys.modules))'
+    )
+    output = subprocess.check_output([sys.executable, '-c', code], text=True)
+    assert output.strip() == 'False'
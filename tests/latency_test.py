@@ -0,0 +1,62 @@
+""" Tests for the call latency statistics """
+
+import json
+
+import numpy as np
+import pytest
+from pqthreads import refs
+
+import mlpyqtgraph as mpg
+from mlpyqtgraph.config import options
+from mlpyqtgraph.latency import CallStats, CallTimes, payload_size
+
+
+def test_payload_size():
+    """ Test estimating the payload size of call arguments """
+    array = np.zeros(100)
+    assert payload_size(((array, 'abc'), {'value': 1})) == 800 + 3 + 8
+    assert payload_size(list(range(10_000))) == 80_000
+
+
+def test_call_stats_report():
+    """ Test the percentiles and histogram of the recorded calls """
+    stats = CallStats()
+    for delay in (1e-6, 1e-5, 1e-3):
+        times = CallTimes(0.0, delay, 2*delay, 3*delay)
+        stats.record('axis.surf', times, 100)
+    report = stats.report()
+    entry = report['axis.surf']
+    assert entry['count'] == 3
+    assert entry['queue_delay']['max'] == pytest.approx(1e-3)
+    assert entry['bytes']['mean'] == pytest.approx(100)
+    assert sum(entry['histogram']) == 3
+    assert 'axis.surf' in str(report)
+    stats.reset()
+    assert not stats.report()
+
+
+def test_call_stats(tmp_path):
+    """ Test recording call statistics while plotting """
+    filename = tmp_path / 'stats.json'
+
+    @mpg.plotter(call_stats=True, call_stats_file=str(filename))
+    def main():
+        mpg.stats(reset=True)
+        fig = mpg.figure(title='Test')
+        mpg.plot(np.arange(1_000.0), np.arange(1_000.0))
+        ax = mpg.gca()
+        ax.xlabel = 'x'
+        assert 'axis.xlabel=' in mpg.stats()
+        # creating the line carries its samples
+        assert mpg.stats()['line.create']['bytes']['max'] >= 16_000
+        line_container = refs.worker.get('line')
+        line_container.close(line_container.back())
+        assert 'line.delete' in mpg.stats()
+        fig.close()
+
+    try:
+        main()
+    finally:
+        options.set_options(call_stats=False, call_stats_file=None)
+    report = json.loads(filename.read_text())
+    assert {'figure.add_axis', 'figure.create', 'figure.delete'} <= set(report)
@@ -0,0 +1,35 @@
+""" Tests of the 2D line's argument checks """
+
+import numpy as np
+import pytest
+
+from mlpyqtgraph.lines import Line2D
+
+
+@pytest.mark.parametrize('max_points', [0, -1])
+def test_invalid_max_points(max_points):
+    """ Test that a rolling window holds at least one sample """
+    with pytest.raises(ValueError):
+        Line2D(0, 0, [0, 1], [0, 1], max_points=max_points)
+
+
+def test_max_points_read_only():
+    """ Test that the rolling window can't be resized after creation """
+    assert Line2D.max_points.fset is None
+
+
+def test_check_samples():
+    """ Test that samples are arrays with as many x as y values """
+    x_coord, y_coord = Line2D.check_samples(1, 2)
+    np.testing.assert_array_equal(x_coord, [1])
+    np.testing.assert_array_equal(y_coord, [2])
+    with pytest.raises(ValueError):
+        Line2D.check_samples([1, 2], [1])
+    with pytest.raises(ValueError):
+        Line2D.check_samples([[1, 2]], [[1, 2]])
+
+
+def test_invalid_initial_samples():
+    """ Test that the samples of a new line are checked """
+    with pytest.raises(ValueError):
+        Line2D(0, 0, [0, 1, 2], [0, 1])
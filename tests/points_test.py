@@ -0,0 +1,114 @@
+""" Tests of the points item's attributes and level of detail order """
+
+import numpy as np
+import pyqtgraph as pg
+import pytest
+
+from mlpyqtgraph.axes3d import check_point_count
+from mlpyqtgraph.utils.GLPointsItem import LOD_LEVELS, GLPointsItem, lod_order
+
+
+def test_compact_sizes():
+    """ Test that whole pixel sizes are stored as single bytes """
+    sizes = GLPointsItem._compact_sizes([1, 5, 255])
+    assert sizes.dtype == np.uint8
+    np.testing.assert_array_equal(sizes, [1, 5, 255])
+    assert GLPointsItem._compact_sizes([1.5, 2]).dtype == np.float32
+    assert GLPointsItem._compact_sizes([256]).dtype == np.float32
+
+
+def test_check_point_count():
+    """ Test that attributes per point need a value for each point """
+    check_point_count(3, c=[1, 2, 3], s=5, color=None)
+    with pytest.raises(ValueError):
+        check_point_count(3, c=[1, 2])
+    with pytest.raises(ValueError):
+        check_point_count(3, color=np.ones((4, 4)))
+
+
+def test_promote_sizes():
+    """ Test that writing sizes which don't fit uint8 promotes the sizes """
+    pg.mkQApp()
+    points = GLPointsItem(pos=np.zeros((3, 3)), sizes=[1, 2, 3])
+    assert points.sizes.dtype == np.uint8
+    points.setData(sizes=[2.5], offset=1)
+    points.append(np.ones((1, 3)), sizes=300)
+    assert points.sizes.dtype == np.float32
+    np.testing.assert_array_equal(points.sizes, [1, 2.5, 3, 300])
+
+
+def test_lod_order_invalidated():
+    """ Test that any position write discards the level of detail order """
+    pg.mkQApp()
+    pos = np.random.default_rng(0).normal(size=(100, 3))
+    points = GLPointsItem(pos=pos, lod=True)
+    extent = (pos.min(axis=0), pos.max(axis=0))
+    built = (points._lod_generation, *lod_order(pos), extent)
+    points._set_lod_order(built)
+    assert points._lod_counts is not None
+    points.setData(pos=2*pos[:1], offset=0)
+    assert points._lod_counts is None
+    # a build of the previous positions is discarded
+    points._set_lod_order(built)
+    assert points._lod_counts is None
+    points.append(pos[:1])
+    assert points._lod_counts is None
+
+
+def test_lod_order():
+    """ Test that the order is a permutation, coarse levels first """
+    pos = np.random.default_rng(1).normal(size=(50_000, 3))
+    order, counts = lod_order(pos)
+    assert order.dtype == np.uint32
+    np.testing.assert_array_equal(np.sort(order), np.arange(len(pos)))
+    assert len(counts) == LOD_LEVELS + 1
+    assert counts[0] == 1
+    assert np.all(np.diff(counts) >= 0)
+
+
+def test_lod_order_keeps_outliers():
+    """ Test that a sparse cluster is part of a small prefix """
+    rng = np.random.default_rng(2)
+    dense = rng.uniform(0.0, 0.1, size=(100_000, 3))
+    sparse = rng.uniform(0.9, 1.0, size=(10, 3))
+    pos = np.concatenate((dense, sparse))
+    order, counts = lod_order(pos)
+    prefix = order[:counts[3]]
+    assert counts[3] < 100
+    assert np.any(prefix >= len(dense))
+
+
+def test_lod_order_nan():
+    """ Test that points with missing coordinates come last """
+    pos = np.random.default_rng(3).normal(size=(1_000, 3))
+    pos[:10, 2] = np.nan
+    order, counts = lod_order(pos)
+    assert set(order[-10:]) == set(range(10))
+    assert counts[-1] <= len(pos) - 10
+
+
+def test_lod_order_nan_representatives():
+    """ Test that points with missing coordinates don't empty any voxel """
+    pos = np.random.default_rng(4).normal(size=(1_000, 3))
+    pos[::2, 0] = np.nan
+    for seed in range(10):
+        order, counts = lod_order(pos, seed=seed)
+        assert counts[0] == 1
+        assert np.isfinite(pos[order[:counts[-1]]]).all()
+
+
+@pytest.mark.parametrize('offset', [1000.0, -1000.0])
+def test_lod_order_offset(offset):
+    """ Test that a cloud away from the origin is split into voxels """
+    pos = offset + np.random.default_rng(5).uniform(size=(10_000, 3))
+    order, counts = lod_order(pos)
+    np.testing.assert_array_equal(np.sort(order), np.arange(len(pos)))
+    assert counts[0] == 1
+    assert np.all(np.diff(counts[:5]) > 0)
+
+
+def test_lod_order_empty():
+    """ Test that an empty point set has an empty order """
+    order, counts = lod_order(np.zeros((0, 3)))
+    assert len(order) == 0
+    np.testing.assert_array_equal(counts, 0)
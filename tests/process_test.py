@@ -0,0 +1,54 @@
+""" Tests for the out-of-process GUI backend """
+
+import numpy as np
+
+import mlpyqtgraph as mpg
+from mlpyqtgraph.config import options
+from mlpyqtgraph.process import SharedRingBuffer, restore_arrays
+
+
+def test_ring_buffer_pack():
+    """ Test moving large arrays through the shared memory ring buffer """
+    ring = SharedRingBuffer(1 << 21)
+    large = np.arange(100_000.0)
+    small = np.arange(3)
+    payload, block = ring.pack(((large,), {'small': small}))
+    assert block == (0, large.nbytes)
+    restored = restore_arrays(payload, ring.shm.buf)
+    np.testing.assert_array_equal(restored[0][0], large)
+    assert restored[1]['small'] is small
+    ring.release(block)
+    del restored
+    ring.close()
+
+
+def test_ring_buffer_wrap():
+    """ Test that blocks wrap around once the oldest blocks are released """
+    ring = SharedRingBuffer(1 << 20)
+    size = ring.size // 3
+    first = ring.allocate(size)
+    ring.allocate(size)
+    ring.allocate(size)
+    ring.release(first)
+    assert ring.allocate(size // 2) == (0, size // 2)
+    ring.close()
+
+
+def test_process_backend():
+    """ Test plotting with the GUI in a separate process """
+
+    @mpg.plotter(backend='process')
+    def main():
+        fig = mpg.figure(title='Test')
+        line = mpg.plot(np.arange(100_000.0), np.arange(100_000.0))
+        # the samples arrived through the shared memory ring buffer
+        assert line.count == 100_000
+        ax = mpg.gca()
+        ax.xlabel = 'x'
+        assert ax.xlabel == 'x'
+        fig.close()
+
+    try:
+        main()
+    finally:
+        options.set_options(backend='thread')
@@ -0,0 +1,138 @@
+""" Tests of the surface plot item's grid topology """
+
+import numpy as np
+import pyqtgraph as pg
+import pytest
+from pyqtgraph.opengl import GLViewWidget
+
+from mlpyqtgraph.utils.GLSurfacePlotItem import (
+    GLSurfacePlotItem, block_average, grid_topology
+)
+
+
+def test_grid_topology():
+    """ Test the faces and edges of a grid of 3 x 4 vertexes """
+    topology = grid_topology(3, 4)
+    assert topology.faces.shape == (2*3*2, 3)
+    assert topology.edges.shape == (3*3 + 2*4, 2)
+    np.testing.assert_array_equal(
+        topology.faces[:3], [[0, 1, 4], [1, 2, 5], [2, 3, 6]]
+    )
+    np.testing.assert_array_equal(topology.faces[3], [4, 1, 5])
+    assert not topology.faces.flags.writeable
+    assert grid_topology(3, 4) is topology
+
+
+def test_shared_topology():
+    """ Test that surfaces of the same shape share their faces """
+    pg.mkQApp()
+    z = np.zeros((10, 20))
+    first = GLSurfacePlotItem(z=z, showGrid=True)
+    second = GLSurfacePlotItem(z=z + 1.0, showGrid=True)
+    assert first._faces is second._faces
+    assert first.lineplot.topology is second.lineplot.topology
+    assert np.shares_memory(first.lineplot.vertexes, first._vertexes)
+
+
+def test_block_average():
+    """ Test averaging blocks of vertexes for the levels of detail """
+    vertexes = np.arange(5*4*3, dtype=np.float32).reshape(5, 4, 3)
+    level = block_average(vertexes)
+    assert level.shape == (3, 2, 3)
+    np.testing.assert_allclose(level[0, 0], vertexes[:2, :2].mean(axis=(0, 1)))
+    np.testing.assert_allclose(level[-1, -1], vertexes[-1, 2:].mean(axis=0))
+
+
+@pytest.mark.parametrize('shape', [(5, 5), (9, 40), (37, 10), (400, 400)])
+def test_level_count(shape):
+    """ Test counting the levels of detail without building them """
+    pg.mkQApp()
+    surface = GLSurfacePlotItem(z=np.zeros(shape), lod=True)
+    assert surface._levels is None
+    count = surface._level_count()
+    surface._build_levels()
+    assert len(surface._levels) == count
+
+
+def test_select_level(monkeypatch):
+    """
+    Test drawing a coarser level of a surface, which spans fewer pixels than
+    it has cells, unless a shader is set
+    """
+    pg.mkQApp()
+    view = GLViewWidget()
+    x = np.linspace(-1, 1, 400)
+    surface = GLSurfacePlotItem(
+        x=x, y=x, z=np.outer(x, x), lod=True, gridPixels=8
+    )
+    view.addItem(surface)
+    # the projection is only known while painting
+    monkeypatch.setattr(surface, '_projected_size', lambda: 200.0)
+    level, step = surface._select_level()
+    assert level > 0
+    assert step > 1
+    assert len(surface._levels) == surface._level_count()
+    surface.setShader('shaded')
+    assert surface._select_level() == (0, 1)
+
+
+@pytest.mark.parametrize('smooth', [True, False])
+def test_lit_colormap(smooth):
+    """ Test coloring a surface with a shader by its colormap on the CPU """
+    pg.mkQApp()
+    z = np.arange(12.0).reshape(3, 4)
+    surface = GLSurfacePlotItem(
+        z=z, colormap='viridis', shader='shaded', smooth=smooth
+    )
+    lut = surface._colormap._lut
+    surface._update_lit_colors()
+    assert surface.colors.shape == (*surface.vertexes.shape[:-1], 4)
+    origin = surface.vertexes[..., 2] == 0
+    assert np.all(surface.colors[origin] == lut[0])
+    # the origin becomes the highest vertex
+    surface.set_z(-z)
+    surface._update_lit_colors()
+    assert np.all(surface.colors[origin] == lut[-1])
+    surface.setData(colormap=None)
+    surface._update_lit_colors()
+    surface.parseMeshData()
+    assert surface.colors is None
+
+
+def test_thinned_edges():
+    """ Test thinning the wireframe to every other grid line """
+    topology = grid_topology(5, 4)
+    edges = topology.edges_every(2)
+    # rows 0, 2 and 4 and columns 0, 2 and 3
+    assert len(edges) == 3*3 + 3*4
+    assert topology.edges_every(1) is topology.edges
+
+
+def test_set_z():
+    """ Test that set_z updates the parsed vertexes of all meshes """
+    pg.mkQApp()
+    z = np.zeros((10, 20))
+    for smooth in (True, False):
+        surface = GLSurfacePlotItem(z=z, smooth=smooth, showGrid=True)
+        surface.parseMeshData()
+        surface.set_z(z + 2.0)
+        dirty_bits = surface.parseMeshData()
+        assert dirty_bits
+        np.testing.assert_array_equal(surface.vertexes[..., 2], 2.0)
+        np.testing.assert_array_equal(surface.lineplot.vertexes[:, 2], 2.0)
+
+
+def test_set_data_coordinates():
+    """ Test 1D and 2D x and y coordinates and their shape checks """
+    pg.mkQApp()
+    x, y = np.arange(3), np.arange(4)
+    surface = GLSurfacePlotItem(x=x, y=10*y, z=np.zeros((3, 4)))
+    np.testing.assert_array_equal(surface._vertexes[:, 0, 0], x)
+    np.testing.assert_array_equal(surface._vertexes[0, :, 1], 10*y)
+    x_grid, y_grid = np.meshgrid(x, y, indexing='ij')
+    surface.setData(x=x_grid + y_grid)
+    np.testing.assert_array_equal(surface._vertexes[..., 0], x_grid + y_grid)
+    with pytest.raises(ValueError):
+        surface.setData(x=np.zeros((4, 3)))
+    with pytest.raises(ValueError):
+        surface.setData(z=np.zeros((3, 5)))